@@ -5,6 +5,7 @@ import traceback
 import shutil
 import sys
 import json
+from plugin_creation_scripts.trace_spans import span
 
 class AutomateDummyAppCreation:
     def __init__(self, clone_path, dummy_version, plugin_version):
@@ -63,7 +64,8 @@ class AutomateDummyAppCreation:
         """Runs a shell command and logs output."""
         try:
             logging.info(f"Running command: {command}")
-            result = subprocess.run(command, shell=True, check=True, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+            with span(command, "build"):
+                result = subprocess.run(command, shell=True, check=True, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
             logging.info(f"Output: {result.stdout}")
             logging.info(f"Error: {result.stderr}")
         except subprocess.CalledProcessError as e:
@@ -133,13 +135,16 @@ if __name__ == "__main__":
         plugin_version=plugin_version
     )
     try:
-        ## app_creation_mgr.clone_and_checkout()
-        app_creation_mgr.build_and_package_dummy()
-        app_creation_mgr.update_meta_json()
-        app_creation_mgr.invoke_plugin_package_mgr()
-        app_creation_mgr.update_create_application_json()
-        app_creation_mgr.move_to_build_folder()
-        ## app_creation_mgr.invoke_cloud_mp_cli_create_application()
+        # with REGAL_TRACE_FILE set the steps and the scripts they run are traced to one file
+        with span("build", "build", dummy_version=dummy_version, plugin_version=plugin_version):
+            ## app_creation_mgr.clone_and_checkout()
+            with span("build dummy", "build"):
+                app_creation_mgr.build_and_package_dummy()
+            app_creation_mgr.update_meta_json()
+            app_creation_mgr.invoke_plugin_package_mgr()
+            app_creation_mgr.update_create_application_json()
+            app_creation_mgr.move_to_build_folder()
+            ## app_creation_mgr.invoke_cloud_mp_cli_create_application()
         logging.info("Script completed successfully.")
     except Exception as e:
         logging.error(f"Script failed: {e}")
@@ -0,0 +1,134 @@
+import threading
+
+
+class CatalogTable:
+    """
+    The known rows of one marketplace listing, indexed by id, by name and by
+    (name, version). The table is complete once a full listing was loaded into
+    it, a lookup miss on a complete table needs no server round trip.
+    """
+
+    def __init__(self, kind, name_field=None, version_field=None):
+        self.kind = kind
+        self.name_field = name_field
+        self.version_field = version_field
+        self.rows = {}
+        self.by_name = {}
+        self.by_name_version = {}
+        self.complete = False
+
+    def _keys(self, info):
+        # verticals and categories are listed as plain names
+        if self.name_field is None:
+            return info, None
+        version = info.get(self.version_field) if self.version_field else None
+        return info.get(self.name_field), version
+
+    def add(self, row_id, info):
+        if row_id in self.rows:
+            self.remove(row_id)
+        self.rows[row_id] = info
+        name, version = self._keys(info)
+        self.by_name.setdefault(name, []).append(row_id)
+        if self.version_field:
+            self.by_name_version.setdefault((name, version), []).append(row_id)
+
+    def remove(self, row_id):
+        info = self.rows.pop(row_id, None)
+        if info is None:
+            return
+        name, version = self._keys(info)
+        for index, key in ((self.by_name, name), (self.by_name_version, (name, version))):
+            ids = index.get(key)
+            if ids and row_id in ids:
+                ids.remove(row_id)
+                if not ids:
+                    del index[key]
+
+    def matches(self, info, name, version=None):
+        info_name, info_version = self._keys(info)
+        return info_name == name and (version is None or info_version == version)
+
+    def find(self, name, version=None):
+        if version is None:
+            ids = self.by_name.get(name)
+        else:
+            ids = self.by_name_version.get((name, version))
+        return ids[0] if ids else None
+
+    def load(self, entries):
+        self.clear()
+        for row_id, info in entries:
+            self.add(row_id, info)
+        self.complete = True
+
+    def clear(self):
+        self.rows = {}
+        self.by_name = {}
+        self.by_name_version = {}
+        self.complete = False
+
+
+class CatalogCache:
+    """
+    In-process cache of the marketplace catalog for the duration of one CLI run.
+    Mutating calls write through to it (add) or invalidate the affected listing.
+    When a CatalogStore is attached the writes also go through to it.
+    """
+    TABLES = {
+        "verticals": (None, None),
+        "categories": (None, None),
+        "plugin_packages": ("pluginName", "version"),
+        "app_packages": ("appName", "version"),
+        "security_tools": ("toolName", "version"),
+        "test_modules": ("testModuleName", "version"),
+        "applications": ("applicationName", "version"),
+        "modules": ("moduleName", "version")
+    }
+
+    def __init__(self, store=None):
+        self.store = store
+        self.lock = threading.RLock()
+        self.tables = {kind: CatalogTable(kind, *fields) for kind, fields in self.TABLES.items()}
+
+    def find(self, kind, name, version=None):
+        """
+        Returns:
+            tuple: (id or None, whether the cached listing is complete)
+        """
+        with self.lock:
+            table = self.tables[kind]
+            return table.find(name, version), table.complete
+
+    def matches(self, kind, info, name, version=None):
+        return self.tables[kind].matches(info, name, version)
+
+    def is_complete(self, kind):
+        with self.lock:
+            return self.tables[kind].complete
+
+    def entries(self, kind):
+        with self.lock:
+            return list(self.tables[kind].rows.items())
+
+    def add(self, kind, row_id, info):
+        with self.lock:
+            self.tables[kind].add(row_id, info)
+        if self.store is not None:
+            self.store.add(kind, row_id, info)
+
+    def remove(self, kind, row_id):
+        with self.lock:
+            self.tables[kind].remove(row_id)
+        if self.store is not None:
+            self.store.remove(kind, row_id)
+
+    def load(self, kind, entries):
+        with self.lock:
+            self.tables[kind].load(entries)
+
+    def invalidate(self, kind):
+        with self.lock:
+            self.tables[kind].clear()
+        if self.store is not None:
+            self.store.invalidate(kind)
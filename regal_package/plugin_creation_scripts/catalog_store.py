@@ -0,0 +1,143 @@
+import json
+import time
+import sqlite3
+import threading
+
+
+class CatalogStore:
+    """
+    Local SQLite snapshot of the marketplace catalog shared between CLI runs.
+
+    Rows are kept per marketplace (source) and listing (kind) together with the
+    time of the last sync and, when the listing exposes one, the newest update
+    timestamp seen so far (watermark) for incremental syncs.
+    """
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS catalog_rows (
+            source TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            row_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            info TEXT NOT NULL,
+            PRIMARY KEY (source, kind, row_id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS catalog_sync (
+            source TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            synced_at REAL NOT NULL,
+            timestamp_field TEXT,
+            watermark TEXT,
+            PRIMARY KEY (source, kind)
+        )"""
+    ]
+
+    def __init__(self, path, source, ttl):
+        self.path = path
+        self.source = source
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            for statement in self.SCHEMA:
+                self.connection.execute(statement)
+
+    def sync_state(self, kind):
+        """
+        Returns:
+            dict: synced_at, timestamp_field and watermark of the last sync, None if never synced.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT synced_at, timestamp_field, watermark FROM catalog_sync WHERE source = ? AND kind = ?",
+                (self.source, kind)).fetchone()
+        if row is None:
+            return None
+        return {
+            "synced_at": row[0],
+            "timestamp_field": row[1],
+            "watermark": json.loads(row[2]) if row[2] is not None else None
+        }
+
+    def is_fresh(self, kind):
+        state = self.sync_state(kind)
+        return state is not None and state["synced_at"] + self.ttl > time.time()
+
+    def load(self, kind):
+        """
+        Returns:
+            list: The stored (id, info) entries of the listing, in listing order.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT row_id, info FROM catalog_rows WHERE source = ? AND kind = ? ORDER BY position",
+                (self.source, kind)).fetchall()
+        return [(row_id, json.loads(info)) for row_id, info in rows]
+
+    def count(self, kind):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM catalog_rows WHERE source = ? AND kind = ?",
+                (self.source, kind)).fetchone()[0]
+
+    def replace(self, kind, entries, timestamp_field=None, watermark=None):
+        """
+        Replaces the stored listing with a full listing fetched from the server.
+        """
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM catalog_rows WHERE source = ? AND kind = ?", (self.source, kind))
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO catalog_rows (source, kind, row_id, position, info) VALUES (?, ?, ?, ?, ?)",
+                [(self.source, kind, row_id, position, json.dumps(info)) for position, (row_id, info) in enumerate(entries)])
+            self._mark_synced(kind, timestamp_field, watermark)
+
+    def merge(self, kind, entries, timestamp_field=None, watermark=None):
+        """
+        Upserts the rows changed since the last sync, new rows go to the end of the listing.
+        """
+        with self.lock, self.connection:
+            position = self.connection.execute(
+                "SELECT COALESCE(MAX(position), -1) FROM catalog_rows WHERE source = ? AND kind = ?",
+                (self.source, kind)).fetchone()[0]
+            for row_id, info in entries:
+                updated = self.connection.execute(
+                    "UPDATE catalog_rows SET info = ? WHERE source = ? AND kind = ? AND row_id = ?",
+                    (json.dumps(info), self.source, kind, row_id)).rowcount
+                if not updated:
+                    position += 1
+                    self.connection.execute(
+                        "INSERT INTO catalog_rows (source, kind, row_id, position, info) VALUES (?, ?, ?, ?, ?)",
+                        (self.source, kind, row_id, position, json.dumps(info)))
+            self._mark_synced(kind, timestamp_field, watermark)
+
+    def add(self, kind, row_id, info):
+        with self.lock, self.connection:
+            updated = self.connection.execute(
+                "UPDATE catalog_rows SET info = ? WHERE source = ? AND kind = ? AND row_id = ?",
+                (json.dumps(info), self.source, kind, row_id)).rowcount
+            if not updated:
+                self.connection.execute(
+                    "INSERT INTO catalog_rows (source, kind, row_id, position, info) "
+                    "SELECT ?, ?, ?, COALESCE(MAX(position), -1) + 1, ? FROM catalog_rows WHERE source = ? AND kind = ?",
+                    (self.source, kind, row_id, json.dumps(info), self.source, kind))
+
+    def remove(self, kind, row_id):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM catalog_rows WHERE source = ? AND kind = ? AND row_id = ?",
+                (self.source, kind, row_id))
+
+    def invalidate(self, kind):
+        """
+        Marks the listing stale so the next run syncs it again. The rows and the
+        watermark are kept, the sync can still be incremental.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE catalog_sync SET synced_at = 0 WHERE source = ? AND kind = ?",
+                (self.source, kind))
+
+    def _mark_synced(self, kind, timestamp_field, watermark):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO catalog_sync (source, kind, synced_at, timestamp_field, watermark) VALUES (?, ?, ?, ?, ?)",
+            (self.source, kind, time.time(), timestamp_field,
+             json.dumps(watermark) if watermark is not None else None))
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+from trace_spans import span
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class UploadCheckpoint:
+    """
+    Local record of a chunked package upload: the package job it belongs to and
+    the chunks the server acknowledged so far. A rerun for the same, unchanged
+    file resumes the upload from it instead of starting a new package job.
+    """
+
+    def __init__(self, path, package_file, package_type, chunk_size):
+        self.path = path
+        self.package_file = os.path.abspath(package_file)
+        self.package_type = package_type
+        stat = os.stat(package_file)
+        self.data = {
+            "packageFile": self.package_file,
+            "packageType": package_type,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "chunkSize": chunk_size,
+            "packageId": None,
+            "url": None,
+            "chunks": {}
+        }
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_file(cls, checkpoint_dir, package_file, package_type, chunk_size):
+        """
+        Returns the checkpoint of a package file, loaded from disk when a previous
+        upload of the same file content was interrupted.
+        """
+        package_file = os.path.abspath(package_file)
+        name = hashlib.sha256(f"{package_type}:{package_file}".encode()).hexdigest()[:16]
+        directory = checkpoint_dir or os.path.dirname(package_file)
+        checkpoint = cls(os.path.join(directory, f".{os.path.basename(package_file)}.{name}.upload.json"),
+                         package_file, package_type, chunk_size)
+        checkpoint._load()
+        return checkpoint
+
+    @property
+    def package_id(self):
+        return self.data["packageId"]
+
+    @property
+    def url(self):
+        return self.data["url"]
+
+    @property
+    def chunk_size(self):
+        return self.data["chunkSize"]
+
+    def acknowledged(self, index):
+        return self.data["chunks"].get(str(index))
+
+    def start(self, package_id, url):
+        self.data["packageId"] = package_id
+        self.data["url"] = url
+        self.data["chunks"] = {}
+        self._save()
+
+    def acknowledge(self, index, sha256):
+        with self._lock:
+            self.data["chunks"][str(index)] = sha256
+            self._save()
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        # a changed file can not be resumed
+        if all(data.get(key) == self.data[key] for key in ("packageFile", "packageType", "size", "mtime")):
+            self.data = data
+
+    def _save(self):
+        tmp_file = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, 'w') as file:
+                json.dump(self.data, file)
+            os.replace(tmp_file, self.path)
+        except OSError as ex:
+            print(f"Failed to save the upload checkpoint {self.path}: {ex}")
+
+
+class ChunkedUploader:
+    """
+    Uploads a file to an upload URL in fixed size chunks.
+
+    Every chunk is sent as `PUT <url>` with a Content-Range header and its
+    SHA-256 in X-Chunk-Sha256; the server acknowledges it by echoing the digest.
+    Once all chunks are acknowledged `POST <url>` with the manifest of chunk
+    digests asks the server to assemble and verify the file. Chunks recorded in
+    the checkpoint are skipped, so an interrupted upload resumes with the missing
+    chunks. With more than one worker the chunks are uploaded concurrently, each
+    over its own connection. on_progress is called with the bytes sent so far and
+    the bytes left to send when the upload started.
+
+    A sequential upload of all chunks also hashes the whole file on the way, see
+    digest; it stays None for a resumed or concurrent upload.
+    """
+
+    def __init__(self, session, url, package_file, checkpoint, retry=None, workers=1, on_progress=None):
+        self.session = session
+        self.url = url
+        self.package_file = package_file
+        self.checkpoint = checkpoint
+        self.chunk_size = checkpoint.chunk_size
+        self.retry = retry or (lambda func: func())
+        self.workers = max(1, workers)
+        self.on_progress = on_progress
+        self.bytes_pending = 0
+        self.bytes_sent = 0
+        self.elapsed = 0.0
+        self.digest = None
+        self._sha256 = None
+        self._lock = threading.Lock()
+
+    def upload(self):
+        """
+        Returns:
+            requests.Response: The response of the final assemble request.
+
+        Raises:
+            requests.exceptions.HTTPError: If a chunk or the final request is rejected.
+        """
+        size = os.path.getsize(self.package_file)
+        chunks = max(1, -(-size // self.chunk_size))
+        digests = [self.checkpoint.acknowledged(index) for index in range(chunks)]
+        pending = [index for index in range(chunks) if digests[index] is None]
+        self.bytes_pending = sum(min(self.chunk_size, size - index * self.chunk_size) for index in pending)
+        start_time = time.monotonic()
+
+        fd = os.open(self.package_file, os.O_RDONLY)
+        try:
+            if self.workers > 1 and len(pending) > 1:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    futures = {executor.submit(self._upload_chunk, fd, index, size): index for index in pending}
+                    done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+                    for future in not_done:
+                        future.cancel()
+                    for future in done:
+                        digests[futures[future]] = future.result()
+            else:
+                # chunks sent in file order are hashed on the way
+                if len(pending) == chunks:
+                    self._sha256 = hashlib.sha256()
+                for index in pending:
+                    digests[index] = self._upload_chunk(fd, index, size)
+                if self._sha256 is not None:
+                    self.digest = self._sha256.hexdigest()
+        finally:
+            os.close(fd)
+
+        response = self.retry(lambda: self._complete(size, digests))
+        self.elapsed = time.monotonic() - start_time
+        self.checkpoint.remove()
+        return response
+
+    def _upload_chunk(self, fd, index, size):
+        with span("upload chunk", "upload", index=index):
+            data = os.pread(fd, self.chunk_size, index * self.chunk_size)
+            digest = hashlib.sha256(data).hexdigest()
+            if self._sha256 is not None:
+                self._sha256.update(data)
+            self.retry(lambda: self._put_chunk(index, data, digest, size))
+        self.checkpoint.acknowledge(index, digest)
+        with self._lock:
+            self.bytes_sent += len(data)
+            if self.on_progress is not None:
+                self.on_progress(self.bytes_sent, self.bytes_pending)
+        return digest
+
+    def _put_chunk(self, index, data, digest, size):
+        start = index * self.chunk_size
+        end = start + len(data) - 1 if data else start
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "Content-Range": f"bytes {start}-{end}/{size}",
+            "X-Chunk-Sha256": digest
+        }
+        response = self.session.put(self.url, headers=headers, data=data)
+        response.raise_for_status()
+        if response.json().get("sha256") != digest:
+            raise ValueError(f"Chunk {index} was not acknowledged by the server")
+        return response
+
+    def _complete(self, size, digests):
+        data = {
+            "size": size,
+            "chunkSize": self.chunk_size,
+            "chunks": digests
+        }
+        response = self.session.post(self.url, json=data)
+        response.raise_for_status()
+        return response
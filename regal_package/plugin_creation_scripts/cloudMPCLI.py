@@ -5,6 +5,36 @@ import json
 import time
 import os
 import re
+import atexit
+import argparse
+import threading
+import math
+import copy
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http_session import create_session, ConditionalCache
+from token_cache import TokenCache
+from catalog_cache import CatalogCache
+from catalog_store import CatalogStore
+from job_poller import JobPoller, JobPolicy, JobWatcher
+from upload_stream import MultipartFileStream, format_throughput
+from chunked_upload import ChunkedUploader, UploadCheckpoint, DEFAULT_CHUNK_SIZE
+from upload_progress import UploadProgress
+from upload_ledger import UploadLedger, file_sha256
+from operation_planner import OperationPlan
+from run_memo import RunMemo, file_identity
+from request_metrics import RequestMetrics, endpoint_template
+from trace_spans import span
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_PAGE_WORKERS = 4
+DEFAULT_CATALOG_TTL = 300
+MIN_UPLOAD_CHUNK_SIZE = 256 * 1024
+DEFAULT_PLUGIN_UPLOAD_WORKERS = 4
+DEFAULT_PLAN_WORKERS = 4
+# up to this many watched local applications are polled with their own filtered rows instead of the whole table
+FILTERED_POLL_LIMIT = 5
 
 class MyCLI(cmd.Cmd):
     has_inline_args = False
@@ -39,34 +69,145 @@ class MyCLI(cmd.Cmd):
     vertical_id = None
     function_name = None
     uploadPackageType = None
-
-    def __init__(self):
+    UPLOAD_PACKAGE_CATALOG = {
+        'plugin': 'plugin_packages',
+        'repoApp': 'app_packages',
+        'testModule': 'test_modules',
+        'vulnScanTool': 'security_tools'
+    }
+    # job types polled by the JobPoller
+    PACKAGE_UPLOAD_READY = JobPolicy("package upload url", ["COMPLETED", "ACTIVE", "RUNNING", "SUCCESSFUL"], ["FAILED"], timeout=120)
+    PACKAGE_UPLOAD_DONE = JobPolicy("package upload", ["COMPLETED", "SUCCESSFUL"], ["FAILED"], timeout=120)
+    PACKAGE_STATUS_RETRY = JobPolicy("package status", [], timeout=60, initial_delay=2, max_delay=10,
+                                     retry_errors=[requests.exceptions.RequestException, ValueError])
+    APPLICATION_CREATE = JobPolicy("application creation", ["success"], transient_states=["inProgress"], timeout=60)
+    MODULE_CREATE = JobPolicy("module creation", ["success"], transient_states=["inProgress"], timeout=60)
+    APPLICATION_MANAGE = JobPolicy("application action", ["INSTALLED", "NOT_INSTALLED"],
+                                   transient_states=["DOWNLOADING", "INSTALLING", "UNINSTALLING", "UPDATING"], max_delay=30)
+    APPLICATION_UPGRADE = JobPolicy("application upgrade", ["INSTALLED"], ["FAILED"], max_delay=30)
+    LOCAL_APPLICATION_LOOKUP = JobPolicy("local application lookup", ["FOUND"], max_delay=15)
+    LOCAL_APPLICATION_SYNC = JobPolicy("local application sync", ["FOUND"], max_delay=30)
+    CHUNK_RETRY = JobPolicy("upload chunk", [], timeout=120, initial_delay=1, max_delay=10,
+                            retry_errors=[requests.exceptions.RequestException, ValueError])
+    READINESS = JobPolicy("readiness", ["READY"], timeout=120, initial_delay=0.5, max_delay=5)
+
+    # delete_module_set resources of each catalog kind: operation data list, name field, delete method
+    TEARDOWN_KINDS = {
+        'modules': ('moduleDetails', 'moduleName', 'delete_module'),
+        'applications': ('applicationDetails', 'applicationName', 'delete_application'),
+        'test_modules': ('testModuleDetails', 'testModuleName', 'delete_test_module_package'),
+        'app_packages': ('appPackageDetails', 'appPackageName', 'delete_app_package'),
+        'plugin_packages': ('pluginDetails', 'pluginName', 'delete_plugin_package'),
+        'categories': ('categoryDetails', 'categoryName', 'delete_category'),
+        'verticals': ('verticalDetails', 'verticalName', 'delete_vertical')
+    }
+    # row fields that reference other catalog kinds, as sent by createModule and createApplication
+    TEARDOWN_REFERENCES = {
+        'modules': {'applications': 'applications', 'test_modules': 'testModules', 'verticals': 'verticalId'},
+        'applications': {'verticals': 'verticalId', 'categories': 'categoryId', 'plugin_packages': 'plugins',
+                         'app_packages': 'appPackageId'},
+        'categories': {'verticals': 'verticalId'}
+    }
+    UPDATE_TIMESTAMP_FIELDS = ['updatedAt', 'updatedDate', 'updatedOn', 'lastModified', 'lastModifiedDate', 'modifiedAt', 'modifiedDate']
+    # catalog kind: (listing generator, name filter field, version filter field)
+    CATALOG_LISTINGS = {
+        'verticals': ('iter_verticals', 'verticalName', None),
+        'categories': ('iter_categories', 'categoryName', None),
+        'plugin_packages': ('iter_plugin_packages', 'pluginName', 'version'),
+        'app_packages': ('iter_app_packages', 'appName', 'version'),
+        'security_tools': ('iter_security_tools', 'toolName', 'version'),
+        'test_modules': ('iter_test_modules', 'testModuleName', 'version'),
+        'applications': ('iter_applications', 'applicationName', 'version'),
+        'modules': ('iter_modules', 'moduleName', 'version')
+    }
+    token_cache = None
+    catalog_store = None
+    refresh_catalog = False
+    token_cache_file = None
+    page_size = DEFAULT_PAGE_SIZE
+    page_workers = DEFAULT_PAGE_WORKERS
+    readiness_checks = True
+    readiness_fallback_delay = None
+    chunked_upload = False
+    upload_chunk_size = DEFAULT_CHUNK_SIZE
+    upload_checkpoint_dir = None
+    upload_workers = 1
+    upload_parts = None
+    plugin_upload_workers = DEFAULT_PLUGIN_UPLOAD_WORKERS
+    upload_ledger = None
+    force_upload = False
+    plan_workers = DEFAULT_PLAN_WORKERS
+    metrics_json = None
+    PLAN_OPERATIONS = ['create_application', 'create_module']
+
+    def __init__(self, pool_size=None):
         super().__init__()
         MASTER_NODE_IP = os.getenv("MASTER_NODE_IP", "node01")
         self.regal_api_server_url = f"http://{MASTER_NODE_IP}:30606"
+        self.pool_size = int(pool_size or os.getenv("CLOUD_MP_POOL_SIZE", DEFAULT_POOL_SIZE))
+        # every request of the shared session is recorded per endpoint
+        self.metrics = RequestMetrics()
+        # one keep-alive pool shared by every endpoint method
+        self.session, self.http_adapter = create_session(self.pool_size, self.metrics)
+        # a regal API request whose cached access token got rejected is sent again once with a new token
+        self.session.hooks['response'].append(self._retry_unauthorized)
+        self._token_cache_lock = threading.Lock()
+        # largest page size each DataTable endpoint has been seen to serve
+        self.page_size_limits = {}
+        # DataTable pages with an ETag or Last-Modified are asked for again conditionally
+        self.conditional_cache = ConditionalCache()
+        self.catalog = CatalogCache()
+        self.poller = JobPoller(sleep=lambda seconds: self.metrics.sleep("job backoff", seconds))
+        # one polling thread for the package, application and module jobs of every waiter
+        self.watcher = JobWatcher(self.poller)
+        # verticals, categories, packages and applications ensured in this run, shared with the forks of a plan
+        self.memo = RunMemo()
+        self.pending_deletes = []
+        self.progress_local = threading.local()
+        # filterMap of the rows each watched local application action is decided by
+        self.local_application_filters = {}
+
+    def get_connection_stats(self):
+        """
+        Returns:
+            dict: requests sent over the shared session, connections opened and connections reused.
+        """
+        requests_sent, connections_opened, connections_reused = self.http_adapter.connection_stats()
+        return {
+            "requests": requests_sent,
+            "connectionsOpened": connections_opened,
+            "connectionsReused": connections_reused
+        }
+
+    def print_connection_stats(self):
+        stats = self.get_connection_stats()
+        if stats["requests"]:
+            print(f"HTTP requests: {stats['requests']}, connections opened: {stats['connectionsOpened']}, "
+                  f"connections reused: {stats['connectionsReused']}, not modified: {self.conditional_cache.hits}")
+
+    def print_metrics(self):
+        """
+        Prints the request latencies per endpoint and the time spent sleeping, and
+        writes them to metrics_json when it is set.
+        """
+        self.metrics.add_sleep("job watcher", self.watcher.idle_seconds)
+        self.watcher.idle_seconds = 0.0
+        self.metrics.print_report()
+        if self.metrics_json:
+            try:
+                self.metrics.write_json(self.metrics_json, self.get_connection_stats())
+            except OSError as ex:
+                print(f"Failed to write the metrics to {self.metrics_json}: {ex}")
 
     def get_access_keys(self):
         headers = {'Content-type': 'application/json','Accept':'application/json'}
         return headers
 
     def get_regal_api_access_keys(self):
-        data = {
-            "username": self.username,
-            "password": self.password,
-            "grant_type": "password",
-            "client_id": "regal-gui",
-            "scope": "openid"
-        }
-
-        headers = {
-                "Content-Type": "application/x-www-form-urlencoded"
-            }
         try:
-            MASTER_NODE_IP = os.getenv("MASTER_NODE_IP", "node01")
-            url_str = f"{self.regal_api_server_url}/auth/realms/regal/protocol/openid-connect/token"
-
-            json_data = requests.post(url_str, headers=headers, data=data).json()
-            access_token = json_data["access_token"]
+            if self.token_cache is None:
+                self._create_token_cache()
+            access_token = self.token_cache.get_access_token()
         except Exception as ex:
             print(ex)
             print("Failed to fetch access token! Is keycloak url up?")
@@ -76,6 +217,36 @@ class MyCLI(cmd.Cmd):
                         'Authorization': f'Bearer {access_token}'}
         return headers
 
+    def _create_token_cache(self):
+        # one cache for every thread and fork, a second one would log in again
+        with self._token_cache_lock:
+            if self.token_cache is None:
+                url_str = f"{self.regal_api_server_url}/auth/realms/regal/protocol/openid-connect/token"
+                self.token_cache = TokenCache(self.session, url_str, self.username, self.password,
+                                              cache_file=self.token_cache_file)
+
+    def _retry_unauthorized(self, response, **kwargs):
+        request = response.request
+        authorization = request.headers.get('Authorization', '')
+        if response.status_code != 401 or self.token_cache is None or not authorization.startswith('Bearer ') \
+                or getattr(request, 'token_retried', False):
+            return response
+
+        # the token was revoked, or the server restarted or disagrees about its expiry
+        self.token_cache.invalidate(authorization[len('Bearer '):])
+        try:
+            access_token = self.token_cache.get_access_token()
+        except Exception:
+            return response
+        retry = request.copy()
+        retry.headers['Authorization'] = f'Bearer {access_token}'
+        retry.token_retried = True
+        # release the connection of the rejected response before sending again
+        response.content
+        retried = self.session.send(retry, **kwargs)
+        retried.history.insert(0, response)
+        return retried
+
     def fetch_config(self):
         json_file_path = 'regal_mp.json'
         with open(json_file_path, 'r') as file:
@@ -89,16 +260,56 @@ class MyCLI(cmd.Cmd):
         marketplace_config_data = {}
         marketplace_ip = marketplace_config_data.get('CloudMpIp', '10.0.0.1')
         marketplace_port = marketplace_config_data.get('CloudMpApiPort', '5028')
-        self.url = f'http://{marketplace_ip}:{marketplace_port}'
+        self.url = os.getenv("CLOUD_MP_URL", data.get('cloudMpUrl', f'http://{marketplace_ip}:{marketplace_port}'))
+        # the Regal API of MASTER_NODE_IP unless another one, e.g. the local stand-in server, is configured
+        self.regal_api_server_url = os.getenv("REGAL_API_URL", data.get('regalApiUrl', self.regal_api_server_url))
         self.scrFilePath = data['scrFilePath']
-
-    def     fetch_data(self, inline_argument):
+        # optional file to share the keycloak token between back to back CLI invocations
+        self.token_cache_file = os.getenv("REGAL_TOKEN_CACHE_FILE", data.get('tokenCacheFile', None))
+        # created before any worker or fork of a plan exists, so that they all share it
+        self.token_cache = None
+        self._create_token_cache()
+        self.page_size = int(data.get('pageSize', DEFAULT_PAGE_SIZE))
+        self.page_workers = int(data.get('pageWorkers', DEFAULT_PAGE_WORKERS))
+
+        # optional SQLite snapshot of the catalog shared between CLI invocations
+        catalog_store_path = os.getenv("CLOUD_MP_CATALOG_STORE", data.get('catalogStore', None))
+        if catalog_store_path:
+            catalog_ttl = float(data.get('catalogTtl', DEFAULT_CATALOG_TTL))
+            self.catalog_store = CatalogStore(catalog_store_path, self.url, catalog_ttl)
+            self.catalog.store = self.catalog_store
+
+        # chunked uploads are resumable, the checkpoints are kept next to the package unless uploadCheckpointDir is set
+        self.chunked_upload = bool(data.get('chunkedUpload', False))
+        self.upload_chunk_size = int(data.get('uploadChunkSize', DEFAULT_CHUNK_SIZE))
+        self.upload_checkpoint_dir = data.get('uploadCheckpointDir', None)
+        # uploadWorkers > 1 uploads the chunks of one package concurrently, uploadParts splits it into that many chunks
+        self.upload_workers = int(data.get('uploadWorkers', 1))
+        self.upload_parts = int(data['uploadParts']) if data.get('uploadParts') else None
+        if self.upload_workers > 1 or self.upload_parts:
+            self.chunked_upload = True
+        # plugin packages of one application uploaded at the same time
+        self.plugin_upload_workers = int(data.get('pluginUploadWorkers', DEFAULT_PLUGIN_UPLOAD_WORKERS))
+        # independent actions of a planned operation, deletes of one teardown tier and bulk application actions run at the same time
+        self.plan_workers = int(data.get('planWorkers', DEFAULT_PLAN_WORKERS))
+
+        # optional SHA-256 ledger of the uploaded packages, unchanged packages are not uploaded again
+        upload_ledger_path = os.getenv("REGAL_UPLOAD_LEDGER", data.get('uploadLedger', None))
+        if upload_ledger_path:
+            self.upload_ledger = UploadLedger(upload_ledger_path, self.url)
+
+        # readinessChecks false restores the fixed delays, readinessFallbackDelay overrides their length
+        self.readiness_checks = bool(data.get('readinessChecks', True))
+        if data.get('readinessFallbackDelay') is not None:
+            self.readiness_fallback_delay = float(data['readinessFallbackDelay'])
+
+    def     fetch_data(self, inline_argument, filename=None):
         """
-            fetches the data
+            fetches the data of operations/<inline_argument>.json, or of the given manifest file
         """
         self.has_inline_args = True
         # print(f"Fetching data from {inline_argument}.json file")
-        filename = f"operations/{inline_argument}.json"
+        filename = filename or f"operations/{inline_argument}.json"
 
         try:
             with open(filename, 'r') as file:
@@ -131,9 +342,10 @@ class MyCLI(cmd.Cmd):
         }
 
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = self.session.post(url, headers=headers, json=data)
             response.raise_for_status()
             print('Upload plugin is in progress, please wait! The pluginPackage ID is \t' + response.json().get('pluginPackageId'))
+            self.catalog.invalidate('plugin_packages')
             
             return response.json().get('pluginPackageId')
         except requests.exceptions.HTTPError as err:
@@ -158,7 +370,7 @@ class MyCLI(cmd.Cmd):
         data = {}
 
         try:
-            response = requests.get(url, headers=headers, json=data)
+            response = self.session.get(url, headers=headers, json=data)
             response.raise_for_status()
             status = response.json().get('jobStatus')
             return_url = response.json().get('url')
@@ -176,33 +388,102 @@ class MyCLI(cmd.Cmd):
                print(f"An error occurred: {e} ")
             exit()
             
-    def upload_package_in_cloud_mp(self, resp_url, selected_file):
+    def upload_package_in_cloud_mp(self, resp_url, selected_file, checkpoint=None):
         """
         Uploads a package in a job using the specified return URL.
 
         Args:
             returnurl (str): The return URL for the job.
+            checkpoint (UploadCheckpoint): Uploads the package in chunks, resuming from the checkpoint.
 
         Returns:
-            None
+            tuple: (hex SHA-256, size) of the uploaded file, hashed while it was sent.
+            The digest is None when a resumed or parallel chunked upload could not hash it.
         """
 
         
         url = f"{resp_url}"
 
-        payload = {}
         # path = os.path.join(self.scrFilePath, "ss7perftool@1.0.0.rp")
         # selected_file = self.select_listed_files_with_extension(".rp")
-        package_info = selected_file.rsplit('/', 1)[-1]
-        files=[
-            ('file',(str(package_info) ,open(str(selected_file),'rb'),'application/octet-stream'))
-        ]
-        headers = {}
-
-        response = requests.request("POST", url, headers=headers, data=payload, files=files)
+        if checkpoint is not None:
+            response, digest, size = self.chunked_file_upload(url, selected_file, checkpoint)
+        else:
+            response, digest, size = self.stream_file_upload(url, selected_file)
 
-        print("Uploading package to Cloud MP, please wait!")
+        self._report("Uploading package to Cloud MP, please wait!")
+        return digest, size
                 
+    def _report(self, message):
+        """
+        Prints a progress message, or hands it to the progress display of the
+        concurrent uploads when called from one of their workers.
+        """
+        reporter = getattr(self.progress_local, "reporter", None)
+        if reporter is None:
+            print(message)
+        else:
+            reporter.message(message)
+
+    def _transfer_progress(self):
+        reporter = getattr(self.progress_local, "reporter", None)
+        return reporter.transfer if reporter is not None else None
+
+    def stream_file_upload(self, url, selected_file):
+        """
+        POSTs a package file as multipart/form-data, streaming it from disk in
+        fixed size chunks, and prints the upload throughput. The file is hashed
+        and counted in the same read.
+
+        Returns:
+            tuple: (response of the upload URL, hex SHA-256 of the file, bytes of the file sent)
+        """
+        with MultipartFileStream(str(selected_file), on_progress=self._transfer_progress()) as stream, \
+                span("upload package", "upload", file=os.path.basename(str(selected_file)), bytes=stream.file_size) as args:
+            headers = {'Content-Type': stream.content_type}
+            response = self.session.request("POST", url, headers=headers, data=stream)
+            args["status"] = response.status_code
+            self._report(f"Uploaded {format_throughput(*stream.throughput())}")
+        return response, stream.digest, stream.file_bytes
+
+    def upload_chunk_size_of(self, selected_file):
+        """
+        Returns:
+            int: The chunk size for the package file, uploadParts equal parts when configured.
+        """
+        if not self.upload_parts:
+            return self.upload_chunk_size
+        return max(-(-os.path.getsize(selected_file) // self.upload_parts), MIN_UPLOAD_CHUNK_SIZE)
+
+    def chunked_file_upload(self, url, selected_file, checkpoint):
+        """
+        Uploads a package file in checksummed chunks. Every acknowledged chunk is
+        recorded in the checkpoint, a failed upload is resumed by the next run.
+
+        Returns:
+            tuple: (response of the request assembling the chunks, hex SHA-256 of
+            the file or None, size of the file)
+        """
+        # more workers than pooled connections would open throwaway connections
+        workers = min(self.upload_workers, self.http_adapter.pool_size)
+        uploader = ChunkedUploader(self.session, url, str(selected_file), checkpoint,
+                                   retry=lambda func: self.poller.retry(self.CHUNK_RETRY, func), workers=workers,
+                                   on_progress=self._transfer_progress())
+        try:
+            with span("upload package", "upload", file=os.path.basename(str(selected_file)), chunked=True, workers=workers):
+                response = uploader.upload()
+        except requests.exceptions.HTTPError as err:
+            print(f"Failed to upload package chunks! Error: {err} " + err.response.text)
+            print("Run the upload again to resume it.")
+            exit()
+        except Exception as e:
+            print(f"An error occurred: {e} ")
+            print("Run the upload again to resume it.")
+            exit()
+        rate = uploader.bytes_sent / uploader.elapsed if uploader.elapsed > 0 else 0.0
+        self._report(f"Uploaded {format_throughput(uploader.bytes_sent, uploader.elapsed, rate)}")
+        return response, uploader.digest, os.path.getsize(selected_file)
+
     def upload_app_package(self):
             """
             Uploads the application package to the cloud marketplace.
@@ -227,9 +508,10 @@ class MyCLI(cmd.Cmd):
             }
 
             try:
-                response = requests.post(url, headers=headers, json=data)
+                response = self.session.post(url, headers=headers, json=data)
                 response.raise_for_status()
                 print('Upload app package is in progress, please wait! The app package ID is \t'+ response.json().get('appPackageId'))
+                self.catalog.invalidate('app_packages')
                 return response.json().get('appPackageId')
             except requests.exceptions.HTTPError as err:
                 if response is not None:
@@ -267,7 +549,7 @@ class MyCLI(cmd.Cmd):
         data = {}
 
         try:
-            response = requests.get(url, headers=headers, json=data)
+            response = self.session.get(url, headers=headers, json=data)
             response.raise_for_status()
             status = response.json().get('jobStatus')
             return_url = response.json().get('url')
@@ -298,16 +580,9 @@ class MyCLI(cmd.Cmd):
 
 
         url = f"{resp_url}"
-        payload = {}
         # path = os.path.join(self.scrFilePath, "mme-hss-2.0.0.tgz")
         # selected_file = self.select_listed_files_with_extension(".tgz")
-        package_info = selected_file.rsplit('/', 1)[-1]
-        files=[
-            ('file',(str(package_info), open(str(selected_file),'rb'),'application/octet-stream'))
-        ]
-        headers = {}
-
-        response = requests.request("POST", url, headers=headers, data=payload, files=files)
+        self.stream_file_upload(url, selected_file)
 
         print("Uploading package to Cloud MP, please wait!")       
                 
@@ -338,33 +613,25 @@ class MyCLI(cmd.Cmd):
         }
 
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = self.session.post(url, headers=headers, json=data)
             response.raise_for_status()
             application_id = response.json().get('applicationId')
             print('The application ID is ' + application_id)
 
-            start_time = time.time()
-            end_time = start_time + 60 
             print("Application creation in progress, please wait!")
-            while time.time() < end_time:
-                applications = self.validate_create_application()
-                if applications and application_id in applications:
-                    operation_state = applications[application_id]["operationState"]
-                    if operation_state == "success":
-                        print('Application created successfully! The application ID is \t' + application_id)
-                        return application_id
-                    elif operation_state == "inProgress":
-                        time.sleep(2)  
-                        continue
-                    else:
-                        print("Failed to create application! Please check the status of the application")
-                        return None
-                else:
-                    print("Failed to create application! Please check the status of the application")
-                    return None
-
-            print("Application creation took more time than expected! Please check the status of the application")
-            return None
+            result = self.watcher.wait(self.APPLICATION_CREATE, application_id, 'applications',
+                                       lambda job_ids: self._operation_states(self.validate_create_application(), job_ids),
+                                       batched=True)
+            if result.succeeded:
+                print('Application created successfully! The application ID is \t' + application_id)
+                self.catalog.add('applications', application_id, {"applicationName": self.appName, "version": self.version})
+                return application_id
+            elif result.outcome == JobPoller.TIMEOUT:
+                print("Application creation took more time than expected! Please check the status of the application")
+                return None
+            else:
+                print("Failed to create application! Please check the status of the application")
+                return None
         except requests.exceptions.HTTPError as err:
             if response is not None:
                 print(f"Failed to create application! Error: {err} " + response.text)
@@ -378,7 +645,7 @@ class MyCLI(cmd.Cmd):
                 print(f"An error occurred: {e} ")
             exit()
 
-    def manage_application(self, application_id, action, upgrade_application_version=None):
+    def manage_application(self, application_id, action, upgrade_application_version=None, application_name=None):
         """
             manage the application package to the cloud marketplace.
 
@@ -389,58 +656,32 @@ class MyCLI(cmd.Cmd):
                 requests.exceptions.HTTPError: If there is an HTTP error during the upload.
                 Exception: If any other error occurs during the upload.
             """
-        headers = self.get_regal_api_access_keys()
-        if headers is None:
-            return
-
-        url = f'{self.regal_api_server_url}/api/localMarketPlace/apps/{application_id}/action/{action}'
-        data = {
-            "scope": "all"
-        }
-        if action == "update":
-            data["updateVersion"] = upgrade_application_version
-
         try:
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
+            self._post_application_action(application_id, action, upgrade_application_version)
             print('The application ID is ' + application_id)
 
-            start_time = time.time()
-            end_time = start_time + 600 
             print(f"Application {action}ation in progress, please wait!")
-            while time.time() < end_time:
-                applications = self.validate_manage_application()
-                if applications and application_id in applications:
-                    operation_state = applications[application_id]["operationState"]
-                    if operation_state == "INSTALLED" or operation_state == "NOT_INSTALLED":
-                        print(f'Application {action}ed successfully!')
-                        return application_id
-                    elif operation_state == "DOWNLOADING" or operation_state == "INSTALLING" or operation_state == "UNINSTALLING" or operation_state == "UPDATING":
-                        time.sleep(2)  
-                        continue
-                    else:
-                        if action == "update":
-                            print(f"Please check the status of the application")
-                            return None  
-                        print(f"Failed to {action} application! Please check the status of the application")
-                        return None
-                else:
-                    print(f"Failed to {action} application! Please check the status of the application")
-                    return None
-
-            print(f"Application {action}ation took more time than expected! Please check the status of the application")
-            return None
+            result = self._watch_application_action(application_id, action, application_name).result()
+            if result.succeeded:
+                print(f'Application {action}ed successfully!')
+                return application_id
+            elif result.outcome == JobPoller.TIMEOUT:
+                print(f"Application {action}ation took more time than expected! Please check the status of the application")
+                return None
+            elif action == "update" and result.state is not None:
+                print(f"Please check the status of the application")
+                return None
+            else:
+                print(f"Failed to {action} application! Please check the status of the application")
+                return None
         except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Failed to {action} application! Error: {err} " + response.text)
+            if err.response is not None:
+                print(f"Failed to {action} application! Error: {err} " + err.response.text)
             else:
                 print(f"Failed to {action} application! Error: {err} ")
             exit()
         except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
+            print(f"An error occurred: {e} ")
             exit()
 
     def manage_upgrade_application(self, old_application_id, application_name, base_version, upgrade_version):
@@ -454,64 +695,169 @@ class MyCLI(cmd.Cmd):
                 requests.exceptions.HTTPError: If there is an HTTP error during the upload.
                 Exception: If any other error occurs during the upload.
             """
-        headers = self.get_regal_api_access_keys()
         action = "update"
-        if headers is None:
-            return
-
-        url = f'{self.regal_api_server_url}/api/localMarketPlace/apps/{old_application_id}/action/{action}'
-        data = {
-            "scope": "all"
-        }
-        data["updateVersion"] = upgrade_version
         try:
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
+            self._post_application_action(old_application_id, action, upgrade_version)
             print('The base application ID is ' + old_application_id)
 
-            start_time = time.time()
-            end_time = start_time + 600 
             print(f"Application {action}ation in progress, please wait!")
-            while time.time() < end_time:
-                applications = self.validate_manage_application()
-                for app_id, app_info in applications.items():
-                    app_name = app_info.get("applicationName")
-                    app_version = app_info.get("version")
-                    app_status = app_info.get("operationState")
-                    failed_status = app_info.get("failedStatus")
-                    if app_name == application_name and app_version == base_version:
-                        if failed_status:
-                            print(f"Failed to {action} application! Please check the status of the application")
-                            print(f"Failed status: {failed_status}")
-                            return 
-                        print(f'Application upgrade is in progress, please wait!')
-                    elif app_name == application_name and app_version == upgrade_version: 
-                        if failed_status:
-                            print(f"Failed to {action} application! Please check the status of the application")
-                            print(f"Failed status: {failed_status}")
-                            return 
-                        elif app_status == "INSTALLED":
-                            print(f'Application upgrade is completed successfully!')
-                            return app_id
-                        print(f'Application upgrade is in progress, please wait!')
-      
-                time.sleep(2)
-                continue
-            print(f"Application {action}ation took more time than expected! Please check the status of the application")
-            return None
+            result = self._watch_application_action(old_application_id, action, application_name,
+                                                    base_version, upgrade_version).result()
+            if result.succeeded:
+                print(f'Application upgrade is completed successfully!')
+                return result.value
+            elif result.outcome == JobPoller.TIMEOUT:
+                print(f"Application {action}ation took more time than expected! Please check the status of the application")
+                return None
+            else:
+                print(f"Failed to {action} application! Please check the status of the application")
+                print(f"Failed status: {result.value}")
+                return None
         except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Failed to {action} application! Error: {err} " + response.text)
+            if err.response is not None:
+                print(f"Failed to {action} application! Error: {err} " + err.response.text)
             else:
                 print(f"Failed to {action} application! Error: {err} ")
             exit()
         except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
+            print(f"An error occurred: {e} ")
             exit()
 
+    def _post_application_action(self, application_id, action, upgrade_version=None):
+        """
+        Starts an install, uninstall or update of a local marketplace application.
+
+        Raises:
+            requests.exceptions.HTTPError: If the action is rejected.
+        """
+        headers = self.get_regal_api_access_keys()
+        url = f'{self.regal_api_server_url}/api/localMarketPlace/apps/{application_id}/action/{action}'
+        data = {
+            "scope": "all"
+        }
+        if action == "update":
+            data["updateVersion"] = upgrade_version
+        response = self.session.post(url, headers=headers, json=data)
+        response.raise_for_status()
+        return response
+
+    def _watch_application_action(self, application_id, action, application_name=None, base_version=None,
+                                  upgrade_version=None):
+        """
+        Watches an application action started with _post_application_action. All
+        actions in flight are checked against one poll of the local applications,
+        which asks only for the rows of their application names when they are known.
+
+        An update with the versions is done once the upgrade version is installed,
+        its value is then the id of the upgraded application.
+
+        Returns:
+            Future: Resolves to the JobResult of the action.
+        """
+        if application_name is not None:
+            self.local_application_filters[application_id] = {"appName": application_name}
+
+        if action == "update" and upgrade_version is not None:
+            def upgrade_state(applications):
+                for app_id, app_info in applications.items():
+                    app_name = app_info.get("applicationName")
+                    app_version = app_info.get("version")
+                    if app_name != application_name or app_version not in (base_version, upgrade_version):
+                        continue
+                    if app_info.get("failedStatus"):
+                        return "FAILED", app_info.get("failedStatus")
+                    if app_version == upgrade_version and app_info.get("operationState") == "INSTALLED":
+                        return "INSTALLED", app_id
+                return "UPDATING", None
+
+            future = self.watcher.watch(self.APPLICATION_UPGRADE, application_id, 'local_applications',
+                                        self._local_application_states, batched=True, check=upgrade_state)
+        else:
+            future = self.watcher.watch(self.APPLICATION_MANAGE, application_id, 'local_applications',
+                                        self._local_application_states, batched=True,
+                                        check=lambda applications: self._operation_state(applications, application_id))
+        future.add_done_callback(lambda done: self.local_application_filters.pop(application_id, None))
+        return future
+
+    def manage_applications(self, entries):
+        """
+        Installs, uninstalls or updates many local marketplace applications at once.
+        The applications are looked up and their actions started planWorkers at a
+        time, then all of them are watched with one shared poll of the table.
+
+        Args:
+            entries (list): Dicts with applicationName, applicationVersion and an
+                optional action; without one the action is install, update or skip
+                depending on the installed version, like manage_application.
+
+        Returns:
+            list: One dict per entry with the application, action, outcome and time taken.
+        """
+        def start(entry):
+            result = {"applicationName": entry.get("applicationName"), "version": entry.get("applicationVersion"),
+                      "action": entry.get("action"), "applicationId": None, "outcome": None, "elapsed": 0.0}
+            start_time = time.monotonic()
+            try:
+                if not result["applicationName"] or not result["version"]:
+                    result["outcome"] = "invalid entry"
+                    return result, None
+
+                old_version = None
+                if result["action"] in ("install", "uninstall"):
+                    result["applicationId"] = self._check_local_application_exists(result["applicationName"], result["version"])
+                else:
+                    application_id, action, old_version = self._get_app_id_and_action(result["applicationName"], result["version"])
+                    if application_id and result["action"] not in (None, action):
+                        result["outcome"] = f"can not {result['action']}, the application needs {action}"
+                        return result, None
+                    result["applicationId"], result["action"] = application_id, action
+
+                if not result["applicationId"]:
+                    result["outcome"] = "not found"
+                    return result, None
+                if result["action"] == "skip":
+                    result["outcome"] = "already installed"
+                    return result, None
+                if result["action"] not in ("install", "uninstall", "update"):
+                    result["outcome"] = f"invalid action {result['action']}"
+                    return result, None
+
+                self._post_application_action(result["applicationId"], result["action"], result["version"])
+                if result["action"] == "update":
+                    future = self._watch_application_action(result["applicationId"], "update", result["applicationName"],
+                                                            old_version, result["version"])
+                else:
+                    future = self._watch_application_action(result["applicationId"], result["action"],
+                                                            result["applicationName"])
+                return result, future
+            except requests.exceptions.HTTPError as err:
+                result["outcome"] = f"rejected: {err}"
+            except (Exception, SystemExit) as e:
+                result["outcome"] = f"error: {e}"
+            finally:
+                result["elapsed"] = time.monotonic() - start_time
+            return result, None
+
+        with ThreadPoolExecutor(max_workers=max(1, self.plan_workers)) as executor:
+            started = list(executor.map(start, entries))
+
+        results = []
+        for result, future in started:
+            if future is not None:
+                try:
+                    job = future.result()
+                    result["outcome"] = job.outcome if job.state is None else f"{job.outcome} ({job.state})"
+                    result["elapsed"] += job.elapsed
+                except (Exception, SystemExit) as e:
+                    result["outcome"] = f"error: {e}"
+            results.append(result)
+
+        print("Application actions:")
+        for result in results:
+            print(f"  {result['applicationName']} {result['version']}: {result['action'] or '-'} {result['outcome']} "
+                  f"in {result['elapsed']:.1f}s")
+        return results
+
     def add_vertical(self):
         
         headers = self.get_access_keys()
@@ -524,9 +870,10 @@ class MyCLI(cmd.Cmd):
             }
         # print(f"vertical_data: {data}")
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = self.session.post(url, headers=headers, json=data)
             response.raise_for_status()
             print('Added vertical successfully! the vertical ID is \t'+ response.json().get('verticalId'))
+            self.catalog.add('verticals', response.json().get('verticalId'), self.verticalName)
             return response.json().get('verticalId')
         except requests.exceptions.HTTPError as err:
             if response is not None:
@@ -554,9 +901,10 @@ class MyCLI(cmd.Cmd):
         }
 
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = self.session.post(url, headers=headers, json=data)
             response.raise_for_status()
             print('Added category successfully! The category ID is \t' + response.json().get('categoryId'))
+            self.catalog.add('categories', response.json().get('categoryId'), self.categoryName)
             return response.json().get('categoryId')
         except requests.exceptions.HTTPError as err:
             if response is not None:
@@ -580,9 +928,10 @@ class MyCLI(cmd.Cmd):
         data = {}
 
         try:
-            response = requests.delete(url, headers=headers, json=data)
+            response = self.session.delete(url, headers=headers, json=data)
             response.raise_for_status()
             print('Deleted category successfully! \n')
+            self._record_delete('categories', categoryId)
         except requests.exceptions.HTTPError as err:
             if response is not None:
                 print(f"Failed to delete category! Error: {err} " + response.text)
@@ -605,9 +954,10 @@ class MyCLI(cmd.Cmd):
         data = {}
 
         try:
-            response = requests.delete(url, headers=headers, json=data)
+            response = self.session.delete(url, headers=headers, json=data)
             response.raise_for_status()
             print('Deleted vertical successfully! \n')
+            self._record_delete('verticals', verticalid)
         except requests.exceptions.HTTPError as err:
             if response is not None:
                 print(f"Failed to delete vertical! Error: {err} " + response.text)
@@ -630,7 +980,7 @@ class MyCLI(cmd.Cmd):
         data = {}
 
         try:
-            response = requests.put(url, headers=headers, json=data)
+            response = self.session.put(url, headers=headers, json=data)
             response.raise_for_status()
             if enable_status == 'enable':
                print('Enabled application successfully! \n')
@@ -674,9 +1024,10 @@ class MyCLI(cmd.Cmd):
         }
 
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = self.session.post(url, headers=headers, json=data)
             response.raise_for_status()
             print('Upload test module package is in progress, please wait! The test module package ID: \t' + response.json().get('testModulePackageId'))
+            self.catalog.invalidate('test_modules')
             return response.json().get('testModulePackageId')
         except requests.exceptions.HTTPError as err:
             if response is not None:
@@ -695,15 +1046,8 @@ class MyCLI(cmd.Cmd):
         
         url = f"{resp_url}"
 
-        payload = {}
         # selected_file = self.select_listed_files_with_extension(".rtm")
-        package_info = selected_file.rsplit('/', 1)[-1]
-        files=[
-            ('file',(str(package_info) ,open(str(selected_file),'rb'),'application/octet-stream'))
-        ]
-        headers = {}
-
-        response = requests.request("POST", url, headers=headers, data=payload, files=files)
+        self.stream_file_upload(url, selected_file)
 
         print("Uploading test module package to Cloud MP, please wait!")
         
@@ -722,36 +1066,30 @@ class MyCLI(cmd.Cmd):
            "verticalId": self.verticalid
         }
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = self.session.post(url, headers=headers, json=data)
             response.raise_for_status()
 
             module_id = response.json().get('moduleId')
             print('The module ID is ' + module_id)
 
             
-            start_time = time.time()
-            end_time = start_time + 60  
             print("Module creation in progress, please wait!")
-            while time.time() < end_time:
-                modules = self.validate_create_module()
-                if modules and module_id in modules:
-                    operation_state = modules[module_id]["operationState"]
-                    if operation_state == "success":
-                        print('Module created successfully! The module ID is \t' + module_id)
-                        return module_id
-                    elif operation_state == "inProgress":
-                        
-                        time.sleep(2)
-                        continue
-                    else:
-                        print("Failed to create module! Please check the status of the module")
-                        return None
-                else:
-                    print("Module not found in the database.")
-                    return None
-
-            print("Module creation took more time than expected! Please check the status of the module")
-            return None
+            result = self.watcher.wait(self.MODULE_CREATE, module_id, 'modules',
+                                       lambda job_ids: self._operation_states(self.validate_create_module(), job_ids),
+                                       batched=True)
+            if result.succeeded:
+                print('Module created successfully! The module ID is \t' + module_id)
+                self.catalog.add('modules', module_id, {"moduleName": self.moduleName, "version": self.version})
+                return module_id
+            elif result.outcome == JobPoller.TIMEOUT:
+                print("Module creation took more time than expected! Please check the status of the module")
+                return None
+            elif result.state is None:
+                print("Module not found in the database.")
+                return None
+            else:
+                print("Failed to create module! Please check the status of the module")
+                return None
         except requests.exceptions.HTTPError as err:
             if response is not None:
                 print(f"Failed to create module! Error: {err} " + response.text)
@@ -779,7 +1117,7 @@ class MyCLI(cmd.Cmd):
 
         url = f'{self.url}/cloudMarketPlace/upload/testModulePackage/{packageId}'
         try:
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
             response.raise_for_status() 
             status = response.json().get('jobStatus')
             return_url = response.json().get('url')
@@ -855,9 +1193,10 @@ class MyCLI(cmd.Cmd):
         data = {}
 
         try:
-            response = requests.delete(url, headers=headers, json=data)
+            response = self.session.delete(url, headers=headers, json=data)
             response.raise_for_status()
             print('Deleted application successfully! \n')
+            self._record_delete('applications', applicationid)
         except requests.exceptions.HTTPError as err:
             if response is not None:
                 print(f"Failed to delete application! Error: {err} " + response.text)
@@ -879,7 +1218,7 @@ class MyCLI(cmd.Cmd):
         url = f'{self.url}/cloudMarketPlace/modules/{moduleId}/status/{enable_status}'
         data = {}
         try:
-            response = requests.put(url, headers=headers, json=data)
+            response = self.session.put(url, headers=headers, json=data)
             response.raise_for_status()
             if enable_status == 'enable':
                print('Enabled module successfully! \n')
@@ -912,9 +1251,10 @@ class MyCLI(cmd.Cmd):
         url = f'{self.url}/cloudMarketPlace/testModulePackage/{testModulePackageId}'
         data = {}
         try:
-            response = requests.delete(url, headers=headers, json=data)
+            response = self.session.delete(url, headers=headers, json=data)
             response.raise_for_status()
             print('Deleted test module package successfully! \n')
+            self._record_delete('test_modules', testModulePackageId)
         except requests.exceptions.HTTPError as err:
             if response is not None:
                 print(f"Failed to delete test module package! Error: {err} " + response.text)
@@ -936,9 +1276,10 @@ class MyCLI(cmd.Cmd):
         url = f'{self.url}/cloudMarketPlace/securityToolPackage/{securityToolPackageId}'
         data = {}
         try:
-            response = requests.delete(url, headers=headers, json=data)
+            response = self.session.delete(url, headers=headers, json=data)
             response.raise_for_status()
             print('Deleted security tool package successfully! \n')
+            self._record_delete('security_tools', securityToolPackageId)
         except requests.exceptions.HTTPError as err:
             if response is not None:
                 print(f"Failed to delete security tool package! Error: {err} " + response.text)
@@ -960,9 +1301,10 @@ class MyCLI(cmd.Cmd):
         url = f'{self.url}/cloudMarketPlace/module/{moduleId}'
         data = {}
         try:
-            response = requests.delete(url, headers=headers, json=data)
+            response = self.session.delete(url, headers=headers, json=data)
             response.raise_for_status()
             print('Deleted module successfully! \n')
+            self._record_delete('modules', moduleId)
         except requests.exceptions.HTTPError as err:
             if response is not None:
                 print(f"Failed to delete module! Error: {err} " + response.text)
@@ -985,9 +1327,10 @@ class MyCLI(cmd.Cmd):
         data = {}
 
         try:
-            response = requests.delete(url, headers=headers, json=data)
+            response = self.session.delete(url, headers=headers, json=data)
             response.raise_for_status()
             print('Deleted app package successfully! \n')
+            self._record_delete('app_packages', appPackageId)
         except requests.exceptions.HTTPError as err:
             if response is not None:
                 print(f"Failed to delete app package! Error: {err} " + response.text)
@@ -1010,9 +1353,10 @@ class MyCLI(cmd.Cmd):
         data = {}
 
         try:
-            response = requests.delete(url, headers=headers, json=data)
+            response = self.session.delete(url, headers=headers, json=data)
             response.raise_for_status()
             print('Deleted plugin package successfully! \n')
+            self._record_delete('plugin_packages', pluginPackageId)
         except requests.exceptions.HTTPError as err:
             if response is not None:
                 print(f"Failed to delete plugin package! Error: {err} " + response.text)
@@ -1026,463 +1370,464 @@ class MyCLI(cmd.Cmd):
                 print(f"An error occurred: {e} ")
             exit()    
 
-    def get_category(self):
-        headers = self.get_access_keys()
-        if headers is None:
-            return
+    def fetch_data_table_page(self, url, headers, page, size, filter_map=None, sort_map=None):
+        data = {
+            "filterMap": filter_map or {},
+            "sortMap": sort_map or {},
+            "page": page,
+            "size": size
+        }
+        key = (url, json.dumps(data, sort_keys=True))
+        with span("DataTable page", "datatable", endpoint=endpoint_template(url), page=page, size=size) as args:
+            conditional_headers = self.conditional_cache.headers(key)
+            response = self.session.post(url, headers=dict(headers or {}, **conditional_headers), json=data)
+            if response.status_code == 304:
+                json_data = self.conditional_cache.not_modified(key)
+                if json_data is not None:
+                    args["status"] = 304
+                    return json_data
+                response = self.session.post(url, headers=headers, json=data)
+            args["status"] = response.status_code
+            response.raise_for_status()
+            json_data = response.json()
+            self.conditional_cache.store(key, response, json_data)
+            return json_data
 
-        url = f'{self.url}/cloudMPApiServer/getCategoryDataTable'
-        page = 1
-        size = 7
-        total_records = float('inf')
-        categories = {}
+    def iter_data_table(self, url, headers, filter_map=None, sort_map=None, page_size=None, prefetch_pages=None, page_info=None):
+        """
+        Streams the rows of a DataTable endpoint page by page.
 
-        try:
-            while (page - 1) * size < total_records:
-                data = {
-                    "filterMap": {},
-                    "sortMap": {},
-                    "page": page,
-                    "size": size
-                }
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                json_data = response.json()
+        The first page is fetched on its own to read totalRecords. Once the caller
+        has consumed it, up to prefetch_pages of the following pages are fetched
+        concurrently ahead of the caller and handed out in page order. With
+        prefetch_pages=0 every page is only requested when the caller asks for
+        its first row, so a caller that stops early (e.g. a lookup that found
+        its match) does not fetch the rest of the table.
 
-                if page == 1:
-                    total_records = json_data.get("totalRecords", 0)
+        The page size adapts to the endpoint: if the server serves fewer rows than
+        requested on a page that is not the last one, the served row count is
+        used as the page size from then on.
 
-                # category_names.extend([item["categoryName"] for item in json_data["data"]])
+        Args:
+            url (str): The DataTable endpoint.
+            headers (dict): The request headers.
+            filter_map (dict): The filterMap sent with every page request.
+            sort_map (dict): The sortMap sent with every page request.
+            page_size (int): The page size to request, defaults to the configured pageSize.
+            prefetch_pages (int): Pages fetched ahead of the caller, defaults to pageWorkers.
+            page_info (dict): Receives the totalRecords reported by the server.
 
-                categories.update({item["id"]: item["categoryName"] for item in json_data["data"]})
+        Yields:
+            dict: The rows of the table, in page order.
 
-                page += 1
+        Raises:
+            requests.exceptions.HTTPError: If any of the page requests fails.
+        """
+        size = page_size or self.page_size_limits.get(url, self.page_size)
+        if prefetch_pages is None:
+            prefetch_pages = self.page_workers
+
+        json_data = self.fetch_data_table_page(url, headers, 1, size, filter_map, sort_map)
+        total_records = json_data.get("totalRecords", 0)
+        if page_info is not None:
+            page_info["totalRecords"] = total_records
+        rows = json_data["data"]
+        yield from rows
+
+        if len(rows) >= total_records:
+            return
 
-            print("Category names :")
-            i = 1
-            for category_id, category_name in categories.items():
-                print(f"{i}. {category_name} ")
-                i+=1
-            
-            return categories
-        except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Error fetching the categories! Error: {err} " + response.text)
-            else:
-                print(f"Error fetching the categories! Error: {err} ")
-            exit()
-        except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
-            exit() 
+        if 0 < len(rows) < size:
+            # the server caps the page size, follow its paging from here on
+            size = len(rows)
+            self.page_size_limits[url] = size
 
-    def get_vertical(self):
-        headers = self.get_access_keys()
-        if headers is None:
-            return
+        last_page = math.ceil(total_records / size)
 
-        url = f'{self.url}/cloudMPApiServer/getVerticalDataTable'
-        page = 1
-        size = 7
-        total_records = float('inf')
-        verticals = {}
+        if prefetch_pages <= 0:
+            for page in range(2, last_page + 1):
+                yield from self.fetch_data_table_page(url, headers, page, size, filter_map, sort_map)["data"]
+            return
 
+        executor = ThreadPoolExecutor(max_workers=min(prefetch_pages, last_page - 1))
+        pending = deque()
+        next_page = 2
         try:
-            while (page - 1) * size < total_records:
-                data = {
-                    "filterMap": {},
-                    "sortMap": {},
-                    "page": page,
-                    "size": size
-                }
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                json_data = response.json()
-
-                if page == 1:
-                    total_records = json_data.get("totalRecords", 0)
+            while next_page <= last_page and len(pending) < prefetch_pages:
+                pending.append(executor.submit(self.fetch_data_table_page, url, headers, next_page, size, filter_map, sort_map))
+                next_page += 1
+
+            while pending:
+                page_rows = pending.popleft().result()["data"]
+                if next_page <= last_page:
+                    pending.append(executor.submit(self.fetch_data_table_page, url, headers, next_page, size, filter_map, sort_map))
+                    next_page += 1
+                yield from page_rows
+        finally:
+            # the caller may stop early, drop the pages it will never read
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def fetch_data_table(self, url, headers, filter_map=None, sort_map=None, page_size=None):
+        """
+        Fetches all the rows of a DataTable endpoint, see iter_data_table.
 
-                verticals.update({item["id"]: item["verticalName"] for item in json_data["data"]})
+        Returns:
+            list: The rows of every page, in page order.
+        """
+        return list(self.iter_data_table(url, headers, filter_map, sort_map, page_size))
 
-                page += 1
+    def _iter_listing(self, url, headers, description, to_entry, filter_map=None, prefetch_pages=None,
+                      sort_map=None, page_size=None, page_info=None, with_rows=False):
+        """
+        Streams the (id, info) entries of a DataTable listing, see iter_data_table.
 
-            print("Vertical names :")
-            i = 1
-            for vertical_id, vertical_name in verticals.items():
-                print(f"{i}. {vertical_name} ")
-                i += 1
+        A filter_map is pushed to the server so that only the matching rows come
+        back. Callers still have to check the entries they get, as a server that
+        ignores the filter returns the whole table. A server that rejects the
+        filter is asked again for the whole table.
 
-            return verticals
+        With with_rows the raw row is yielded along with its entry.
+        """
+        def entry(item):
+            return (to_entry(item), item) if with_rows else to_entry(item)
 
+        try:
+            filtered_rows = 0
+            try:
+                for item in self.iter_data_table(url, headers, filter_map, sort_map, page_size, prefetch_pages, page_info):
+                    filtered_rows += 1
+                    yield entry(item)
+            except requests.exceptions.HTTPError as err:
+                rejected = err.response is not None and 400 <= err.response.status_code < 500
+                if not filter_map or not rejected or filtered_rows:
+                    raise
+                for item in self.iter_data_table(url, headers, None, sort_map, page_size, prefetch_pages, page_info):
+                    yield entry(item)
         except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Error fetching the verticals! Error: {err} " + response.text)
+            if err.response is not None:
+                print(f"Error fetching the {description}! Error: {err} " + err.response.text)
             else:
-                print(f"Error fetching the verticals! Error: {err} ")
+                print(f"Error fetching the {description}! Error: {err} ")
             exit()
         except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
+            print(f"An error occurred: {e} ")
             exit()
 
-    def get_app_package(self):
-        headers = self.get_access_keys()
-        if headers is None:
-            return
-
-        url = f'{self.url}/cloudMPApiServer/getRepoAppUploadMetaData'
-        page = 1
-        size = 7
-        total_records = float('inf')
-        apps = {}
-
-        try:
-            while (page - 1) * size < total_records:
-                data = {
-                    "filterMap": {},
-                    "sortMap": {},
-                    "page": page,
-                    "size": size
-                }
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                json_data = response.json()
-
-                if page == 1:
-                    total_records = json_data.get("totalRecords", 0)
-
-                apps.update({item["id"]: {"appName": item.get("appName"), "version": item.get("version", None)} for item in json_data["data"]})
+    def _print_listing(self, title, entries, describe, collect=True):
+        """
+        Prints a numbered listing while its entries stream in.
 
-                page += 1
+        Args:
+            title (str): The heading printed before the entries, None for no heading.
+            entries (iterable): The (id, info) entries of the listing.
+            describe (callable): Formats the info of an entry for display.
+            collect (bool): Whether to also collect the entries, pure listings do not need them.
 
-            print("App package names:")
-            i = 1
-            for app_id, app_info in apps.items():
-                print(f"{i}. {app_info['appName']} - {app_info['version']}")
-                i += 1
+        Returns:
+            dict: The listed entries keyed by id, empty when collect is False.
+        """
+        listed = {}
+        seen_ids = set()
+        if title:
+            print(title)
+        i = 1
+        for entry_id, info in entries:
+            # rows can shift between pages while the table changes
+            if entry_id in seen_ids:
+                continue
+            seen_ids.add(entry_id)
+            print(f"{i}. {describe(info)}")
+            if collect:
+                listed[entry_id] = info
+            i += 1
+        return listed
+
+    def _listing_entries(self, kind, iter_entries):
+        """
+        Returns the entries of a full catalog listing. With a local catalog store
+        the listing is answered from the store, synced with the server when stale,
+        otherwise it is streamed from the server into the catalog cache.
+        """
+        if self.catalog_store is not None:
+            self.sync_catalog(kind)
+            return self.catalog.entries(kind)
+        return self._cache_listing(kind, iter_entries())
 
-            return apps
+    def _cache_listing(self, kind, entries):
+        """
+        Passes the entries of a full listing through and loads them into the
+        catalog cache once the listing was read to the end.
+        """
+        listed = []
+        for entry in entries:
+            listed.append(entry)
+            yield entry
+        self.catalog.load(kind, listed)
 
-        except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Error fetching the app packages! Error: {err} " + response.text)
-            else:
-                print(f"Error fetching the app packages! Error: {err} ")
-            exit()
-        except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
-            exit()
+    def find_catalog_id(self, kind, name, version=None):
+        """
+        Looks up the id of a catalog entry by name, or by name and version.
 
-    def validate_manage_application(self):
-        headers = self.get_regal_api_access_keys()
-        if headers is None:
-            return
+        The session catalog cache answers when it knows the entry or holds the
+        complete listing. Otherwise the server is asked with a filtered lookup and
+        every entry it returns is remembered.
 
-        url = f'{self.regal_api_server_url}/api/localMarketPlace/apps/dataTable'
-        page = 1
-        size = 7
-        total_records = float('inf')
-        applications = {}
+        Args:
+            kind (str): The catalog listing, one of CATALOG_LISTINGS.
+            name (str): The name of the entry.
+            version (str): The version of the entry, None to match any version.
 
-        try:
-            while (page - 1) * size < total_records:
-                data = {
-                    "filterMap": {},
-                    "sortMap": {},
-                    "page": page,
-                    "size": size
-                }
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                json_data = response.json()
+        Returns:
+            str: The id of the first matching entry, None if there is none.
+        """
+        if self.catalog_store is not None:
+            self.sync_catalog(kind)
 
-                if page == 1:
-                    total_records = json_data.get("totalRecords", 0)
+        entry_id, complete = self.catalog.find(kind, name, version)
+        if entry_id or complete:
+            return entry_id
 
-                applications.update({item["appId"]: {"applicationName": item.get("appName"), 
-                                                     "version": item.get("appVersion", None), 
-                                                     "operationState": item.get("status", None),
-                                                     "failureReason": item.get("failureReason")} for item in json_data["data"]})
+        iter_name, name_field, version_field = self.CATALOG_LISTINGS[kind]
+        filter_map = {name_field: name}
+        if version is not None:
+            filter_map[version_field] = version
 
-                page += 1
+        for entry_id, info in getattr(self, iter_name)(filter_map, prefetch_pages=0):
+            self.catalog.add(kind, entry_id, info)
+            if self.catalog.matches(kind, info, name, version):
+                return entry_id
 
-            return applications
+        return None
 
-        except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Error fetching the applications! Error: {err} " + response.text)
-            else:
-                print(f"Error fetching the applications! Error: {err} ")
-            exit()
-        except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
-            exit()
+    def sync_catalog(self, kind):
+        """
+        Loads a listing of the local catalog store into the catalog cache.
 
-    def validate_create_application(self):
-        headers = self.get_access_keys()
-        if headers is None:
+        A listing synced within the catalog TTL is used as is. A stale listing is
+        synced incrementally when its rows carry an update timestamp: only the
+        rows newer than the last sync are fetched, newest first. Otherwise, or
+        when --refresh-catalog is given, the whole listing is fetched again.
+        """
+        if self.catalog.is_complete(kind):
             return
 
-        url = f'{self.url}/cloudMPApiServer/getAppsGroupMetaData'
-        page = 1
-        size = 7
-        total_records = float('inf')
-        applications = {}
-
-        try:
-            while (page - 1) * size < total_records:
-                data = {
-                    "filterMap": {},
-                    "sortMap": {},
-                    "page": page,
-                    "size": size
-                }
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                json_data = response.json()
-
-                if page == 1:
-                    total_records = json_data.get("totalRecords", 0)
+        store = self.catalog_store
+        if not self.refresh_catalog:
+            state = store.sync_state(kind)
+            if store.is_fresh(kind) or (state and state["timestamp_field"] and self._sync_catalog_changes(kind, state)):
+                self.catalog.load(kind, store.load(kind))
+                return
 
-                applications.update({item["id"]: {"id": item["id"], "applicationName": item.get("applicationName"), "version": item.get("version", None), "operationState": item.get("operationState", None)} for item in json_data["data"]})
+        entries = []
+        timestamp_field = None
+        watermark = None
+        for entry, row in getattr(self, self.CATALOG_LISTINGS[kind][0])(with_rows=True):
+            entries.append(entry)
+            if timestamp_field is None:
+                timestamp_field = next((field for field in self.UPDATE_TIMESTAMP_FIELDS if row.get(field) is not None), None)
+            stamp = row.get(timestamp_field) if timestamp_field else None
+            if stamp is not None and (watermark is None or stamp > watermark):
+                watermark = stamp
+
+        store.replace(kind, entries, timestamp_field, watermark)
+        self.catalog.load(kind, entries)
+
+    def _sync_catalog_changes(self, kind, state):
+        """
+        Fetches the rows updated since the last sync, newest first, and merges them
+        into the local catalog store. The rows stamped with the watermark itself are
+        fetched again, rows updated within the same timestamp tick are not missed.
 
-                page += 1
+        Deleted rows never show up as changes. They are detected by comparing the
+        stored row count with the total of the server once the changes are merged,
+        which holds as long as every added or updated row gets a newer timestamp.
+        A server that reuses older timestamps needs --refresh-catalog to drop the
+        rows deleted there.
 
-            return applications
+        Returns:
+            bool: False when the listing has to be fetched in full instead, i.e. the
+            server does not sort by the timestamp or rows were deleted since.
+        """
+        iter_entries = getattr(self, self.CATALOG_LISTINGS[kind][0])
+        timestamp_field = state["timestamp_field"]
+        watermark = state["watermark"]
+        newest = watermark
+        previous = None
+        changes = {}
+        page_info = {}
+
+        for entry, row in iter_entries(sort_map={timestamp_field: "desc"}, prefetch_pages=0,
+                                       page_info=page_info, with_rows=True):
+            stamp = row.get(timestamp_field)
+            if stamp is None or (previous is not None and stamp > previous):
+                return False
+            previous = stamp
+            if watermark is not None and stamp < watermark:
+                break
+            # a row can show up twice when an update moves it between pages
+            changes.setdefault(entry[0], entry)
+            if newest is None or stamp > newest:
+                newest = stamp
 
-        except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Error fetching the applications! Error: {err} " + response.text)
-            else:
-                print(f"Error fetching the applications! Error: {err} ")
-            exit()
-        except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
-            exit()
+        self.catalog_store.merge(kind, list(changes.values()), timestamp_field, newest)
+        return self.catalog_store.count(kind) == page_info.get("totalRecords")
 
-    def get_applications(self):
+    def iter_categories(self, filter_map=None, prefetch_pages=None, **options):
         headers = self.get_access_keys()
-        if headers is None:
-            return
-
-        url = f'{self.url}/cloudMPApiServer/getAppsGroupMetaData'
-        page = 1
-        size = 7
-        total_records = float('inf')
-        applications = {}
-
-        try:
-            while (page - 1) * size < total_records:
-                data = {
-                    "filterMap": {},
-                    "sortMap": {},
-                    "page": page,
-                    "size": size
-                }
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                json_data = response.json()
+        url = f'{self.url}/cloudMPApiServer/getCategoryDataTable'
+        return self._iter_listing(url, headers, "categories",
+                                  lambda item: (item["id"], item["categoryName"]),
+                                  filter_map, prefetch_pages, **options)
 
-                if page == 1:
-                    total_records = json_data.get("totalRecords", 0)
+    def get_category(self, collect=True):
+        return self._print_listing("Category names :", self._listing_entries('categories', self.iter_categories),
+                                   lambda category_name: f"{category_name} ", collect)
 
-                applications.update({item["id"]: {"applicationName": item.get("applicationName"), "version": item.get("version", None)} for item in json_data["data"]})
+    def iter_verticals(self, filter_map=None, prefetch_pages=None, **options):
+        headers = self.get_access_keys()
+        url = f'{self.url}/cloudMPApiServer/getVerticalDataTable'
+        return self._iter_listing(url, headers, "verticals",
+                                  lambda item: (item["id"], item["verticalName"]),
+                                  filter_map, prefetch_pages, **options)
 
-                page += 1
+    def get_vertical(self, collect=True):
+        return self._print_listing("Vertical names :", self._listing_entries('verticals', self.iter_verticals),
+                                   lambda vertical_name: f"{vertical_name} ", collect)
 
-            print("Application names:")
-            i = 1
-            for application_id, application_info in applications.items():
-                print(f"{i}. {application_info['applicationName']} - {application_info['version']}")
-                i += 1
-    
-            return applications
+    def iter_app_packages(self, filter_map=None, prefetch_pages=None, **options):
+        headers = self.get_access_keys()
+        url = f'{self.url}/cloudMPApiServer/getRepoAppUploadMetaData'
+        return self._iter_listing(url, headers, "app packages",
+                                  lambda item: (item["id"], {"appName": item.get("appName"), "version": item.get("version", None)}),
+                                  filter_map, prefetch_pages, **options)
 
-        except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Error fetching the applications! Error: {err} " + response.text)
-            else:
-                print(f"Error fetching the applications! Error: {err} ")
-            exit()
-        except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
-            exit()
+    def get_app_package(self, collect=True):
+        return self._print_listing("App package names:", self._listing_entries('app_packages', self.iter_app_packages),
+                                   lambda app_info: f"{app_info['appName']} - {app_info['version']}", collect)
 
-    def get_local_applications(self):
+    def validate_manage_application(self):
         headers = self.get_regal_api_access_keys()
         if headers is None:
             return
 
         url = f'{self.regal_api_server_url}/api/localMarketPlace/apps/dataTable'
-        page = 1
-        size = 7
-        total_records = float('inf')
         applications = {}
 
         try:
-            while (page - 1) * size < total_records:
-                data = {
-                    "filterMap": {},
-                    "sortMap": {},
-                    "page": page,
-                    "size": size
-                }
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                json_data = response.json()
-
-                if page == 1:
-                    total_records = json_data.get("totalRecords", 0)
-
-                applications.update({item["appId"]: 
-                    {"applicationName": item.get("appName"), 
-                     "version": item.get("appVersion", None),
-                     "status": item.get("status", None),
-                     "isBaseVersion":  item.get("isBaseVersion", None),
-                     "updateVersion": item.get("updateVersion", None)} for item in json_data["data"]})
+            rows = self.fetch_data_table(url, headers)
+            applications.update({item["appId"]: self._local_application_state(item) for item in rows})
 
-                page += 1
-
-            # print("Application names:")
-            i = 1
-            for application_id, application_info in applications.items():
-                print(f"{i}. {application_info['applicationName']} - {application_info['version']}")
-                i += 1
-    
             return applications
 
         except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Error fetching the applications! Error: {err} " + response.text)
+            if err.response is not None:
+                print(f"Error fetching the applications! Error: {err} " + err.response.text)
             else:
                 print(f"Error fetching the applications! Error: {err} ")
             exit()
         except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
+            print(f"An error occurred: {e} ")
             exit()
 
-    def get_test_modules(self):
+    def _local_application_state(self, item):
+        return {"applicationName": item.get("appName"),
+                "version": item.get("appVersion", None),
+                "operationState": item.get("status", None),
+                "failureReason": item.get("failureReason")}
+
+    def _local_application_states(self, job_ids):
+        """
+        Fetches the local applications the watched actions are decided by. With up
+        to FILTERED_POLL_LIMIT actions only their own rows are asked for, with more
+        one pass over the whole table is cheaper than a query per action.
+
+        Returns:
+            dict: The applications by id, as returned by validate_manage_application.
+        """
+        filters = [self.local_application_filters.get(job_id) for job_id in job_ids]
+        if None in filters or len(filters) > FILTERED_POLL_LIMIT:
+            return self.validate_manage_application()
+
+        applications = {}
+        for filter_map in {json.dumps(filter_map, sort_keys=True): filter_map for filter_map in filters}.values():
+            for entry, item in self.iter_local_applications(filter_map, prefetch_pages=0, with_rows=True):
+                applications[item["appId"]] = self._local_application_state(item)
+        return applications
+
+    def validate_create_application(self):
         headers = self.get_access_keys()
         if headers is None:
             return
 
-        url = f'{self.url}/cloudMPApiServer/getTestModuleUploadMetaData'
-        page = 1
-        size = 7
-        total_records = float('inf')
-        test_modules = {}
+        url = f'{self.url}/cloudMPApiServer/getAppsGroupMetaData'
+        applications = {}
 
         try:
-            while (page - 1) * size < total_records:
-                data = {
-                    "filterMap": {},
-                    "sortMap": {},
-                    "page": page,
-                    "size": size
-                }
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                json_data = response.json()
-
-                if page == 1:
-                    total_records = json_data.get("totalRecords", 0)
+            rows = self.fetch_data_table(url, headers)
+            applications.update({item["id"]: {"id": item["id"], "applicationName": item.get("applicationName"), "version": item.get("version", None), "operationState": item.get("operationState", None)} for item in rows})
 
-                test_modules.update({item["id"]: {"testModuleName": item.get("testModuleName"), "version": item.get("version", None)} for item in json_data["data"]})
-                
-                page += 1
-
-            print("Test module names :")
-            i = 1
-            for test_module_id, test_module_info in test_modules.items():
-                print(f"{i}. {test_module_info['testModuleName']} - {test_module_info['version']}")
-                i += 1
-
-            return test_modules
+            return applications
 
         except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Error fetching the test modules. Error: {err} " + response.text)
+            if err.response is not None:
+                print(f"Error fetching the applications! Error: {err} " + err.response.text)
             else:
-                print(f"Error fetching the test modules. Error: {err} ")
+                print(f"Error fetching the applications! Error: {err} ")
             exit()
         except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
+            print(f"An error occurred: {e} ")
             exit()
 
-    def get_modules(self):
+    def iter_applications(self, filter_map=None, prefetch_pages=None, **options):
         headers = self.get_access_keys()
-        if headers is None:
-            return
-
-        url = f'{self.url}/cloudMPApiServer/getModulesGroupMetaData'
-        page = 1
-        size = 7
-        total_records = float('inf')
-        modules = {}
-
-        try:
-            while (page - 1) * size < total_records:
-                data = {
-                    "filterMap": {},
-                    "sortMap": {},
-                    "page": page,
-                    "size": size
-                }
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                json_data = response.json()
-
-                if page == 1:
-                    total_records = json_data.get("totalRecords", 0)
+        url = f'{self.url}/cloudMPApiServer/getAppsGroupMetaData'
+        return self._iter_listing(url, headers, "applications",
+                                  lambda item: (item["id"], {"applicationName": item.get("applicationName"), "version": item.get("version", None)}),
+                                  filter_map, prefetch_pages, **options)
 
-                modules.update({item["id"]: {"moduleName": item.get("moduleName"), "version": item.get("version", None)} for item in json_data["data"]})
+    def get_applications(self, collect=True):
+        return self._print_listing("Application names:", self._listing_entries('applications', self.iter_applications),
+                                   lambda application_info: f"{application_info['applicationName']} - {application_info['version']}", collect)
 
-                page += 1
+    def iter_local_applications(self, filter_map=None, prefetch_pages=None, **options):
+        headers = self.get_regal_api_access_keys()
+        url = f'{self.regal_api_server_url}/api/localMarketPlace/apps/dataTable'
+        return self._iter_listing(url, headers, "applications",
+                                  lambda item: (item["appId"],
+                                                {"applicationName": item.get("appName"),
+                                                 "version": item.get("appVersion", None),
+                                                 "status": item.get("status", None),
+                                                 "isBaseVersion":  item.get("isBaseVersion", None),
+                                                 "updateVersion": item.get("updateVersion", None)}),
+                                  filter_map, prefetch_pages, **options)
+
+    def get_local_applications(self, collect=True):
+        return self._print_listing(None, self.iter_local_applications(),
+                                   lambda application_info: f"{application_info['applicationName']} - {application_info['version']}", collect)
+
+    def iter_test_modules(self, filter_map=None, prefetch_pages=None, **options):
+        headers = self.get_access_keys()
+        url = f'{self.url}/cloudMPApiServer/getTestModuleUploadMetaData'
+        return self._iter_listing(url, headers, "test modules",
+                                  lambda item: (item["id"], {"testModuleName": item.get("testModuleName"), "version": item.get("version", None)}),
+                                  filter_map, prefetch_pages, **options)
 
-            print("Module names :")
-            i = 1
-            for module_id, module_info in modules.items():
-                print(f"{i}. {module_info['moduleName']} - {module_info['version']}")
-                i += 1  
+    def get_test_modules(self, collect=True):
+        return self._print_listing("Test module names :", self._listing_entries('test_modules', self.iter_test_modules),
+                                   lambda test_module_info: f"{test_module_info['testModuleName']} - {test_module_info['version']}", collect)
 
-            return modules
-        
-        
+    def iter_modules(self, filter_map=None, prefetch_pages=None, **options):
+        headers = self.get_access_keys()
+        url = f'{self.url}/cloudMPApiServer/getModulesGroupMetaData'
+        return self._iter_listing(url, headers, "modules",
+                                  lambda item: (item["id"], {"moduleName": item.get("moduleName"), "version": item.get("version", None)}),
+                                  filter_map, prefetch_pages, **options)
 
-        except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Error fetching the modules. Error: {err} " + response.text)
-            else:
-                print(f"Error fetching the modules. Error: {err} ")
-            exit()
-        except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
-            exit()
+    def get_modules(self, collect=True):
+        return self._print_listing("Module names :", self._listing_entries('modules', self.iter_modules),
+                                   lambda module_info: f"{module_info['moduleName']} - {module_info['version']}", collect)
 
     def validate_create_module(self):
         headers = self.get_access_keys()
@@ -1490,29 +1835,11 @@ class MyCLI(cmd.Cmd):
             return
 
         url = f'{self.url}/cloudMPApiServer/getModulesGroupMetaData'
-        page = 1
-        size = 7
-        total_records = float('inf')
         modules = {}
 
         try:
-            while (page - 1) * size < total_records:
-                data = {
-                    "filterMap": {},
-                    "sortMap": {},
-                    "page": page,
-                    "size": size
-                }
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                json_data = response.json()
-
-                if page == 1:
-                    total_records = json_data.get("totalRecords", 0)
-
-                modules.update({item["id"]: {"moduleId": item.get("id"),"moduleName": item.get("moduleName"), "operationState": item.get("operationState", None)} for item in json_data["data"]})
-
-                page += 1
+            rows = self.fetch_data_table(url, headers)
+            modules.update({item["id"]: {"moduleId": item.get("id"),"moduleName": item.get("moduleName"), "operationState": item.get("operationState", None)} for item in rows})
 
             # print("Module names :")
             # i = 1
@@ -1525,218 +1852,177 @@ class MyCLI(cmd.Cmd):
         
 
         except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Error fetching the modules. Error: {err} " + response.text)
+            if err.response is not None:
+                print(f"Error fetching the modules. Error: {err} " + err.response.text)
             else:
                 print(f"Error fetching the modules. Error: {err} ")
             exit()
         except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
+            print(f"An error occurred: {e} ")
             exit()
 
     def get_data(self, data_type, return_dict=False):
         headers = self.get_access_keys()
-        if headers is None:
-            return
-
         url = f'{self.url}/cloudMPApiServer/get{data_type}DataTable'
-        page = 1
-        size = 7
-        total_records = float('inf')
-        names = []
-        ids_to_names = {}
+        name_field = f"{data_type.lower()}Name"
+        entries = self._iter_listing(url, headers, f"{data_type.lower()}s",
+                                     lambda item: (item["id"], item[name_field]))
 
-        try:
-            while (page - 1) * size < total_records:
-                data = {
-                    "filterMap": {},
-                    "sortMap": {},
-                    "page": page,
-                    "size": size
-                }
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                json_data = response.json()
-
-                if page == 1:
-                    total_records = json_data.get("totalRecords", 0)
+        ids_to_names = self._print_listing(f"{data_type} names:", entries, lambda name: name)
+        return ids_to_names if return_dict else list(ids_to_names.values())
 
-                names.extend([item[f"{data_type.lower()}Name"] for item in json_data["data"]])
-                if return_dict:
-                    ids_to_names.update({item["id"]: item[f"{data_type.lower()}Name"] for item in json_data["data"]})
+    def iter_security_tools(self, filter_map=None, prefetch_pages=None, **options):
+        headers = self.get_access_keys()
+        url = f'{self.url}/cloudMPApiServer/getSecurityToolUploadMetaData'
+        return self._iter_listing(url, headers, "security tool packages",
+                                  lambda item: (item["id"], {"toolName": item.get("toolName"), "version": item.get("version", None)}),
+                                  filter_map, prefetch_pages, **options)
 
-                page += 1
+    def get_security_tool(self, collect=True):
+        return self._print_listing("Security tool package names: ", self._listing_entries('security_tools', self.iter_security_tools),
+                                   lambda tool_info: f"{tool_info['toolName']} - {tool_info['version']}", collect)
 
-            print(f"{data_type} names:")
-            for i, name in enumerate(names):
-                print(f"{i+1}. {name}")
+    def iter_plugin_packages(self, filter_map=None, prefetch_pages=None, **options):
+        headers = self.get_access_keys()
+        url = f'{self.url}/cloudMPApiServer/getPluginUploadMetaData'
+        return self._iter_listing(url, headers, "plugins",
+                                  lambda item: (item["id"], {"pluginName": item.get("pluginName"), "version": item.get("version", None)}),
+                                  filter_map, prefetch_pages, **options)
 
-            return ids_to_names if return_dict else names
+    def get_plugin_package(self, collect=True):
+        return self._print_listing("Plugin package names :", self._listing_entries('plugin_packages', self.iter_plugin_packages),
+                                   lambda plugin_info: f"{plugin_info['pluginName']} - {plugin_info['version']}", collect)
 
-        except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Error fetching the {data_type.lower()}s. Error: {err} " + response.text) 
-            else:
-                print(f"Error fetching the {data_type.lower()}s. Error: {err} ") 
-            exit()
-        except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
-            exit()
+    def get_status_of_package(self, packageId, uploadPackageType=None):
+        json_data = self.get_package_job(packageId, uploadPackageType)
+        if json_data is None:
+            return
+        return json_data.get('jobStatus'), json_data.get('url')
 
-    def get_security_tool(self):
+    def get_package_job(self, packageId, uploadPackageType=None):
+        """
+        Returns:
+            dict: The details of the upload job of a package, its jobStatus, url and,
+            once completed, the sha256 and size the marketplace reports if any.
+        """
         headers = self.get_access_keys()
         if headers is None:
             return
 
-        url = f'{self.url}/cloudMPApiServer/getSecurityToolUploadMetaData'
-        page = 1
-        size = 7
-        total_records = float('inf')
+        uploadPackageType = uploadPackageType or self.uploadPackageType
+        url = f'{self.url}/cloudMarketPlace/upload/package/{uploadPackageType}/{packageId}'
+        data = {}
 
-        tools = {}
+        def fetch_status():
+            response = self.session.get(url, headers=headers, json=data)
+            response.raise_for_status()
+            return response.json()
 
         try:
-            while (page - 1) * size < total_records:
-                data = {
-                    "filterMap": {},
-                    "sortMap": {},
-                    "page": page,
-                    "size": size
-                }
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                json_data = response.json()
-
-                if page == 1:
-                    total_records = json_data.get("totalRecords", 0)
-
-                tools.update({item["id"]: {"toolName": item.get("toolName"), "version": item.get("version", None)} for item in json_data["data"]})
-
-                page += 1
-
-            print("Security tool package names: ")
-            i = 1
-            for _, tool_info in tools.items():
-                print(f"{i}. {tool_info['toolName']} - {tool_info['version']}")
-                i += 1
-            
-            return tools
-
+            return self.poller.retry(self.PACKAGE_STATUS_RETRY, fetch_status)
         except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Error fetching the security tool packages! Error: {err} " + response.text)
-            else:
-                print(f"Error fetching the security tool packages! Error: {err} ")
+            print(f"Failed to get package details after {self.PACKAGE_STATUS_RETRY.timeout} seconds! Error: {err} {err.response.text}")
             exit()
         except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
-            exit()    
+            print(f"An error occurred after {self.PACKAGE_STATUS_RETRY.timeout} seconds: {e}")
+            exit()
 
-    def get_plugin_package(self):
-        headers = self.get_access_keys()
-        if headers is None:
-            return
+    def _wait_for_package_job(self, policy, label, get_status, package_id, source=None):
+        """
+        Polls the upload job of a package until it reaches a terminal state of the policy.
 
-        url = f'{self.url}/cloudMPApiServer/getPluginUploadMetaData'
-        page = 1
-        size = 7
-        total_records = float('inf')
+        Args:
+            policy (JobPolicy): PACKAGE_UPLOAD_READY or PACKAGE_UPLOAD_DONE.
+            label (str): The package type shown in the messages, e.g. "plugin package".
+            get_status (callable): Returns the (jobStatus, url) of the package, or (jobStatus, job details).
+            package_id (str): The package ID.
+            source: The upload type, the jobs of a type that are due together are fetched
+                in one poll. Defaults to get_status, which then has to be a method.
 
-        plugins = {}
+        Returns:
+            tuple: The last value returned by get_status.
+        """
+        def fetch(package_ids):
+            # the package job endpoint reports one job at a time
+            states = {}
+            for job_id in package_ids:
+                status = get_status(job_id)
+                states[job_id] = status[0], status
+            return states
+
+        result = self.watcher.wait(policy, package_id, ('packages', source or get_status), fetch)
+        if result.outcome == JobPoller.FAILED:
+            self._report(f'{label.capitalize()} upload failed! Please check the status of the {label}.')
+        elif result.outcome == JobPoller.TIMEOUT:
+            self._report(f'{label.capitalize()} upload took more time than expected! Please check the status of the {label}.')
+        elif policy is self.PACKAGE_UPLOAD_DONE:
+            self._report(f'Uploaded {label} successfully! \n')
+        return result.value
+
+    def _wait_until_ready(self, job_id, ready, fallback_delay):
+        """
+        Waits until ready() returns True, bounded by the READINESS policy. With
+        readinessChecks disabled the fixed fallback delay is slept instead.
 
-        try:
-            while (page - 1) * size < total_records:
-                data = {
-                    "filterMap": {},
-                    "sortMap": {},
-                    "page": page,
-                    "size": size
-                }
-                response = requests.post(url, headers=headers, json=data)
-                response.raise_for_status()
-                json_data = response.json()
+        Args:
+            job_id (str): Names what is waited for in the timing report.
+            ready (callable): Returns True once the next step can proceed.
+            fallback_delay (float): The fixed delay, unless readinessFallbackDelay is configured.
+        """
+        if not self.readiness_checks:
+            self.metrics.sleep("readiness fallback",
+                               self.readiness_fallback_delay if self.readiness_fallback_delay is not None else fallback_delay)
+            return True
 
-                if page == 1:
-                    total_records = json_data.get("totalRecords", 0)
+        result = self.poller.poll(self.READINESS, job_id, lambda: ("READY" if ready() else "PENDING", None))
+        if not result.succeeded:
+            self._report(f"{job_id} is not ready after {result.elapsed:.0f} seconds, continuing.")
+        return result.succeeded
 
-                plugins.update({item["id"]: {"pluginName": item.get("pluginName"), "version": item.get("version", None)} for item in json_data["data"]})
+    def _wait_until_listed(self, kind, row_id, status, fallback_delay):
+        # a failed upload never shows up in its listing
+        if status in self.PACKAGE_UPLOAD_DONE.success_states:
+            self._wait_until_ready(f"{kind} {row_id}", lambda: self._is_listed(kind, row_id), fallback_delay)
 
-                page += 1
+    def _wait_until_deleted(self, fallback_delay):
+        pending_deletes, self.pending_deletes = self.pending_deletes, []
 
-            print("Plugin package names :")
-            i = 1
-            for plugin_id, plugin_info in plugins.items():
-                print(f"{i}. {plugin_info['pluginName']} - {plugin_info['version']}")
-                i += 1
-            
-            return plugins
+        def deleted():
+            # rows confirmed gone are not asked for again
+            pending_deletes[:] = [(kind, row_id) for kind, row_id in pending_deletes if self._is_listed(kind, row_id)]
+            return not pending_deletes
 
-        except requests.exceptions.HTTPError as err:
-            if response is not None:
-                print(f"Error fetching the plugins! Error: {err} " + response.text)
-            else:
-                print(f"Error fetching the plugins! Error: {err} ")
-            exit()
-        except Exception as e:
-            if response is not None:
-                print(f"An error occurred: {e} " + response.text)
-            else:
-                print(f"An error occurred: {e} ")
-            exit()    
+        if pending_deletes:
+            self._wait_until_ready(f"delete of {len(pending_deletes)} rows", deleted, fallback_delay)
 
-    def get_status_of_package(self, packageId):
-        headers = self.get_access_keys()
-        if headers is None:
-            return
+    def _is_listed(self, kind, row_id):
+        iter_entries = getattr(self, self.CATALOG_LISTINGS[kind][0])
+        return any(entry_id == row_id for entry_id, info in iter_entries({"id": row_id}, prefetch_pages=0))
 
-        url = f'{self.url}/cloudMarketPlace/upload/package/{self.uploadPackageType}/{packageId}'
-        data = {}
+    def _record_delete(self, kind, row_id):
+        self.catalog.remove(kind, row_id)
+        self.pending_deletes.append((kind, row_id))
 
-        max_retries = 6  # 1 minute / 10 seconds = 6 attempts
-        retry_delay = 10  # seconds
-        attempts = 0
+    def _operation_state(self, jobs, job_id):
+        """
+        Returns:
+            tuple: (operationState of the job or None when it is not listed, job info)
+        """
+        if not jobs or job_id not in jobs:
+            return None, None
+        return jobs[job_id]["operationState"], jobs[job_id]
 
-        while attempts < max_retries:
-            try:
-                response = requests.get(url, headers=headers, json=data)
-                response.raise_for_status()
-                status = response.json().get('jobStatus')
-                return_url = response.json().get('url')
-                return status, return_url
-            except requests.exceptions.HTTPError as err:
-                attempts += 1
-                if attempts >= max_retries:
-                    if response is not None:
-                        print(f"Failed to get package details after {max_retries} attempts! Error: {err} {response.text}")
-                    else:
-                        print(f"Failed to get package details after {max_retries} attempts! Error: {err}")
-                    exit()
-                else:
-                    time.sleep(retry_delay)
-            except Exception as e:
-                attempts += 1
-                if attempts >= max_retries:
-                    if response is not None:
-                        print(f"An error occurred after {max_retries} attempts: {e} {response.text}")
-                    else:
-                        print(f"An error occurred after {max_retries} attempts: {e}")
-                    exit()
-                else:
-                    time.sleep(retry_delay)
+    def _operation_states(self, jobs, job_ids):
+        return {job_id: self._operation_state(jobs, job_id) for job_id in job_ids}
 
-    def upload_packages(self):
+    def upload_packages(self, packageName=None, uploadPackageType=None):
         """
         Uploads any package to the cloud marketplace.
 
+        Args:
+            packageName (str): The package file name, defaults to self.packageName.
+            uploadPackageType (str): The upload type, defaults to self.uploadPackageType.
+
         Returns:
             - packageName
             - packageId
@@ -1750,20 +2036,23 @@ class MyCLI(cmd.Cmd):
         if headers is None:
             return
 
+        packageName = packageName or self.packageName
+        uploadPackageType = uploadPackageType or self.uploadPackageType
+
         url = f'{self.url}/cloudMarketPlace/upload/package'
         data = {
-            "packageName": self.packageName,
-            "uploadPackageType": self.uploadPackageType
+            "packageName": packageName,
+            "uploadPackageType": uploadPackageType
         }
 
-        if self.uploadPackageType == 'repoApp':
+        if uploadPackageType == 'repoApp':
             data.update({
                 "packageType": self.packageType,
                 "appName": self.appName,
                 "version": self.version
             })
 
-        if self.uploadPackageType == 'vulnScanTool':
+        if uploadPackageType == 'vulnScanTool':
             data.update({
                 "packageType": self.packageType,
                 "toolName": self.toolName,
@@ -1774,9 +2063,10 @@ class MyCLI(cmd.Cmd):
             })
 
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = self.session.post(url, headers=headers, json=data)
             response.raise_for_status()
-            print('Upload package is in progress, please wait! The package ID is \t'+ response.json().get('packageId'))
+            self._report('Upload package is in progress, please wait! The package ID is \t'+ response.json().get('packageId'))
+            self.catalog.invalidate(self.UPLOAD_PACKAGE_CATALOG[uploadPackageType])
             return response.json().get('packageId')
         except requests.exceptions.HTTPError as err:
             if response is not None:
@@ -1822,45 +2112,7 @@ class MyCLI(cmd.Cmd):
                 self.packageName = str(file_name)
                 print(f"The plugin package name is {self.packageName}")
 
-                packageId = self.upload_packages()
-
-                status, resp_url  = self.get_status_of_package(packageId)
-                print("Getting status of plugin package, please wait!")
-                plugin_state_iter = 0
-                while (status != "COMPLETED"):
-                    time.sleep(2)
-                    status, resp_url = self.get_status_of_package(packageId)
-                    plugin_state_iter += 1
-                    if status == "COMPLETED" or status == "ACTIVE" or status == "RUNNING" or status == "SUCCESSFUL":
-                        break
-                    if status == "FAILED":
-                        print('Plugin package upload failed! Please check the status of the plugin package.')
-                        break
-                    if plugin_state_iter == 60:
-                        print('Plugin package upload took more time than expected! Please check the status of the plugin package.')
-                        break
-                status, resp_url = self.get_status_of_package(packageId)
-                print("Uploading plugin package, please wait!")
-
-                self.upload_package_in_cloud_mp(resp_url, selected_file)
-                status, resp_url  = self.get_status_of_package(packageId)
-                plugin_state_iter = 0
-                while (status != "COMPLETED"):
-                    time.sleep(2)
-                    status, resp_url = self.get_status_of_package(packageId)
-                    plugin_state_iter += 1
-                    if status == "COMPLETED" or status == "SUCCESSFUL":
-                        print('Uploaded plugin package successfully! \n')
-                        break
-                    if status == "FAILED":
-                        print('Plugin package upload failed! Please check the status of the plugin package. \n')
-                        break
-                    if plugin_state_iter == 60:
-                        print('Plugin package upload took more time than expected! Please check the status of the plugin package. \n')
-                        break
-                
-                time.sleep(30)
-                return packageId
+                return self._upload_package_file("plugin package", selected_file)
 
             elif option == '2':
                 self.uploadPackageType = 'repoApp'  
@@ -1902,45 +2154,7 @@ class MyCLI(cmd.Cmd):
                     print("App Version can not be none.")
                     sys.exit(1)
 
-                packageId = self.upload_packages()
-
-                status, resp_url  = self.get_status_of_package(packageId)
-                print("Getting status of app package, please wait!")
-                app_state_iter = 0
-                while (status != "COMPLETED"):
-                    time.sleep(2)
-                    status, resp_url = self.get_status_of_package(packageId)
-                    app_state_iter += 1
-                    if status == "COMPLETED" or status == "ACTIVE" or status == "RUNNING" or status == "SUCCESSFUL":
-                        break
-                    if status == "FAILED":
-                        print('App package upload failed! Please check the status of the app package.')
-                        break
-                    if app_state_iter == 60:
-                        print('App package upload took more time than expected! Please check the status of the app package.')
-                        break
-                status, resp_url = self.get_status_of_package(packageId)
-                print("Uploading app package, please wait!")
-
-                self.upload_package_in_cloud_mp(resp_url, selected_file)
-                status, resp_url  = self.get_status_of_package(packageId)
-                app_state_iter = 0
-                while (status != "COMPLETED"):
-                    time.sleep(2)
-                    status, resp_url = self.get_status_of_package(packageId)
-                    app_state_iter += 1
-                    if status == "COMPLETED" or status == "SUCCESSFUL":
-                        print('Uploaded app package successfully! \n')
-                        break
-                    if status == "FAILED":
-                        print('App package upload failed! Please check the status of the app package. \n')
-                        break
-                    if app_state_iter == 60:
-                        print('App package upload took more time than expected! Please check the status of the app package. \n')
-                        break
-                
-                time.sleep(30)
-                return packageId
+                return self._upload_package_file("app package", selected_file)
             
             elif option == '3':
                 if self.has_inline_args and self.file_path is None:
@@ -1954,45 +2168,7 @@ class MyCLI(cmd.Cmd):
                 self.packageName = str(file_name)
                 print(f"The test module package name is {self.packageName}")
 
-                packageId = self.upload_packages()
-
-                status, resp_url  = self.get_status_of_package(packageId)
-                print("Getting status of test module package, please wait!")
-                test_module_state_iter = 0
-                while (status != "COMPLETED"):
-                    time.sleep(2)
-                    status, resp_url = self.get_status_of_package(packageId)
-                    test_module_state_iter += 1
-                    if status == "COMPLETED" or status == "ACTIVE" or status == "RUNNING" or status == "SUCCESSFUL":
-                        break
-                    if status == "FAILED":
-                        print('Test module package upload failed! Please check the status of the test module package.')
-                        break
-                    if test_module_state_iter == 60:
-                        print('Test module package upload took more time than expected! Please check the status of the test module package.')
-                        break
-                status, resp_url = self.get_status_of_package(packageId)
-                print("Uploading test module package, please wait!")
-
-                self.upload_package_in_cloud_mp(resp_url, selected_file)
-                status, resp_url  = self.get_status_of_package(packageId)
-                test_module_state_iter = 0
-                while (status != "COMPLETED"):
-                    time.sleep(2)
-                    status, resp_url = self.get_status_of_package(packageId)
-                    test_module_state_iter += 1
-                    if status == "COMPLETED" or status == "SUCCESSFUL":
-                        print('Uploaded test module package successfully! \n')
-                        break
-                    if status == "FAILED":
-                        print('Test module package upload failed! Please check the status of the test module package. \n')
-                        break
-                    if test_module_state_iter == 60:
-                        print('Test module package upload took more time than expected! Please check the status of the test module package. \n')
-                        break
-                
-                time.sleep(30)
-                return packageId
+                return self._upload_package_file("test module package", selected_file)
             
             elif option == '4':
                 self.uploadPackageType = 'vulnScanTool'  
@@ -2104,51 +2280,142 @@ class MyCLI(cmd.Cmd):
                 else:
                     self.categoryid = self._fetch_category_id()
 
-                packageId = self.upload_packages()
-
-                status, resp_url  = self.get_status_of_package(packageId)
-                print("Getting status of security tool package, please wait!")
-                tool_state_iter = 0
-                while (status != "COMPLETED"):
-                    time.sleep(2)
-                    status, resp_url = self.get_status_of_package(packageId)
-                    tool_state_iter += 1
-                    if status == "COMPLETED" or status == "ACTIVE" or status == "RUNNING" or status == "SUCCESSFUL":
-                        break
-                    if status == "FAILED":
-                        print('Security tool package upload failed! Please check the status of the security tool package.')
-                        break
-                    if tool_state_iter == 60:
-                        print('Security tool package upload took more time than expected! Please check the status of the security tool package.')
-                        break
-                status, resp_url = self.get_status_of_package(packageId)
-                print("Uploading security tool package, please wait!")
-
-                self.upload_package_in_cloud_mp(resp_url, selected_file)
-                status, resp_url  = self.get_status_of_package(packageId)
-                tool_state_iter = 0
-                while (status != "COMPLETED"):
-                    time.sleep(2)
-                    status, resp_url = self.get_status_of_package(packageId)
-                    tool_state_iter += 1
-                    if status == "COMPLETED" or status == "SUCCESSFUL":
-                        print('Uploaded security tool package successfully! \n')
-                        break
-                    if status == "FAILED":
-                        print('Security tool package upload failed! Please check the status of the Security tool package. \n')
-                        break
-                    if tool_state_iter == 60:
-                        print('Security tool package upload took more time than expected! Please check the status of the security tool package. \n')
-                        break
-                
-                time.sleep(30)
-                return packageId
+                return self._upload_package_file("security tool package", selected_file)
 
             elif option == '5':
                 exit()
             else:
                 print('Invalid input! Please try again.')   
     
+    def _upload_package_file(self, label, selected_file, uploadPackageType=None, packageName=None):
+        """
+        Creates the package job of the selected file, uploads the file to it and
+        waits until the package is listed. With chunked uploads an interrupted
+        upload of the same file resumes its package job from the checkpoint.
+
+        Args:
+            label (str): The package type shown in the messages, e.g. "plugin package".
+            selected_file (str): The path of the package file.
+            uploadPackageType (str): The upload type, defaults to self.uploadPackageType.
+            packageName (str): The package file name, defaults to self.packageName.
+
+        Returns:
+            str: The package ID.
+        """
+        uploadPackageType = uploadPackageType or self.uploadPackageType
+        packageName = packageName or self.packageName
+        # the same file is uploaded once per run, however many applications or modules refer to it
+        key = ('package', uploadPackageType, file_identity(selected_file)) + tuple(self._upload_labels(uploadPackageType))
+        return self.memo.run(key, lambda: self._upload_new_package_file(label, selected_file, uploadPackageType, packageName))
+
+    def _upload_new_package_file(self, label, selected_file, uploadPackageType, packageName):
+        def get_job(package_id):
+            job = self.get_package_job(package_id, uploadPackageType) or {}
+            return job.get('jobStatus'), job
+
+        digest = None
+        if self.upload_ledger is not None and not self.force_upload:
+            labels = self._upload_labels(uploadPackageType)
+            # only a file of a recorded size can be unchanged, other files are hashed while uploading
+            if self.upload_ledger.has_size(uploadPackageType, os.path.getsize(selected_file), labels):
+                digest, size = file_sha256(selected_file)
+                packageId = self._find_uploaded_package(label, packageName, uploadPackageType, digest, size, labels)
+                if packageId:
+                    return packageId
+
+        checkpoint = None
+        if self.chunked_upload:
+            checkpoint = UploadCheckpoint.for_file(self.upload_checkpoint_dir, selected_file,
+                                                   uploadPackageType, self.upload_chunk_size_of(selected_file))
+
+        packageId = self._resume_package_job(checkpoint) if checkpoint else None
+        if packageId:
+            self._report(f"Resuming the upload of {label} {packageId} at chunk {len(checkpoint.data['chunks'])}")
+            resp_url = checkpoint.url
+        else:
+            packageId = self.upload_packages(packageName, uploadPackageType)
+
+            self._report(f"Getting status of {label}, please wait!")
+            status, job = self._wait_for_package_job(self.PACKAGE_UPLOAD_READY, label, get_job, packageId,
+                                                     source=uploadPackageType)
+            resp_url = job.get('url')
+            if checkpoint:
+                checkpoint.start(packageId, resp_url)
+        self._report(f"Uploading {label}, please wait!")
+
+        sent_digest, size = self.upload_package_in_cloud_mp(resp_url, selected_file, checkpoint)
+        digest = sent_digest or digest
+        status, job = self._wait_for_package_job(self.PACKAGE_UPLOAD_DONE, label, get_job, packageId,
+                                                 source=uploadPackageType)
+        if status in self.PACKAGE_UPLOAD_DONE.success_states:
+            self._verify_uploaded_package(label, packageId, job, digest, size)
+        self._wait_until_listed(self.UPLOAD_PACKAGE_CATALOG[uploadPackageType], packageId, status, 30)
+        if self.upload_ledger is not None and status in self.PACKAGE_UPLOAD_DONE.success_states:
+            if digest is None:
+                digest, size = file_sha256(selected_file)
+            self.upload_ledger.record(digest, uploadPackageType, packageId, packageName, size,
+                                      self._upload_labels(uploadPackageType))
+        return packageId
+
+    def _verify_uploaded_package(self, label, packageId, job, digest, size):
+        """
+        Compares the SHA-256 and size of the sent file with the ones the
+        marketplace reports for the completed package job, when it reports them.
+        """
+        reported_digest = job.get('sha256') or job.get('checksum')
+        reported_size = job.get('size')
+        if digest and reported_digest and reported_digest.lower() != digest:
+            print(f"The uploaded {label} {packageId} does not match the package file! "
+                  f"SHA-256 sent {digest}, reported {reported_digest}")
+            exit()
+        if reported_size is not None and int(reported_size) != size:
+            print(f"The uploaded {label} {packageId} does not match the package file! "
+                  f"Sent {size} bytes, reported {reported_size}")
+            exit()
+
+    def _upload_labels(self, uploadPackageType):
+        # app and security tool packages are named by the upload request, not by the file
+        if uploadPackageType == 'repoApp':
+            return self.appName, self.version
+        if uploadPackageType == 'vulnScanTool':
+            return self.toolName, self.version
+        return ()
+
+    def _find_uploaded_package(self, label, packageName, uploadPackageType, digest, size, labels):
+        """
+        Returns:
+            str: The package ID the same file content was uploaded as before, if the
+            package still exists in the marketplace, otherwise None.
+        """
+        entry = self.upload_ledger.lookup(digest, uploadPackageType, labels)
+        if entry is None:
+            return None
+        if entry["size"] == size and self._is_listed(self.UPLOAD_PACKAGE_CATALOG[uploadPackageType], entry["packageId"]):
+            self._report(f"{label.capitalize()} {packageName} is unchanged, using the uploaded package {entry['packageId']} "
+                         f"(use --force-upload to upload it again)")
+            return entry["packageId"]
+        self.upload_ledger.forget(digest, uploadPackageType, labels)
+        return None
+
+    def _resume_package_job(self, checkpoint):
+        """
+        Returns:
+            str: The package ID of the checkpoint when its job still accepts the upload, otherwise None.
+        """
+        if not checkpoint.package_id:
+            return None
+        url = f'{self.url}/cloudMarketPlace/upload/package/{checkpoint.package_type}/{checkpoint.package_id}'
+        try:
+            response = self.session.get(url, headers=self.get_access_keys(), json={})
+            response.raise_for_status()
+            status = response.json().get('jobStatus')
+        except (requests.exceptions.RequestException, ValueError):
+            status = None
+        if status not in self.PACKAGE_UPLOAD_READY.success_states or status in self.PACKAGE_UPLOAD_DONE.success_states:
+            checkpoint.remove()
+            return None
+        return checkpoint.package_id
+
     def _upload_plugin_package(self):
         if self.has_inline_args and self.file_path is None:
             self.file_path = self.operation_data.get("file_path", None)
@@ -2160,41 +2427,12 @@ class MyCLI(cmd.Cmd):
         print(f"The plugin package name is {self.packageName}")
 
         pluginPackageId = self.upload_plugin_package()
-        status, resp_url  = self.get_status_of_plugin_package(pluginPackageId)
         print("Getting status of plugin package, please wait!")
-        plugin_state_iter = 0
-        while (status != "COMPLETED"):
-            time.sleep(2)
-            status, resp_url = self.get_status_of_plugin_package(pluginPackageId)
-            plugin_state_iter += 1
-            if status == "COMPLETED" or status == "ACTIVE" or status == "RUNNING" or status == "SUCCESSFUL":
-                break
-            if status == "FAILED":
-                print('Plugin package upload failed! Please check the status of the plugin package.')
-                break
-            if plugin_state_iter == 60:
-                print('Plugin package upload took more time than expected! Please check the status of the plugin package.')
-                break
-        status, resp_url = self.get_status_of_plugin_package(pluginPackageId)
+        status, resp_url = self._wait_for_package_job(self.PACKAGE_UPLOAD_READY, "plugin package", self.get_status_of_plugin_package, pluginPackageId)
         
         self.upload_package_in_cloud_mp(resp_url, selected_file)
-        status, resp_url  = self.get_status_of_plugin_package(pluginPackageId)
-        plugin_state_iter = 0
-        while (status != "COMPLETED"):
-            time.sleep(2)
-            status, resp_url = self.get_status_of_plugin_package(pluginPackageId)
-            plugin_state_iter += 1
-            if status == "COMPLETED" or status == "SUCCESSFUL":
-                print('Uploaded plugin package successfully! \n')
-                break
-            if status == "FAILED":
-                print('Plugin package upload failed! Please check the status of the plugin package. \n')
-                break
-            if plugin_state_iter == 60:
-                print('Plugin package upload took more time than expected! Please check the status of the plugin package.\n')
-                break
-        
-        time.sleep(20)
+        status, resp_url = self._wait_for_package_job(self.PACKAGE_UPLOAD_DONE, "plugin package", self.get_status_of_plugin_package, pluginPackageId)
+        self._wait_until_listed('plugin_packages', pluginPackageId, status, 20)
         return pluginPackageId   
         
     def _upload_app_package(self):
@@ -2237,45 +2475,23 @@ class MyCLI(cmd.Cmd):
             sys.exit(1)
 
         appPackageId = self.upload_app_package()
-        status, resp_url  = self.get_status_of_app_package(appPackageId)
         print("Getting status of app package, please wait!")
-        app_state_iter = 0
-        while (status != "COMPLETED"):
-            time.sleep(2)
-            status, resp_url = self.get_status_of_app_package(appPackageId)
-            app_state_iter += 1
-            if status == "COMPLETED" or status == "ACTIVE" or status == "RUNNING" or status == "SUCCESSFUL":
-                break
-            if status == "FAILED":
-                print('App package upload failed! Please check the status of the app package.')
-                break
-            if app_state_iter == 60:
-                print('App package upload took more time than expected! Please check the status of the app package.')
-                break
-        status, resp_url = self.get_status_of_app_package(appPackageId)
+        status, resp_url = self._wait_for_package_job(self.PACKAGE_UPLOAD_READY, "app package", self.get_status_of_app_package, appPackageId)
         print("Uploading app package, please wait!")
 
         self.upload_app_package_in_cloud_mp(resp_url, selected_file)
-        status, resp_url  = self.get_status_of_app_package(appPackageId)
-        app_state_iter = 0
-        while (status != "COMPLETED"):
-            time.sleep(2)
-            status, resp_url = self.get_status_of_app_package(appPackageId)
-            app_state_iter += 1
-            if status == "COMPLETED" or status == "SUCCESSFUL":
-                print('Uploaded app package successfully! \n')
-                break
-            if status == "FAILED":
-                print('App package upload failed! Please check the status of the app package. \n')
-                break
-            if app_state_iter == 60:
-                print('App package upload took more time than expected! Please check the status of the app package. \n')
-                break
-        
-        time.sleep(20)
+        status, resp_url = self._wait_for_package_job(self.PACKAGE_UPLOAD_DONE, "app package", self.get_status_of_app_package, appPackageId)
+        self._wait_until_listed('app_packages', appPackageId, status, 20)
         return appPackageId
     
     def _create_application(self):
+        if self.has_inline_args:
+            # an application that exists needs none of its packages resolved or uploaded
+            applicationid = self.find_existing_application(self.operation_data.get("applicationName", None),
+                                                           self.operation_data.get("version", None))
+            if applicationid:
+                return applicationid
+
         if not self.has_inline_args:
             while True:
                 option = input('Press enter 1 to select a vertical or enter 2 to create vertical or enter 3 to terminate operation: \n')
@@ -2406,28 +2622,40 @@ class MyCLI(cmd.Cmd):
             self.version = input('Enter the version: ')  
             self.description = input('Enter the description: ')
         else:
-            self.appName = self.operation_data.get("applicationName", None)
-            if not self.appName:
-                print(f"Application name can not be None")
-                sys.exit(1)
-            
-            self.version = self.operation_data.get("version", None)
-            if not self.version:
-                print(f"Application version can not be None")
-                sys.exit(1)
-            
-            self.description = self.operation_data.get("description", None)
-            if not self.description:
-                print(f"Application description can not be None")
-                sys.exit(1)
+            self._read_application_details()
 
-        application_exists = self._check_local_application_exists(self.appName, self.version)
-        if application_exists:
-            print("Application with same version already exists. skipping")
+        return self._create_application_with_plugins(all_plugin_ids)
 
-        applicationid = self.create_application(all_plugin_ids)
-        time.sleep(20)
-        return applicationid
+    def _read_application_details(self):
+        self.appName = self.operation_data.get("applicationName", None)
+        if not self.appName:
+            print(f"Application name can not be None")
+            sys.exit(1)
+        
+        self.version = self.operation_data.get("version", None)
+        if not self.version:
+            print(f"Application version can not be None")
+            sys.exit(1)
+        
+        self.description = self.operation_data.get("description", None)
+        if not self.description:
+            print(f"Application description can not be None")
+            sys.exit(1)
+
+    def _create_application_with_plugins(self, all_plugin_ids):
+        """
+        Creates the application of appName and version from the selected vertical,
+        category, app package and plugin packages.
+        """
+        def create():
+            applicationid = self.find_existing_application(self.appName, self.version)
+            if applicationid:
+                return applicationid
+
+            # create_application waits for the createApplication job, installs poll the local marketplace themselves
+            return self.create_application(all_plugin_ids)
+
+        return self.memo.run(('application', self.appName, self.version), create)
 
     def _manage_application(self):
         if not self.has_inline_args:
@@ -2458,6 +2686,10 @@ class MyCLI(cmd.Cmd):
             except ValueError:
                 print("Invalid input! Please enter a number. \n")
                 return
+        elif self.operation_data.get("applications"):
+            results = self.manage_applications(self.operation_data["applications"])
+            if any(not str(result["outcome"]).startswith((JobPoller.SUCCESS, "already installed")) for result in results):
+                sys.exit(1)
         else:
             application_name = self.operation_data.get("applicationName", None)
             if not application_name:
@@ -2485,7 +2717,7 @@ class MyCLI(cmd.Cmd):
             if self.action == "update":
                 self.manage_upgrade_application(self.applicationid, application_name, old_version, application_version)
             else:
-                self.manage_application(self.applicationid, self.action, application_version)
+                self.manage_application(self.applicationid, self.action, application_version, application_name)
 
     def _add_vertical(self):
         if not self.has_inline_args:
@@ -2502,108 +2734,98 @@ class MyCLI(cmd.Cmd):
             print(f"Category Name should not be None.")
             sys.exit(1)
 
-        if self.operation_data.get('categoryRefDetails', {}).get('useExisting', False):
-            categories = self.get_category()
+        use_existing = self.operation_data.get('categoryRefDetails', {}).get('useExisting', False)
+        return self.ensure_category(self.categoryName, self.verticalid, use_existing)
 
-            found = False
-            for id, value in categories.items():
-                if value == self.categoryName:
-                    found = True
-                    return id
+    def find_category_id(self, categoryName, verticalId):
+        """
+        Looks up a category by name within a vertical, the same category name can
+        exist in several verticals.
 
-            if not found:
-                categoryId = self._add_category()
+        Returns:
+            str: The id of the category, None if the vertical has no category of the name.
+        """
+        filter_map = {"categoryName": categoryName, "verticalId": verticalId}
+        for (categoryId, name), row in self.iter_categories(filter_map, prefetch_pages=0, with_rows=True):
+            row_vertical = row.get("verticalId", row.get("verticalRefId", verticalId))
+            if name == categoryName and row_vertical == verticalId:
+                self.catalog.add('categories', categoryId, name)
                 return categoryId
-        else:
-            categoryId = self._add_category()
-            return categoryId
-        
         return None
 
-    def _get_existing_plugin_id(self, plugin_name): #discuss with Rashmi regarding version
-        plugins = self.get_plugin_package()
+    def ensure_category(self, categoryName, verticalId, use_existing=True):
+        """
+        Returns:
+            str: The id of the category of the vertical. Without use_existing the
+            category is added and the CLI exits when the vertical already has one
+            of the name, as the marketplace would create a duplicate.
+        """
+        def ensure():
+            categoryId = self.find_category_id(categoryName, verticalId)
+            if categoryId and not use_existing:
+                print(f"Category {categoryName} already exists, set useExisting to use it.")
+                sys.exit(1)
+            if categoryId:
+                print(f"Category {categoryName} exists, the category ID is {categoryId}")
+                return categoryId
+            self.categoryName = categoryName
+            self.verticalid = verticalId
+            return self._add_category()
 
-        for plugin_id, plugin_info in plugins.items():
-            if plugin_info['pluginName'] == plugin_name:
-                return plugin_id
-        
-        return None
+        # a category added earlier in this run is used again, whatever useExisting says
+        return self.memo.run(('category', verticalId, categoryName), ensure)
+
+    def _get_existing_plugin_id(self, plugin_name): #discuss with Rashmi regarding version
+        return self.find_catalog_id('plugin_packages', plugin_name)
     
     def _get_existing_test_module_id(self, test_module_name): #discuss with Rashmi regarding version
-        test_modules = self.get_test_modules()
-
-        for test_module_id, test_module_info in test_modules.items():
-            if test_module_info['testModuleName'] == test_module_name:
-                return test_module_id
-
-        return None
+        return self.find_catalog_id('test_modules', test_module_name)
     
     def _get_existing_security_tool_id(self, tool_name): #discuss with Rashmi regarding version
-        tools = self.get_security_tool()
-
-        for tool_id, tool_info in tools.items():
-            if tool_info['pluginName'] == tool_name:
-                return tool_id
-        
-        return None
+        return self.find_catalog_id('security_tools', tool_name)
 
     def _get_existing_application_id(self, application_name):
-        applications = self.get_applications()
-
-        for application_id, application_info in applications.items():
-            if application_info['applicationName'] == application_name:
-                return application_id
-
-        return None
+        return self.find_catalog_id('applications', application_name)
 
     def _get_existing_local_application_id(self, application_name):
-        timeout = 600 # wait till 10mins
-        interval = 5 # wait for 5sec intervals
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            applications = self.get_local_applications()
-            for application_id, application_info in applications.items():
+        def lookup():
+            applications = self.iter_local_applications({"appName": application_name}, prefetch_pages=0)
+            for application_id, application_info in applications:
                 if application_info['applicationName'] == application_name:
-                    return application_id  # Return immediately if found
-            time.sleep(interval)  # Wait before checking again
-        return None  # Return None if not found within the timeout
+                    return "FOUND", application_id  # Return immediately if found
+            return "NOT_FOUND", None
+
+        # None if not found within the timeout
+        return self.poller.poll(self.LOCAL_APPLICATION_LOOKUP, application_name, lookup).value
 
     def _check_local_application_exists(self, application_name, application_version):
-        applications = self.get_local_applications()
-        for application_id, application_info in applications.items():
+        applications = self.iter_local_applications({"appName": application_name, "appVersion": application_version}, prefetch_pages=0)
+        for application_id, application_info in applications:
             if application_info['applicationName'] == application_name and application_info['version'] == application_version:
                 return application_id  # Return immediately if found
         return None
     
 
     def _get_app_id_and_action(self, application_name, application_version):
-        timeout = 600 # wait till 10mins
-        interval = 15 # wait for 15sec intervals
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            applications = self.get_local_applications()
-            for application_id, application_info in applications.items():
-                print(application_info)
+        def lookup():
+            applications = self.iter_local_applications({"appName": application_name}, prefetch_pages=0)
+            for application_id, application_info in applications:
                 if application_info['applicationName'] == application_name and application_info['version'] == application_version \
                     and application_info["status"] == "NOT_INSTALLED":
-                    return application_id, "install", None
+                    return "FOUND", (application_id, "install", None)
                 elif application_info['applicationName'] == application_name  \
                     and application_info["status"] == "UPDATE_AVAILABLE" and application_info["updateVersion"] == application_version:
-                    return application_id, "update", application_info['version']
+                    return "FOUND", (application_id, "update", application_info['version'])
                 elif application_info['applicationName'] == application_name  \
                     and application_info["status"] == "INSTALLED" and application_info["version"] == application_version:
-                    return application_id, "skip", None
-            time.sleep(interval)  # Wait before checking again
-        return None, None, None # Return None if not found within the timeout
-
-    def _get_existing_module_id(self, module_name):
-        modules = self.get_modules()
+                    return "FOUND", (application_id, "skip", None)
+            return "NOT_FOUND", (None, None, None)
 
-        for module_id, module_info in modules.items():
-            if module_info['moduleName'] == module_name:
-                return module_id
+        # (None, None, None) if not found within the timeout
+        return self.poller.poll(self.LOCAL_APPLICATION_SYNC, application_name, lookup).value
 
-        return None
+    def _get_existing_module_id(self, module_name):
+        return self.find_catalog_id('modules', module_name)
 
     def _fetch_all_test_module_id(self):
         all_test_module_ids = []
@@ -2648,10 +2870,11 @@ class MyCLI(cmd.Cmd):
         return all_application_ids
 
     def _fetch_all_plugin_id(self):
-        all_plugin_ids = []
         plugin_details = self.operation_data.get('pluginPackageRefDetails', [])
+        all_plugin_ids = [None] * len(plugin_details)
+        uploads = []
 
-        for detail in plugin_details:
+        for position, detail in enumerate(plugin_details):
             use_existing = detail.get('useExisting', False)
             plugin_name = detail.get('pluginPackageName', None)
             self.file_path = detail.get('file_path', None)
@@ -2661,42 +2884,87 @@ class MyCLI(cmd.Cmd):
                 if not plugin_id:
                     print(f"Plugin Package {plugin_name} does not exists.")
                     sys.exit(1)
+                all_plugin_ids[position] = plugin_id
             else:
-                self.function_name = "upload_plugin_package"
-                # plugin_id = self._upload_plugin_package()
-                plugin_id = self._upload_packages()
+                # every file is validated before the first upload starts
+                uploads.append((position, self.select_listed_files_with_extension(".rp")))
+
+        plugin_ids = self.upload_plugin_packages([selected_file for position, selected_file in uploads])
+        for (position, selected_file), plugin_id in zip(uploads, plugin_ids):
+            all_plugin_ids[position] = plugin_id
 
-            all_plugin_ids.append(plugin_id)
-        
         return all_plugin_ids
 
+    def upload_plugin_packages(self, selected_files):
+        """
+        Uploads plugin packages concurrently, at most pluginUploadWorkers at a time,
+        with one progress display for all of them.
+
+        Args:
+            selected_files (list): The paths of the .rp files.
+
+        Returns:
+            list: The plugin package IDs, in the order of selected_files.
+        """
+        names = [os.path.basename(selected_file) for selected_file in selected_files]
+        if len(set(names)) < len(names):
+            names = [f"{position + 1}.{name}" for position, name in enumerate(names)]
+
+        def upload(selected_file, name, progress=None):
+            if progress is None:
+                print(f"The plugin package name is {os.path.basename(selected_file)}")
+                return self._upload_package_file("plugin package", selected_file, 'plugin', os.path.basename(selected_file))
+
+            self.progress_local.reporter = progress.reporter(name)
+            try:
+                plugin_id = self._upload_package_file("plugin package", selected_file, 'plugin', os.path.basename(selected_file))
+                progress.finish(name, f"done {plugin_id}")
+                return plugin_id
+            finally:
+                self.progress_local.reporter = None
+
+        if len(selected_files) <= 1 or self.plugin_upload_workers <= 1:
+            return [upload(selected_file, name) for selected_file, name in zip(selected_files, names)]
+
+        progress = UploadProgress(names)
+        executor = ThreadPoolExecutor(max_workers=min(self.plugin_upload_workers, len(selected_files)))
+        try:
+            futures = [executor.submit(upload, selected_file, name, progress) for selected_file, name in zip(selected_files, names)]
+            return [future.result() for future in futures]
+        finally:
+            # a failed upload exits the CLI, the queued ones must not start anymore
+            executor.shutdown(cancel_futures=True)
+            progress.close()
+
     def _fetch_vertical_id(self):
         self.verticalName = self.operation_data.get('verticalRefDetails', {}).get('verticalName', None)
         if not self.verticalName:
             print(f"Vertical Name should not be None.")
             sys.exit(1)
 
-        if self.operation_data.get('verticalRefDetails', {}).get('useExisting', False):
-            verticals = self.get_vertical()
-
-            found = False
-            for id, value in verticals.items():
-                if value == self.verticalName:
-                    found = True
-                    return id
+        use_existing = self.operation_data.get('verticalRefDetails', {}).get('useExisting', False)
+        self.vertical_id = self.ensure_vertical(self.verticalName, use_existing)
+        return self.vertical_id
 
-            if not found:
-                if not self.vertical_id:
-                    self.vertical_id = self._add_vertical()
-
-                return self.vertical_id
-        else:
-            if not self.vertical_id:
-                self.vertical_id = self._add_vertical()
+    def ensure_vertical(self, verticalName, use_existing=True):
+        """
+        Returns:
+            str: The id of the vertical. Without use_existing the vertical is added
+            and the CLI exits when one of the name already exists.
+        """
+        def ensure():
+            verticalId = self.find_catalog_id('verticals', verticalName)
+            if verticalId and not use_existing:
+                print(f"Vertical {verticalName} already exists, set useExisting to use it.")
+                sys.exit(1)
+            if verticalId:
+                print(f"Vertical {verticalName} exists, the vertical ID is {verticalId}")
+                return verticalId
+            self.verticalName = verticalName
+            return self._add_vertical()
 
-            return self.vertical_id
-        
-        return None
+        # a vertical added earlier in this run is used again, whatever useExisting says
+        return self.memo.run(('vertical', verticalName), ensure)
 
     def _fetch_app_package_id(self):
         self.appName = self.operation_data.get('appPackageRefDetails', {}).get('appName', None)
@@ -2712,16 +2980,12 @@ class MyCLI(cmd.Cmd):
                 print(f"App package version can not be None.")
                 sys.exit(1)
 
-            app_packages = self.get_app_package()
-
-            found = False
-            for app_package_id, app_package_info in app_packages.items():
-                if app_package_info['appName'] == self.appName and app_package_info['version'] == self.version:
-                    return app_package_id
+            app_package_id = self.find_catalog_id('app_packages', self.appName, self.version)
+            if app_package_id:
+                return app_package_id
 
-            if not found:
-                print(f"App Package {self.appName} does not exists.")
-                sys.exit(1)
+            print(f"App Package {self.appName} does not exists.")
+            sys.exit(1)
         else:
             self.file_path = self.operation_data.get('appPackageRefDetails', {}).get('file_path', None)
 
@@ -2786,8 +3050,8 @@ class MyCLI(cmd.Cmd):
             
 
     def _delete_category(self):
-        categories = self.get_category()
         if not self.has_inline_args:
+            categories = self.get_category()
             if len(categories) == 0:
                     print('No categories available. \n')
                     return
@@ -2814,13 +3078,8 @@ class MyCLI(cmd.Cmd):
                     print(f"Category Name should not be None.")
                     continue
 
-                found = False
-                for id, value in categories.items():
-                    if value == self.categoryName:
-                        found = True
-                        self.categoryid = id
-
-                if not found:
+                self.categoryid = self.find_catalog_id('categories', self.categoryName)
+                if not self.categoryid:
                     print(f"Category {self.categoryName} does not exists.")
                     continue
 
@@ -2855,14 +3114,8 @@ class MyCLI(cmd.Cmd):
                     print(f"Vertical Name should not be None.")
                     continue
 
-                verticals = self.get_vertical()
-                found = False
-                for id, value in verticals.items():
-                    if value == self.verticalName:
-                        found = True
-                        self.verticalid = id
-
-                if not found:
+                self.verticalid = self.find_catalog_id('verticals', self.verticalName)
+                if not self.verticalid:
                     print(f"Vertical {self.verticalName} does not exists.")
                     continue
 
@@ -2871,9 +3124,8 @@ class MyCLI(cmd.Cmd):
         
 
     def _delete_application(self): 
-        applications = self.get_applications()
-        # print(applications)
         if not self.has_inline_args:
+            applications = self.get_applications()
             if len(applications) == 0:
                     print('No applications available. \n')
                     return
@@ -2900,21 +3152,16 @@ class MyCLI(cmd.Cmd):
                     print(f"Application Name can not be None")
                     continue
 
-                found = False
-                for id, value in applications.items():
-                    if value.get("applicationName", None) == application_name:
-                        found = True
-                        self.applicationid = id
-
-                if not found:
+                self.applicationid = self.find_catalog_id('applications', application_name)
+                if not self.applicationid:
                     print(f"Application {application_name} does not exists.")
                     continue
 
                 self.delete_application(self.applicationid)
 
     def _delete_plugin_package(self):
-        plugins = self.get_plugin_package()
         if not self.has_inline_args:
+            plugins = self.get_plugin_package()
             if len(plugins) == 0:
                     print('No plugin packages available. \n')
                     return
@@ -2949,8 +3196,8 @@ class MyCLI(cmd.Cmd):
                 self.delete_plugin_package(self.pluginPackageId)
     
     def _delete_app_package(self):
-        app_packages = self.get_app_package()
         if not self.has_inline_args:
+            app_packages = self.get_app_package()
             if len(app_packages) == 0:
                     print('No app packages available. \n')
                     return
@@ -2977,13 +3224,8 @@ class MyCLI(cmd.Cmd):
                     print(f"App Package Name can not be None")
                     continue
 
-                found = False
-                for id, value in app_packages.items():
-                    if value.get("appName", None) == app_package_name:
-                        found = True
-                        self.appPackageId = id
-
-                if not found:
+                self.appPackageId = self.find_catalog_id('app_packages', app_package_name)
+                if not self.appPackageId:
                     print(f"App Package {app_package_name} does not exists.")
                     continue
 
@@ -2991,8 +3233,8 @@ class MyCLI(cmd.Cmd):
                 
 
     def _delete_test_module_package(self):
-        test_modules = self.get_test_modules()
         if not self.has_inline_args:
+            test_modules = self.get_test_modules()
             if len(test_modules) == 0:
                     print('No test modules available. \n')
                     return
@@ -3019,21 +3261,16 @@ class MyCLI(cmd.Cmd):
                     print(f"Test Module Package Name can not be None")
                     continue
 
-                found = False
-                for id, value in test_modules.items():
-                    if value.get("testModuleName", None) == test_module_name:
-                        found = True
-                        self.testModulePackageId = id
-
-                if not found:
+                self.testModulePackageId = self.find_catalog_id('test_modules', test_module_name)
+                if not self.testModulePackageId:
                     print(f"Test Module Package {test_module_name} does not exists.")
                     continue
 
                 self.delete_test_module_package(self.testModulePackageId)
 
     def _delete_security_tool(self):
-        tools = self.get_security_tool()
         if not self.has_inline_args:
+            tools = self.get_security_tool()
             if len(tools) == 0:
                     print('No security tools available. \n')
                     return
@@ -3068,9 +3305,8 @@ class MyCLI(cmd.Cmd):
                 self.delete_security_tool(self.securityToolPackageId)  
 
     def _delete_module(self): 
-        modules = self.get_modules()
-        # print(modules)
         if not self.has_inline_args:
+            modules = self.get_modules()
             if len(modules) == 0:
                     print('No modules available. \n')
                     return
@@ -3097,13 +3333,8 @@ class MyCLI(cmd.Cmd):
                     print(f"Module Name can not be None")
                     continue
 
-                found = False
-                for id, value in modules.items():
-                    if value.get("moduleName", None) == module_name:
-                        found = True
-                        self.moduleId = id
-
-                if not found:
+                self.moduleId = self.find_catalog_id('modules', module_name)
+                if not self.moduleId:
                     print(f"Module {module_name} does not exists.")
                     continue
 
@@ -3118,47 +3349,55 @@ class MyCLI(cmd.Cmd):
         file_name = selected_file.split("/")[-1]
         self.packageName = str(file_name)
         print(f"The test module package name is {self.packageName}")
-        
+        return self.memo.run(('test_module', file_identity(selected_file)), lambda: self._upload_new_test_module(selected_file))
+
+    def _upload_new_test_module(self, selected_file):
         packageId = self.upload_test_module()
-        status, resp_url = self.get_status_of_test_module(packageId)
         print("Getting status of test module package, please wait!")
-        module_state_iter = 0
-        while (status != "COMPLETED"):
-            time.sleep(2)
-            status, resp_url = self.get_status_of_test_module(packageId)
-            module_state_iter += 1
-            if status == "COMPLETED" or status == "ACTIVE" or status == "RUNNING" or status == "SUCCESSFUL":
-                break
-            if status == "FAILED":
-                print('Test module package upload failed! Please check the status of the test module.\n')
-                break
-            if module_state_iter == 60:
-                print('Test module package upload failed! Please check the status of the test module package.\n')
-                break
-        status, resp_url = self.get_status_of_test_module(packageId)
+        status, resp_url = self._wait_for_package_job(self.PACKAGE_UPLOAD_READY, "test module package", self.get_status_of_test_module, packageId)
         print('Uploading test module package, please wait!')
         
         self.upload_package_test_module_to_cloud_mp(resp_url, selected_file)
-        status, resp_url = self.get_status_of_test_module(packageId)
-        module_state_iter = 0
-        while (status != "COMPLETED"):
-            time.sleep(2)
-            status, resp_url = self.get_status_of_test_module(packageId)
-            module_state_iter += 1
-            if status == "COMPLETED" or status == "SUCCESSFUL":
-                print('Uploaded test module package successfully! \n')
-                break
-            if status == "FAILED":
-                print('Test module package upload failed! Please check the status of the test module.\n')
-                break
-            if module_state_iter == 60:
-                print('Test module package upload failed! Please check the status of the test module package.\n')
-                break
-        
-        time.sleep(20)
+        status, resp_url = self._wait_for_package_job(self.PACKAGE_UPLOAD_DONE, "test module package", self.get_status_of_test_module, packageId)
+        self._wait_until_listed('test_modules', packageId, status, 20)
         return packageId
     
+    def find_existing_application(self, application_name, application_version):
+        """
+        Returns:
+            str: The id of the application of the name and version in the marketplace,
+            or in the local marketplace, None when it has to be created.
+        """
+        if not application_name or not application_version:
+            return None
+        applicationid = self.find_catalog_id('applications', application_name, application_version)
+        if not applicationid:
+            applicationid = self._check_local_application_exists(application_name, application_version)
+        if applicationid:
+            print(f"Application {application_name} {application_version} already exists, skipping. "
+                  f"The application ID is {applicationid}")
+        return applicationid
+
+    def find_existing_module(self, module_name, module_version):
+        """
+        Returns:
+            str: The id of the module of the name and version, None when it has to be created.
+        """
+        if not module_name or not module_version:
+            return None
+        moduleId = self.find_catalog_id('modules', module_name, module_version)
+        if moduleId:
+            print(f"Module {module_name} {module_version} already exists, skipping. The module ID is {moduleId}")
+        return moduleId
+
     def _create_module(self):
+        if self.has_inline_args:
+            # a module that exists needs none of its applications or test modules resolved
+            moduleId = self.find_existing_module(self.operation_data.get("moduleName", None),
+                                                 self.operation_data.get("version", None))
+            if moduleId:
+                return moduleId
+
         if not self.has_inline_args:
             all_test_modules = []
             while True: 
@@ -3370,47 +3609,357 @@ class MyCLI(cmd.Cmd):
 
 
     def _delete_module_set(self):
-        self._delete_module()
-        time.sleep(5)
-        self._delete_application()
-        time.sleep(5)
-        self._delete_test_module_package()
-        time.sleep(5)
-        self._delete_app_package()
-        time.sleep(5)
-        self._delete_plugin_package()
-        time.sleep(5)
-        self._delete_category()
-        time.sleep(5)
-        self._delete_vertical()
-        time.sleep(5)
+        if self.has_inline_args:
+            return self.teardown(self._teardown_resources())
+
+        # every delete waits until the rows deleted before are gone, they reference each other
+        for delete in (self._delete_module, self._delete_application, self._delete_test_module_package,
+                       self._delete_app_package, self._delete_plugin_package, self._delete_category, self._delete_vertical):
+            delete()
+            self._wait_until_deleted(5)
+
+    def _teardown_resources(self):
+        """
+        Looks up the rows named by the *Details lists of the operation data.
+
+        Returns:
+            list: The (kind, id) of every row found, see TEARDOWN_KINDS.
+        """
+        wanted = []
+        for kind, (details_key, name_field, delete_method) in self.TEARDOWN_KINDS.items():
+            for detail in self.operation_data.get(details_key, []):
+                name = detail.get(name_field, None)
+                if not name:
+                    print(f"{name_field} can not be None")
+                    continue
+                wanted.append((kind, name, detail.get("version", None)))
+
+        with ThreadPoolExecutor(max_workers=max(1, self.plan_workers)) as executor:
+            row_ids = list(executor.map(lambda item: self.find_catalog_id(*item), wanted))
+
+        resources = []
+        for (kind, name, version), row_id in zip(wanted, row_ids):
+            if not row_id:
+                print(f"No {kind.replace('_', ' ')} named {name} exists, skipping it.")
+            elif (kind, row_id) not in resources:
+                resources.append((kind, row_id))
+        return resources
+
+    def teardown(self, resources):
+        """
+        Deletes rows in the order their references require: a row is deleted once
+        no other row of the list that references it is left. The rows of one tier
+        are deleted concurrently, and every tier is confirmed by polling until the
+        rows are gone.
+
+        Args:
+            resources (list): The (kind, id) of the rows, kind as in TEARDOWN_KINDS.
 
+        Returns:
+            list: The tiers that were deleted, each a list of (kind, id).
+        """
+        tiers = self._teardown_tiers(resources)
+        executor = ThreadPoolExecutor(max_workers=max(1, self.plan_workers))
+        try:
+            for number, tier in enumerate(tiers):
+                print(f"Deleting {len(tier)} resources of tier {number + 1}/{len(tiers)}: "
+                      + ", ".join(f"{kind} {row_id}" for kind, row_id in tier))
+                futures = [executor.submit(getattr(self, self.TEARDOWN_KINDS[kind][2]), row_id) for kind, row_id in tier]
+                for future in futures:
+                    future.result()
+                self._wait_until_deleted(5)
+        finally:
+            # a failed delete exits the CLI, the queued ones must not start anymore
+            executor.shutdown(cancel_futures=True)
+        return tiers
+
+    def _teardown_tiers(self, resources):
+        """
+        Returns:
+            list: The resources grouped into tiers, a tier only references rows of later tiers.
+        """
+        by_kind = {}
+        for kind, row_id in resources:
+            by_kind.setdefault(kind, []).append((kind, row_id))
+
+        referencing = [resource for resource in resources
+                       if any(ref_kind in by_kind for ref_kind in self.TEARDOWN_REFERENCES.get(resource[0], {}))]
+        with ThreadPoolExecutor(max_workers=max(1, self.plan_workers)) as executor:
+            rows = dict(zip(referencing, executor.map(lambda resource: self._listed_row(*resource), referencing)))
+
+        references = {}
+        for resource in resources:
+            references[resource] = set()
+            row = rows.get(resource) or {}
+            for ref_kind, field in self.TEARDOWN_REFERENCES.get(resource[0], {}).items():
+                candidates = by_kind.get(ref_kind, [])
+                value = row.get(field)
+                if value is None:
+                    # without the reference field the row may reference any row of the kind
+                    references[resource].update(candidates)
+                    continue
+                ids = value if isinstance(value, list) else [value]
+                ids = set(item.get("id") if isinstance(item, dict) else item for item in ids)
+                references[resource].update(candidate for candidate in candidates if candidate[1] in ids)
+
+        tiers = []
+        remaining = list(resources)
+        while remaining:
+            referenced = set()
+            for resource in remaining:
+                referenced.update(references[resource])
+            tier = [resource for resource in remaining if resource not in referenced]
+            if not tier:
+                # rows referencing each other can only be deleted together
+                tier = remaining
+            tiers.append(tier)
+            remaining = [resource for resource in remaining if resource not in tier]
+        return tiers
+
+    def _listed_row(self, kind, row_id):
+        """
+        Returns:
+            dict: The raw listing row of the id, None if it is not listed.
+        """
+        iter_entries = getattr(self, self.CATALOG_LISTINGS[kind][0])
+        for (entry_id, info), row in iter_entries({"id": row_id}, prefetch_pages=0, with_rows=True):
+            if entry_id == row_id:
+                return row
+        return None
 
     def _get_vertical(self):
-        self.get_vertical()
+        self.get_vertical(collect=False)
     
     def _get_category(self): 
-        self.get_category()  
+        self.get_category(collect=False)  
 
     def _get_app_package(self): 
-        self.get_app_package()
+        self.get_app_package(collect=False)
 
     def _get_applications(self): 
-        self.get_applications()
+        self.get_applications(collect=False)
 
     def _get_test_modules(self): 
-        self.get_test_modules()
+        self.get_test_modules(collect=False)
 
     def _get_modules(self): 
-        self.get_modules() 
+        self.get_modules(collect=False) 
 
     def _get_plugin_package(self):
-        self.get_plugin_package()  
+        self.get_plugin_package(collect=False)  
     
     def _get_security_tool(self):
-        self.get_security_tool()
+        self.get_security_tool(collect=False)
+
+    def _fork(self, operation_data):
+        """
+        Returns:
+            MyCLI: A copy of the CLI for one action of a plan. It shares the session,
+            caches and poller, but keeps its own operation data and selections.
+        """
+        worker = copy.copy(self)
+        worker.has_inline_args = True
+        worker.operation_data = operation_data
+        worker.module_data = operation_data
+        return worker
+
+    def plan_operations(self, operation, manifests):
+        """
+        Turns operation manifests into one plan of marketplace actions, see OperationPlan.
+
+        Args:
+            operation (str): One of PLAN_OPERATIONS.
+            manifests (list): The operation data of every manifest.
+
+        Returns:
+            OperationPlan: The plan, not run yet.
+        """
+        plan = OperationPlan()
+        for manifest in manifests:
+            if operation == 'create_application':
+                self._plan_create_application(plan, manifest)
+            else:
+                self._plan_create_module(plan, manifest)
+        return plan
+
+    def run_plan(self, operation, manifests):
+        """
+        Runs the manifests of an operation as a plan, planWorkers actions at a
+        time, and prints the timing of every action.
+
+        Returns:
+            bool: True if every action succeeded.
+        """
+        if operation not in self.PLAN_OPERATIONS:
+            print(f"Error: Operation '{operation}' can not be planned! Supported operations are {self.PLAN_OPERATIONS}")
+            sys.exit(1)
+        plan = self.plan_operations(operation, manifests)
+        succeeded = plan.run(self.plan_workers)
+        plan.print_report()
+        return succeeded
+
+    def _plan_vertical(self, plan, manifest):
+        verticalName = manifest.get('verticalRefDetails', {}).get('verticalName', None)
+        if not verticalName:
+            print(f"Vertical Name should not be None.")
+            sys.exit(1)
+        return plan.add(('vertical', verticalName), f"vertical {verticalName}",
+                        lambda values: self._fork(manifest)._fetch_vertical_id())
+
+    def _plan_category(self, plan, manifest, vertical_key):
+        categoryName = manifest.get('categoryRefDetails', {}).get('categoryName', None)
+        if not categoryName:
+            print(f"Category Name should not be None.")
+            sys.exit(1)
+
+        def add_category(values):
+            worker = self._fork(manifest)
+            # the category is looked up in and added to the vertical of the plan
+            worker.verticalid = values[vertical_key]
+            return worker._fetch_category_id()
+
+        return plan.add(('category', vertical_key, categoryName), f"category {categoryName}", add_category, [vertical_key])
+
+    def _plan_plugin_packages(self, plan, manifest):
+        plugin_keys = []
+        for detail in manifest.get('pluginPackageRefDetails', []):
+            plugin_name = detail.get('pluginPackageName', None)
+            if detail.get('useExisting', False):
+                def find_plugin(values, plugin_name=plugin_name):
+                    plugin_id = self._get_existing_plugin_id(plugin_name)
+                    if not plugin_id:
+                        print(f"Plugin Package {plugin_name} does not exists.")
+                    return plugin_id
+                plugin_keys.append(plan.add(('plugin_package', plugin_name), f"plugin package {plugin_name}", find_plugin))
+                continue
+
+            # every file is validated before the first action starts
+            self.file_path = detail.get('file_path', None)
+            selected_file = self.select_listed_files_with_extension(".rp")
+            file_name = os.path.basename(selected_file)
+
+            def upload_plugin(values, selected_file=selected_file, file_name=file_name):
+                return self._fork(manifest)._upload_package_file("plugin package", selected_file, 'plugin', file_name)
+
+            plugin_keys.append(plan.add(('plugin_package', os.path.abspath(selected_file)),
+                                        f"plugin package {file_name}", upload_plugin))
+        return plugin_keys
+
+    def _plan_app_package(self, plan, manifest):
+        details = manifest.get('appPackageRefDetails', {})
+        appName, version = details.get('appName', None), details.get('version', None)
+        if not appName:
+            print(f"App Name should not be None.")
+            sys.exit(1)
+        if not details.get('useExisting', False) and not os.path.exists(details.get('file_path', None) or ''):
+            print("File doesn't exist.")
+            sys.exit(1)
+        return plan.add(('app_package', appName, version), f"app package {appName} {version}",
+                        lambda values: self._fork(manifest)._fetch_app_package_id())
+
+    def _plan_create_application(self, plan, manifest):
+        """
+        Adds the actions of a create_application manifest: the vertical, category,
+        plugin packages and app package are independent of each other, only the
+        application waits for them.
+
+        Returns:
+            The key of the application action.
+        """
+        self._fork(manifest)._read_application_details()
+        applicationName, version = manifest.get('applicationName'), manifest.get('version')
+        existing_id = self.find_existing_application(applicationName, version)
+        if existing_id:
+            return plan.add(('application', applicationName, version), f"application {applicationName} {version}",
+                            lambda values: existing_id)
+
+        vertical_key = self._plan_vertical(plan, manifest)
+        category_key = self._plan_category(plan, manifest, vertical_key)
+        plugin_keys = self._plan_plugin_packages(plan, manifest)
+        app_package_key = self._plan_app_package(plan, manifest)
+
+        def create_application(values):
+            worker = self._fork(manifest)
+            worker.verticalid = values[vertical_key]
+            worker.categoryid = values[category_key]
+            worker.appPackageId = values[app_package_key]
+            worker._read_application_details()
+            return worker._create_application_with_plugins([values[key] for key in plugin_keys])
+
+        return plan.add(('application', applicationName, version), f"application {applicationName} {version}",
+                        create_application, [vertical_key, category_key] + plugin_keys + [app_package_key])
+
+    def _plan_create_module(self, plan, manifest):
+        """
+        Adds the actions of a create_module manifest: its test modules, the
+        applications with all their actions and the vertical, then the module
+        waiting for them.
+
+        Returns:
+            The key of the module action.
+        """
+        moduleName, version = manifest.get('moduleName'), manifest.get('version')
+        existing_id = self.find_existing_module(moduleName, version)
+        if existing_id:
+            return plan.add(('module', moduleName, version), f"module {moduleName} {version}", lambda values: existing_id)
+
+        test_module_keys = []
+        for detail in manifest.get('testModuleRefDetails', []):
+            test_module_name = detail.get('testModuleName', None)
+            if detail.get('useExisting', False):
+                def find_test_module(values, test_module_name=test_module_name):
+                    test_module_id = self._get_existing_test_module_id(test_module_name)
+                    if not test_module_id:
+                        print(f"Test Module {test_module_name} does not exists.")
+                    return test_module_id
+                test_module_keys.append(plan.add(('test_module', test_module_name), f"test module {test_module_name}",
+                                                 find_test_module))
+                continue
+
+            self.file_path = detail.get('file_path', None)
+            selected_file = self.select_listed_files_with_extension(".rtm")
+
+            def upload_test_module(values, detail=detail):
+                worker = self._fork(manifest)
+                worker.file_path = detail.get('file_path', None)
+                return worker._upload_test_module()
+
+            test_module_keys.append(plan.add(('test_module', os.path.abspath(selected_file)),
+                                             f"test module {os.path.basename(selected_file)}", upload_test_module))
+
+        application_keys = []
+        for detail in manifest.get('applicatonRefDetails', []):
+            application_name = detail.get('applicationName', None)
+            if detail.get('useExisting', False):
+                def find_application(values, application_name=application_name):
+                    application_id = self._get_existing_application_id(application_name)
+                    if not application_id:
+                        print(f"Application {application_name} does not exists.")
+                    return application_id
+                application_keys.append(plan.add(('application', application_name), f"application {application_name}",
+                                                 find_application))
+            else:
+                application_keys.append(self._plan_create_application(plan, detail))
+
+        vertical_key = self._plan_vertical(plan, manifest)
+
+        def create_module(values):
+            worker = self._fork(manifest)
+            worker.verticalid = values[vertical_key]
+            worker.moduleName = manifest.get("moduleName", None)
+            worker.version = manifest.get("version", None)
+            worker.description = manifest.get("description", None)
+            return worker.create_module([values[key] for key in test_module_keys],
+                                        [values[key] for key in application_keys])
+
+        return plan.add(('module', moduleName, version), f"module {moduleName} {version}", create_module,
+                        test_module_keys + application_keys + [vertical_key])
 
     def call_function(self, function_name):
+        with span(function_name, "operation"):
+            return self._call_function(function_name)
+
+    def _call_function(self, function_name):
         self.function_name = function_name
 
         if self.function_name not in self.SUPPORTED_OPERATION:
@@ -3588,15 +4137,41 @@ class MyCLI(cmd.Cmd):
                 print('Invalid input! Please try again.')        
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cloud Market Place CLI")
+    parser.add_argument('operation', nargs='?', help="operation to run with the data of operations/<operation>.json")
+    parser.add_argument('--refresh-catalog', action='store_true',
+                        help="ignore the catalog TTL and fetch the listings of the local catalog store again")
+    parser.add_argument('--force-upload', action='store_true',
+                        help="upload packages even when the upload ledger knows the same file content")
+    parser.add_argument('--plan', action='store_true',
+                        help="run create_application or create_module as a plan of concurrent actions with a timing report")
+    parser.add_argument('--manifest', action='append', default=[],
+                        help="operation data file of a planned operation, can be repeated; defaults to operations/<operation>.json")
+    parser.add_argument('--metrics-json', metavar='PATH',
+                        help="write the request latencies per endpoint and the time spent sleeping to a JSON file at exit")
+    args = parser.parse_args()
+
     mycli = MyCLI()
     mycli.fetch_config()
-    if len(sys.argv) < 2:
+    mycli.refresh_catalog = args.refresh_catalog
+    mycli.force_upload = args.force_upload
+    mycli.metrics_json = args.metrics_json
+    atexit.register(mycli.print_connection_stats)
+    atexit.register(mycli.print_metrics)
+    atexit.register(mycli.poller.print_timings)
+    atexit.register(mycli.memo.print_stats)
+    if not args.operation:
         mycli.cmdloop()
     else:
-        inline_argument = sys.argv[1]
+        inline_argument = args.operation
         if inline_argument not in MyCLI.SUPPORTED_OPERATION:
             print(f"Error: Operation '{inline_argument}' is not supported! Please try again.")
             sys.exit(1)
 
-        mycli.fetch_data(inline_argument)
-        mycli.call_function(inline_argument)
+        if args.plan:
+            manifests = [mycli.fetch_data(inline_argument, filename) for filename in args.manifest or [None]]
+            if not mycli.run_plan(inline_argument, manifests):
+                sys.exit(1)
+        else:
+            mycli.fetch_data(inline_argument)
+            mycli.call_function(inline_argument)
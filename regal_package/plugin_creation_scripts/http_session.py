@@ -0,0 +1,149 @@
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that keeps a bounded pool of keep-alive connections per host
+    and keeps track of how many requests were served over an already open
+    connection. With metrics every request sent through it is recorded.
+    """
+
+    def __init__(self, pool_size, metrics=None):
+        self.pool_size = pool_size
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._disposed_requests = 0
+        self._disposed_connections = 0
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        # keep the counters of pools that get evicted from the pool manager
+        self.poolmanager.pools.dispose_func = self._dispose_pool
+
+    def send(self, request, **kwargs):
+        if self.metrics is None:
+            return super().send(request, **kwargs)
+        start = time.monotonic()
+        try:
+            response = super().send(request, **kwargs)
+            latency = time.monotonic() - start
+            received = _received_size(response, kwargs.get('stream', False))
+        except Exception:
+            self.metrics.record(request.method, request.url, "error", _body_size(request), 0, time.monotonic() - start)
+            raise
+        self.metrics.record(request.method, request.url, response.status_code, _body_size(request), received, latency)
+        return response
+
+    def _dispose_pool(self, pool):
+        with self._lock:
+            self._disposed_requests += pool.num_requests
+            self._disposed_connections += pool.num_connections
+        pool.close()
+
+    def connection_stats(self):
+        """
+        Returns:
+            tuple: (requests sent, connections opened, connections reused)
+        """
+        with self._lock:
+            requests_sent = self._disposed_requests
+            connections_opened = self._disposed_connections
+
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                requests_sent += pool.num_requests
+                connections_opened += pool.num_connections
+
+        return requests_sent, connections_opened, max(requests_sent - connections_opened, 0)
+
+
+def _body_size(request):
+    length = request.headers.get('Content-Length')
+    if length is not None:
+        return int(length)
+    try:
+        return len(request.body or b'')
+    except TypeError:
+        return 0
+
+
+def _received_size(response, stream):
+    # chunked responses carry no Content-Length, the body is read here as
+    # Session.send would right after, a streamed body only has the header
+    if stream:
+        return int(response.headers.get('Content-Length') or 0)
+    return len(response.content)
+
+
+def create_session(pool_size, metrics=None):
+    """
+    Creates a requests session whose http and https connections are served from
+    one shared keep-alive pool of `pool_size` connections per host. The requests
+    are recorded with metrics, a RequestMetrics, when given.
+
+    Returns:
+        tuple: (session, adapter)
+    """
+    session = requests.Session()
+    adapter = PooledHTTPAdapter(pool_size, metrics)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session, adapter
+
+
+class ConditionalCache:
+    """
+    Keeps the validators (ETag, Last-Modified) and decoded body of responses, so
+    that asking for the same resource again can be a conditional request and a
+    304 Not Modified is answered from here. Only responses with a validator are
+    kept, the oldest entries are dropped beyond max_entries.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def headers(self, key):
+        """
+        Returns:
+            dict: The If-None-Match / If-Modified-Since headers for the resource, empty if unknown.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return {}
+        etag, last_modified, body = entry
+        if etag:
+            return {'If-None-Match': etag}
+        return {'If-Modified-Since': last_modified}
+
+    def store(self, key, response, body):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        with self._lock:
+            if not etag and not last_modified:
+                self._entries.pop(key, None)
+                return
+            self._entries.pop(key, None)
+            self._entries[key] = (etag, last_modified, body)
+            while len(self._entries) > self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+
+    def not_modified(self, key):
+        """
+        Returns:
+            The body kept for the resource after a 304 response, None if it is gone.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+        return entry[2] if entry is not None else None
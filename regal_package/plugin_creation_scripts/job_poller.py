@@ -0,0 +1,319 @@
+import time
+import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from trace_spans import span
+
+
+class JobPolicy:
+    """
+    Declares how a job type is polled: which states end the job successfully,
+    which end it with a failure and which mean the job is still running.
+
+    When transient_states is None every state that is not terminal keeps the job
+    running, otherwise an undeclared state (e.g. the job vanished) fails it.
+    Errors listed in retry_errors are retried until the deadline instead of
+    aborting the poll.
+    """
+
+    def __init__(self, name, success_states, failure_states=(), transient_states=None, timeout=600,
+                 initial_delay=1, max_delay=15, multiplier=2, jitter=0.2, retry_errors=()):
+        self.name = name
+        self.success_states = set(success_states)
+        self.failure_states = set(failure_states)
+        self.transient_states = set(transient_states) if transient_states is not None else None
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retry_errors = tuple(retry_errors)
+
+    def outcome(self, state):
+        if state in self.success_states:
+            return JobPoller.SUCCESS
+        if state in self.failure_states:
+            return JobPoller.FAILED
+        if self.transient_states is None or state in self.transient_states:
+            return None
+        return JobPoller.FAILED
+
+
+class JobResult:
+
+    def __init__(self, outcome, state, value, elapsed, polls):
+        self.outcome = outcome
+        self.state = state
+        self.value = value
+        self.elapsed = elapsed
+        self.polls = polls
+
+    @property
+    def succeeded(self):
+        return self.outcome == JobPoller.SUCCESS
+
+
+class JobPoller:
+    """
+    Polls jobs with exponential backoff and jitter until they reach a terminal
+    state or their deadline passes, and keeps the time to completion of every
+    polled job.
+    """
+    SUCCESS = "success"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+
+    def __init__(self, sleep=time.sleep):
+        self.sleep = sleep
+        self.timings = []
+        self._lock = threading.Lock()
+
+    def _delays(self, policy):
+        delay = policy.initial_delay
+        while True:
+            yield delay * random.uniform(1 - policy.jitter, 1 + policy.jitter)
+            delay = min(delay * policy.multiplier, policy.max_delay)
+
+    def poll(self, policy, job_id, check):
+        """
+        Calls check() until the state it reports is terminal for the policy.
+
+        Args:
+            policy (JobPolicy): The job type.
+            job_id (str): Identifies the job in the timing report.
+            check (callable): Returns a (state, value) tuple for the current job state.
+
+        Returns:
+            JobResult: The outcome with the last state and value reported by check().
+
+        Raises:
+            Exception: The last error from check() when it kept failing with one of
+            the policy's retry_errors until the deadline.
+        """
+        with span(f"wait {policy.name}", "poll", job=job_id) as args:
+            result = self._poll(policy, job_id, check)
+            args.update(outcome=result.outcome, state=result.state, polls=result.polls)
+            return result
+
+    def _poll(self, policy, job_id, check):
+        start_time = time.monotonic()
+        deadline = start_time + policy.timeout
+        delays = self._delays(policy)
+        state, value = None, None
+        polls = 0
+
+        while True:
+            polls += 1
+            try:
+                state, value = check()
+                error = None
+            except policy.retry_errors as err:
+                error = err
+
+            outcome = policy.outcome(state) if error is None else None
+            remaining = deadline - time.monotonic()
+            if outcome is None and remaining <= 0:
+                if error is not None:
+                    self._record(policy, job_id, self.TIMEOUT, state, start_time, polls)
+                    raise error
+                outcome = self.TIMEOUT
+            if outcome is not None:
+                elapsed = self._record(policy, job_id, outcome, state, start_time, polls)
+                return JobResult(outcome, state, value, elapsed, polls)
+
+            self.sleep(min(next(delays), remaining))
+
+    def retry(self, policy, func):
+        """
+        Calls func() until it no longer raises one of the policy's retry_errors.
+
+        Returns:
+            The return value of func().
+        """
+        deadline = time.monotonic() + policy.timeout
+        delays = self._delays(policy)
+        while True:
+            try:
+                return func()
+            except policy.retry_errors:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise
+                self.sleep(min(next(delays), remaining))
+
+    def _record(self, policy, job_id, outcome, state, start_time, polls):
+        elapsed = time.monotonic() - start_time
+        with self._lock:
+            self.timings.append((policy.name, job_id, outcome, state, elapsed, polls))
+        return elapsed
+
+    def print_timings(self):
+        with self._lock:
+            timings = list(self.timings)
+        if not timings:
+            return
+        print("Job completion times:")
+        for name, job_id, outcome, state, elapsed, polls in timings:
+            print(f"  {name} {job_id}: {outcome} ({state}) in {elapsed:.1f}s after {polls} polls")
+
+
+class WatchedJob:
+
+    def __init__(self, policy, job_id, source, fetch, batched, delays, check=None):
+        self.policy = policy
+        self.job_id = job_id
+        self.source = source
+        self.fetch = fetch
+        self.check = check or (lambda states: states.get(job_id, (None, None)))
+        self.batched = batched
+        self.delays = delays
+        self.start_time = time.monotonic()
+        self.deadline = self.start_time + policy.timeout
+        self.next_at = self.start_time
+        self.state = None
+        self.value = None
+        self.polls = 0
+        self.future = Future()
+
+
+class JobWatcher:
+    """
+    Polls the jobs of many waiters from one thread on a shared schedule.
+
+    Jobs are grouped by source. Every job keeps the backoff and deadline of its
+    policy, and the jobs of a source that are due together are fetched with one
+    call. The fetch of a batched source reports all its jobs at once, e.g. one
+    listing with the operationState of every application, so all pending jobs of
+    the source are checked whenever one of them is due. The jobs of a source
+    share its fetch, a job can pick its state from the fetched result with its
+    own check. watch() returns a Future that resolves to the JobResult once the
+    job is terminal; the timings are recorded with the JobPoller.
+
+    The fetches run on up to `workers` threads, so a slow or retrying fetch of
+    one source only delays the jobs of that source. A source is not fetched
+    again while its previous fetch is running.
+    """
+
+    def __init__(self, poller, workers=4):
+        self.poller = poller
+        self.workers = workers
+        self.idle_seconds = 0.0
+        self._jobs = []
+        self._fetching = set()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._executor = None
+
+    def watch(self, policy, job_id, source, fetch, batched=False, check=None):
+        """
+        Args:
+            policy (JobPolicy): The job type.
+            job_id (str): The job.
+            source: Jobs of the same source are fetched together.
+            fetch (callable): Called with a list of job ids, returns {job_id: (state, value)}.
+                A job left out has the state None.
+            batched (bool): One fetch reports every job of the source.
+            check (callable): Returns the (state, value) of the job from the result of
+                fetch, instead of looking up the job id in it.
+
+        Returns:
+            Future: Resolves to the JobResult, or raises the error of the fetch.
+        """
+        job = WatchedJob(policy, job_id, source, fetch, batched, self.poller._delays(policy), check)
+        with self._condition:
+            self._jobs.append(job)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="job-watcher", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return job.future
+
+    def wait(self, policy, job_id, source, fetch, batched=False, check=None):
+        with span(f"wait {policy.name}", "poll", job=job_id, watched=True) as args:
+            result = self.watch(policy, job_id, source, fetch, batched, check).result()
+            args.update(outcome=result.outcome, state=result.state, polls=result.polls)
+            return result
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._jobs:
+                    self._thread = None
+                    return
+                now = time.monotonic()
+                waiting = [job for job in self._jobs if job.source not in self._fetching]
+                next_at = min((job.next_at for job in waiting), default=None)
+                if next_at is None or next_at > now:
+                    # woken up early by a new job or a finished fetch
+                    idle = not self._fetching
+                    self._condition.wait(next_at - now if next_at is not None else None)
+                    if idle:
+                        self.idle_seconds += time.monotonic() - now
+                    continue
+                sources = {}
+                for job in waiting:
+                    if job.next_at <= now or job.batched:
+                        sources.setdefault(job.source, []).append(job)
+
+                polls = []
+                for source, jobs in sources.items():
+                    due = [job for job in jobs if job.next_at <= now]
+                    if due:
+                        self._fetching.add(source)
+                        polls.append((source, jobs if due[0].batched else due))
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job-fetch")
+
+            for source, jobs in polls:
+                self._executor.submit(self._poll_source, source, jobs)
+
+    def _poll_source(self, source, jobs):
+        try:
+            self._poll(jobs)
+        finally:
+            with self._condition:
+                self._fetching.discard(source)
+                self._condition.notify()
+
+    def _poll(self, jobs):
+        job_ids = list(dict.fromkeys(job.job_id for job in jobs))
+        try:
+            states, error = jobs[0].fetch(job_ids), None
+        except BaseException as err:
+            # the CLI exits on request errors, the waiter gets the exit instead of this thread
+            states, error = {}, err
+
+        now = time.monotonic()
+        for job in jobs:
+            job.polls += 1
+            if error is not None and not isinstance(error, job.policy.retry_errors):
+                self._finish(job)
+                job.future.set_exception(error)
+                continue
+            outcome = None
+            if error is None:
+                try:
+                    job.state, job.value = job.check(states or {})
+                except Exception as err:
+                    self._finish(job)
+                    job.future.set_exception(err)
+                    continue
+                outcome = job.policy.outcome(job.state)
+            remaining = job.deadline - now
+            if outcome is None and remaining <= 0:
+                if error is not None:
+                    self._finish(job)
+                    self.poller._record(job.policy, job.job_id, JobPoller.TIMEOUT, job.state, job.start_time, job.polls)
+                    job.future.set_exception(error)
+                    continue
+                outcome = JobPoller.TIMEOUT
+            if outcome is not None:
+                self._finish(job)
+                elapsed = self.poller._record(job.policy, job.job_id, outcome, job.state, job.start_time, job.polls)
+                job.future.set_result(JobResult(outcome, job.state, job.value, elapsed, job.polls))
+            else:
+                job.next_at = now + min(next(job.delays), remaining)
+
+    def _finish(self, job):
+        with self._condition:
+            self._jobs.remove(job)
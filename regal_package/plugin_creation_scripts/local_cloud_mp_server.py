@@ -0,0 +1,772 @@
+"""
+Local stand-in for the Cloud MP and Regal API endpoints the CLI uses, for
+testing and benchmarking the CLI on an isolated machine. Point the CLI at it
+with CLOUD_MP_URL=http://127.0.0.1:<port> and REGAL_API_URL=http://127.0.0.1:<port>,
+one server answers both.
+
+Implements:
+  - the package jobs of /cloudMarketPlace/upload/package and the older per type
+    upload endpoints, both upload protocols of the returned upload URL (a single
+    multipart POST and the chunked PUT protocol of chunked_upload.ChunkedUploader)
+  - the DataTable listings of verticals, categories, packages, applications and
+    modules, with filterMap, sortMap, paging and ETags
+  - vertical and category creation, createApplication and createModule jobs,
+    deletes that are refused while a resource is referenced, enable/disable
+  - the Keycloak token endpoint, and the local marketplace applications table
+    and its install, uninstall and update actions, which require its tokens
+
+The latency of every request, the duration of each job type, the rate of failed
+requests and jobs and the size of the preloaded catalog are configurable:
+
+    python local_cloud_mp_server.py --latency 0.05 --job-seconds application=3 --error-rate 0.01 --catalog-size 2000
+"""
+import os
+import re
+import json
+import time
+import uuid
+import heapq
+import random
+import hashlib
+import argparse
+import threading
+from urllib.parse import parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# uploadPackageType: (DataTable listing, name field)
+PACKAGE_LISTINGS = {
+    "plugin": ("getPluginUploadMetaData", "pluginName"),
+    "repoApp": ("getRepoAppUploadMetaData", "appName"),
+    "testModule": ("getTestModuleUploadMetaData", "testModuleName"),
+    "vulnScanTool": ("getSecurityToolUploadMetaData", "toolName")
+}
+# older upload endpoints: uploadPackageType, id field of the response
+TYPED_UPLOADS = {
+    "pluginPackage": ("plugin", "pluginPackageId"),
+    "appPackage": ("repoApp", "appPackageId"),
+    "testModulePackage": ("testModule", "testModulePackageId")
+}
+# DELETE paths: listing
+DELETES = {
+    r"/cloudMarketPlace/vertical/delete/(\w+)": "getVerticalDataTable",
+    r"/cloudMarketPlace/category/delete/(\w+)": "getCategoryDataTable",
+    r"/cloudMarketPlace/application/(\w+)": "getAppsGroupMetaData",
+    r"/cloudMarketPlace/module/(\w+)": "getModulesGroupMetaData",
+    r"/cloudMarketPlace/pluginPackage/(\w+)": "getPluginUploadMetaData",
+    r"/cloudMPApiServer/appPackage/(\w+)": "getRepoAppUploadMetaData",
+    r"/cloudMarketPlace/testModulePackage/(\w+)": "getTestModuleUploadMetaData",
+    r"/cloudMarketPlace/securityToolPackage/(\w+)": "getSecurityToolUploadMetaData"
+}
+# row fields that reference rows of other listings, a referenced row can not be deleted
+REFERENCES = {
+    "getCategoryDataTable": {"verticalId": "getVerticalDataTable"},
+    "getAppsGroupMetaData": {"verticalId": "getVerticalDataTable", "categoryId": "getCategoryDataTable",
+                             "plugins": "getPluginUploadMetaData", "appPackageId": "getRepoAppUploadMetaData"},
+    "getModulesGroupMetaData": {"verticalId": "getVerticalDataTable", "applications": "getAppsGroupMetaData",
+                                "testModules": "getTestModuleUploadMetaData"}
+}
+LISTINGS = ["getVerticalDataTable", "getCategoryDataTable", "getAppsGroupMetaData", "getModulesGroupMetaData"] + \
+    [listing for listing, name_field in PACKAGE_LISTINGS.values()]
+LOCAL_APPS = "localApps"
+
+# seconds each job type takes unless configured
+DEFAULT_JOB_SECONDS = {
+    "package": 0.0,  # processing of an uploaded package
+    "application": 1.0,  # createApplication
+    "module": 1.0,  # createModule
+    "sync": 1.0,  # a created application shows up in the local marketplace
+    "install": 2.0,
+    "uninstall": 1.0,
+    "update": 2.0
+}
+ACTION_STATES = {"install": "INSTALLING", "uninstall": "UNINSTALLING", "update": "UPDATING"}
+
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+PACKAGE_EXTENSION = re.compile(r"(\.tar\.gz|\.tgz|\.rp|\.rtm|\.zip)$")
+
+
+class CloudMPState:
+    """
+    The marketplace tables, package jobs and issued tokens, and the pending
+    transitions of the running jobs, applied when a request comes in after they
+    are due.
+    """
+
+    def __init__(self, storage_dir, drop_chunks=(), stream_bandwidth=None, latency=0.0, latency_jitter=0.0,
+                 error_rate=0.0, job_failure_rate=0.0, job_seconds=None, catalog_size=0, max_page_size=None,
+                 token_ttl=300, seed=None):
+        self.storage_dir = storage_dir
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.tables = {listing: {} for listing in LISTINGS + [LOCAL_APPS]}
+        self.tokens = {}
+        self._events = []
+        self._event_count = 0
+        self._updated_at = 0
+        self._due = None
+        # byte offsets of the chunks whose first PUT is dropped without a response
+        self.drop_chunks = set(drop_chunks)
+        # bytes per second a single upload request is read with, emulates a per-stream cap of the network
+        self.stream_bandwidth = stream_bandwidth
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        # fraction of the requests answered with a 503, and of the jobs that end failed
+        self.error_rate = error_rate
+        self.job_failure_rate = job_failure_rate
+        self.job_seconds = dict(DEFAULT_JOB_SECONDS, **(job_seconds or {}))
+        # larger pages are cut to this many rows, like the marketplace does
+        self.max_page_size = max_page_size
+        self.token_ttl = token_ttl
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        os.makedirs(storage_dir, exist_ok=True)
+        self.preload(catalog_size)
+
+    def chance(self, rate):
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def delay(self):
+        if not self.latency and not self.latency_jitter:
+            return 0.0
+        with self.lock:
+            return max(self.latency + self.random.uniform(-self.latency_jitter, self.latency_jitter), 0.0)
+
+    def schedule(self, seconds, callback):
+        """
+        Runs callback(), under the lock, on the first request after `seconds`. A
+        transition scheduled by another one counts from when that one was due, so
+        chained jobs take their configured time however requests arrive.
+        """
+        self._event_count += 1
+        start = self._due if self._due is not None else time.monotonic()
+        heapq.heappush(self._events, (start + seconds, self._event_count, callback))
+
+    def advance(self):
+        with self.lock:
+            now = time.monotonic()
+            try:
+                while self._events and self._events[0][0] <= now:
+                    self._due, count, callback = heapq.heappop(self._events)
+                    callback()
+            finally:
+                self._due = None
+
+    def add_row(self, listing, row):
+        row.setdefault("id", uuid.uuid4().hex)
+        self.touch(row)
+        self.tables[listing][row["id"]] = row
+        return row["id"]
+
+    def touch(self, row):
+        # a strictly increasing timestamp in ms, rows changed in the same millisecond still sort apart
+        self._updated_at = max(int(time.time() * 1000), self._updated_at + 1)
+        row["updatedAt"] = self._updated_at
+
+    def references(self, listing, row_id):
+        """
+        Returns:
+            list: The listings and ids of the rows referencing the row.
+        """
+        found = []
+        for other, fields in REFERENCES.items():
+            for field, target in fields.items():
+                if target != listing:
+                    continue
+                for row in self.tables[other].values():
+                    value = row.get(field)
+                    if value == row_id or (isinstance(value, list) and row_id in value):
+                        found.append((other, row["id"]))
+        return found
+
+    def preload(self, size):
+        """
+        Fills every listing with `size` rows, e.g. to benchmark the CLI against a large catalog.
+        """
+        if not size:
+            return
+        with self.lock:
+            for index in range(size):
+                suffix = f"{index:05d}"
+                vertical_id = self.add_row("getVerticalDataTable", {"verticalName": f"bench-vertical-{suffix}"})
+                category_id = self.add_row("getCategoryDataTable", {"categoryName": f"bench-category-{suffix}",
+                                                                    "verticalId": vertical_id})
+                package_ids = {}
+                for package_type, (listing, name_field) in PACKAGE_LISTINGS.items():
+                    package_ids[package_type] = self.add_row(listing, {name_field: f"bench-{package_type.lower()}-{suffix}",
+                                                                       "version": "1.0.0"})
+                application_id = self.add_row("getAppsGroupMetaData", {
+                    "applicationName": f"bench-application-{suffix}", "version": "1.0.0", "operationState": "success",
+                    "verticalId": vertical_id, "categoryId": category_id, "plugins": [package_ids["plugin"]],
+                    "appPackageId": package_ids["repoApp"], "enabled": True})
+                self.add_row("getModulesGroupMetaData", {
+                    "moduleName": f"bench-module-{suffix}", "version": "1.0.0", "operationState": "success",
+                    "verticalId": vertical_id, "applications": [application_id],
+                    "testModules": [package_ids["testModule"]], "enabled": True})
+                self.add_row(LOCAL_APPS, {"id": application_id, "appId": application_id,
+                                          "appName": f"bench-application-{suffix}", "appVersion": "1.0.0",
+                                          "status": "INSTALLED" if index % 2 else "NOT_INSTALLED",
+                                          "isBaseVersion": True, "updateVersion": None, "failureReason": None})
+
+    def create_job(self, data, base_url):
+        package_id = uuid.uuid4().hex
+        with self.lock:
+            self.jobs[package_id] = {
+                "id": package_id,
+                "request": data,
+                "jobStatus": "ACTIVE",
+                "url": f"{base_url}/uploads/{package_id}",
+                "chunks": {}
+            }
+        return package_id
+
+    def package_path(self, package_id):
+        return os.path.join(self.storage_dir, package_id)
+
+    def finish_job(self, job, path):
+        """
+        Completes the package job once the package is processed and lists the package.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for data in iter(lambda: file.read(1 << 20), b""):
+                digest.update(data)
+
+        def complete():
+            job["jobStatus"] = "COMPLETED"
+            request = job["request"]
+            listing, name_field = PACKAGE_LISTINGS.get(request.get("uploadPackageType"), (None, None))
+            if listing is None:
+                return
+            package_name = request.get("packageName", "")
+            name = request.get("appName") or request.get("toolName") or package_name.split("@")[0].split(".")[0]
+            version = request.get("version")
+            if not version and "@" in package_name:
+                version = PACKAGE_EXTENSION.sub("", package_name.split("@", 1)[1])
+            self.add_row(listing, {"id": job["id"], name_field: name, "version": version or "1.0.0",
+                                   "sha256": job["sha256"], "size": job["size"]})
+
+        with self.lock:
+            job["sha256"] = digest.hexdigest()
+            job["size"] = os.path.getsize(path)
+            job["jobStatus"] = "RUNNING"
+            if self.job_seconds["package"] > 0:
+                self.schedule(self.job_seconds["package"], complete)
+            else:
+                complete()
+
+    def run_job(self, listing, row, job_type, on_success=None):
+        """
+        Lists the row as inProgress and ends it success, or failed at the job failure rate, after the job duration.
+        """
+        failed = self.random.random() < self.job_failure_rate
+
+        def finish():
+            if row["id"] not in self.tables[listing]:
+                return
+            row["operationState"] = "failed" if failed else "success"
+            self.touch(row)
+            if not failed and on_success is not None:
+                on_success()
+
+        row["operationState"] = "inProgress"
+        self.add_row(listing, row)
+        self.schedule(self.job_seconds[job_type], finish)
+        return row["id"]
+
+    def sync_local_application(self, application):
+        """
+        Makes a created application available in the local marketplace: as an update
+        of an installed version of the same name, otherwise as a new application.
+        """
+        for row in self.tables[LOCAL_APPS].values():
+            if row["appName"] == application["applicationName"] and row["status"] == "INSTALLED":
+                row["status"] = "UPDATE_AVAILABLE"
+                row["updateVersion"] = application["version"]
+                self.touch(row)
+                return
+        self.add_row(LOCAL_APPS, {"id": application["id"], "appId": application["id"],
+                                  "appName": application["applicationName"], "appVersion": application["version"],
+                                  "status": "NOT_INSTALLED", "isBaseVersion": True, "updateVersion": None,
+                                  "failureReason": None})
+
+    def run_action(self, row, action, data):
+        """
+        Returns:
+            str: Why the action can not be started, None when it is started.
+        """
+        if action == "install" and row["status"] not in ("NOT_INSTALLED", "FAILED"):
+            return f"application {row['appId']} is {row['status']}"
+        if action == "uninstall" and row["status"] not in ("INSTALLED", "UPDATE_AVAILABLE", "FAILED"):
+            return f"application {row['appId']} is {row['status']}"
+        if action == "update" and (row["status"] != "UPDATE_AVAILABLE" or
+                                   data.get("updateVersion") not in (None, row["updateVersion"])):
+            return f"application {row['appId']} has no update to {data.get('updateVersion')}"
+
+        failed = self.random.random() < self.job_failure_rate
+
+        def finish():
+            if failed:
+                row["status"] = "FAILED"
+                row["failureReason"] = f"{action} failed"
+            elif action == "install":
+                row["status"] = "INSTALLED"
+            elif action == "uninstall":
+                row["status"] = "NOT_INSTALLED"
+            else:
+                row["appVersion"] = row["updateVersion"]
+                row["updateVersion"] = None
+                row["status"] = "INSTALLED"
+            self.touch(row)
+
+        def downloaded():
+            if row["status"] == "DOWNLOADING":
+                row["status"] = "INSTALLING"
+                self.touch(row)
+
+        row["status"] = "DOWNLOADING" if action == "install" else ACTION_STATES[action]
+        row["failureReason"] = None
+        self.touch(row)
+        if action == "install":
+            self.schedule(self.job_seconds["install"] / 2, downloaded)
+        self.schedule(self.job_seconds[action], finish)
+        return None
+
+    def issue_token(self):
+        token = uuid.uuid4().hex
+        self.tokens[token] = time.monotonic() + self.token_ttl
+        return {"access_token": token, "expires_in": self.token_ttl, "refresh_token": uuid.uuid4().hex,
+                "refresh_expires_in": self.token_ttl * 6, "token_type": "Bearer"}
+
+    def valid_token(self, authorization):
+        token = (authorization or "").partition("Bearer ")[2]
+        with self.lock:
+            expires_at = self.tokens.get(token)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def page(self, listing, body):
+        """
+        Returns:
+            dict: The totalRecords and data of the requested page of a listing, filtered by
+            the exact values of filterMap and sorted by sortMap.
+        """
+        with self.lock:
+            rows = [dict(row) for row in self.tables[listing].values()]
+        for field, value in (body.get("filterMap") or {}).items():
+            rows = [row for row in rows if row.get(field) == value]
+        for field, order in reversed(list((body.get("sortMap") or {}).items())):
+            rows.sort(key=lambda row: (row.get(field) is None, row.get(field)), reverse=str(order).lower() == "desc")
+        page, size = int(body.get("page", 1)), int(body.get("size", 50))
+        if self.max_page_size:
+            size = min(size, self.max_page_size)
+        return {"totalRecords": len(rows), "data": rows[(page - 1) * size: page * size]}
+
+
+class CloudMPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle(self._get)
+
+    def do_POST(self):
+        self._handle(self._post)
+
+    def do_PUT(self):
+        self._handle(self._put)
+
+    def do_DELETE(self):
+        self._handle(self._delete)
+
+    def _handle(self, route):
+        state = self.state
+        delay = state.delay()
+        if delay:
+            time.sleep(delay)
+        state.advance()
+        with state.lock:
+            state.requests += 1
+        if state.chance(state.error_rate):
+            with state.lock:
+                state.errors += 1
+            self._read_body()
+            return self._send_json(503, {"error": "injected error"})
+        route()
+
+    def _send_json(self, status, data, etag=False):
+        body = json.dumps(data).encode()
+        if etag:
+            # listings are validated like the marketplace does, an unchanged page is a 304
+            tag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == tag:
+                self.send_response(304)
+                self.send_header("ETag", tag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", tag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _read_json(self):
+        return json.loads(self._read_body() or b"{}")
+
+    def _read_upload(self, left, block_size=1 << 16):
+        """
+        Yields the body of an upload request in blocks, at most stream_bandwidth bytes per second.
+        """
+        started_at = time.monotonic()
+        received = 0
+        while left:
+            data = self.rfile.read(min(left, block_size))
+            if not data:
+                return
+            left -= len(data)
+            received += len(data)
+            if self.state.stream_bandwidth:
+                delay = started_at + received / self.state.stream_bandwidth - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            yield data
+
+    def _job(self, package_id):
+        job = self.state.jobs.get(package_id)
+        if job is None:
+            self._send_json(404, {"error": f"unknown package {package_id}"})
+        return job
+
+    def _authorized(self):
+        if self.state.valid_token(self.headers.get("Authorization")):
+            return True
+        self._send_json(401, {"error": "invalid or expired token"})
+        return False
+
+    def _get(self):
+        # the CLI sends GET requests with a JSON body
+        self._read_body()
+        match = re.fullmatch(r"/cloudMarketPlace/upload/(?:package/\w+|pluginPackage|appPackage|testModulePackage)/(\w+)", self.path)
+        if not match:
+            return self._send_json(404, {"error": self.path})
+        job = self._job(match.group(1))
+        if job is not None:
+            details = {"jobStatus": job["jobStatus"], "url": job["url"]}
+            if job["jobStatus"] == "COMPLETED":
+                details.update(sha256=job["sha256"], size=job["size"])
+            self._send_json(200, details)
+
+    def _post(self):
+        if self.path == "/auth/realms/regal/protocol/openid-connect/token":
+            return self._token()
+
+        if self.path == "/cloudMarketPlace/upload/package":
+            data = self._read_json()
+            base_url = f"http://{self.headers.get('Host')}"
+            return self._send_json(200, {"packageId": self.state.create_job(data, base_url)})
+
+        match = re.fullmatch(r"/cloudMarketPlace/upload/(\w+)", self.path)
+        if match and match.group(1) in TYPED_UPLOADS:
+            upload_type, id_field = TYPED_UPLOADS[match.group(1)]
+            data = dict(self._read_json(), uploadPackageType=upload_type)
+            base_url = f"http://{self.headers.get('Host')}"
+            return self._send_json(200, {id_field: self.state.create_job(data, base_url)})
+
+        if self.path == "/cloudMarketPlace/vertical/add":
+            return self._add("getVerticalDataTable", "verticalName", "verticalId", self._read_json())
+        if self.path == "/cloudMarketPlace/category/add":
+            data = self._read_json()
+            return self._add("getCategoryDataTable", "categoryName", "categoryId",
+                             {"categoryName": data.get("categoryName"), "verticalId": data.get("verticalRefId")})
+        if self.path == "/cloudMarketPlace/createApplication":
+            return self._create_application(self._read_json())
+        if self.path == "/cloudMarketPlace/createModule":
+            return self._create_module(self._read_json())
+
+        match = re.fullmatch(r"/cloudMPApiServer/(\w+)", self.path)
+        if match:
+            return self._data_table(match.group(1), self._read_json())
+
+        if self.path == "/api/localMarketPlace/apps/dataTable":
+            body = self._read_json()
+            if self._authorized():
+                self._send_json(200, self.state.page(LOCAL_APPS, body), etag=True)
+            return
+
+        match = re.fullmatch(r"/api/localMarketPlace/apps/(\w+)/action/(\w+)", self.path)
+        if match:
+            return self._application_action(match.group(1), match.group(2), self._read_json())
+
+        match = re.fullmatch(r"/uploads/(\w+)", self.path)
+        if not match:
+            self._read_body()
+            return self._send_json(404, {"error": self.path})
+        job = self._job(match.group(1))
+        if job is None:
+            return
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            return self._complete_chunks(job, self._read_json())
+        self._receive_stream(job)
+
+    def _put(self):
+        match = re.fullmatch(r"/cloudMarketPlace/(apps|modules)/(\w+)/status/(\w+)", self.path)
+        if match:
+            self._read_body()
+            listing = "getAppsGroupMetaData" if match.group(1) == "apps" else "getModulesGroupMetaData"
+            return self._toggle(listing, match.group(2), match.group(3))
+
+        match = re.fullmatch(r"/uploads/(\w+)", self.path)
+        job = self._job(match.group(1)) if match else None
+        if job is None:
+            return
+        range_match = CONTENT_RANGE.fullmatch(self.headers.get("Content-Range", ""))
+        if not range_match:
+            return self._send_json(400, {"error": "Content-Range required"})
+        start, end, size = (int(value) for value in range_match.groups())
+        data = b"".join(self._read_upload(int(self.headers.get("Content-Length", 0))))
+
+        with self.state.lock:
+            drop = start in self.state.drop_chunks
+            self.state.drop_chunks.discard(start)
+        if drop:
+            # simulate a connection that breaks in the middle of the upload
+            self.close_connection = True
+            self.connection.shutdown(2)
+            return
+
+        digest = hashlib.sha256(data).hexdigest()
+        if digest != self.headers.get("X-Chunk-Sha256"):
+            return self._send_json(422, {"error": "checksum mismatch", "sha256": digest})
+        # chunks arrive concurrently, write them in place without truncating the file
+        fd = os.open(self.state.package_path(job["id"]), os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            os.pwrite(fd, data, start)
+        finally:
+            os.close(fd)
+        with self.state.lock:
+            job["chunks"][start] = digest
+        self._send_json(200, {"offset": end + 1, "sha256": digest})
+
+    def _delete(self):
+        self._read_body()
+        for pattern, listing in DELETES.items():
+            match = re.fullmatch(pattern, self.path)
+            if match:
+                return self._delete_row(listing, match.group(1))
+        self._send_json(404, {"error": self.path})
+
+    def _token(self):
+        form = parse_qs(self._read_body().decode())
+        if form.get("grant_type", [None])[0] not in ("password", "refresh_token", "client_credentials"):
+            return self._send_json(400, {"error": "unsupported_grant_type"})
+        with self.state.lock:
+            token = self.state.issue_token()
+        self._send_json(200, token)
+
+    def _add(self, listing, name_field, id_field, row):
+        if not row.get(name_field):
+            return self._send_json(400, {"error": f"{name_field} is required"})
+        with self.state.lock:
+            if any(existing[name_field] == row[name_field] for existing in self.state.tables[listing].values()):
+                return self._send_json(409, {"error": f"{row[name_field]} already exists"})
+            row_id = self.state.add_row(listing, dict(row))
+        self._send_json(200, {id_field: row_id})
+
+    def _create_application(self, data):
+        state = self.state
+        row = {"applicationName": data.get("applicationName"), "version": data.get("version"),
+               "description": data.get("description"), "verticalId": data.get("verticalId"),
+               "categoryId": data.get("categoryId"), "plugins": data.get("plugins") or [],
+               "appPackageId": data.get("appPackageId"), "enabled": True}
+        with state.lock:
+            missing = self._missing_references("getAppsGroupMetaData", row)
+            if not missing:
+                application_id = state.run_job("getAppsGroupMetaData", row, "application",
+                                               lambda: state.schedule(state.job_seconds["sync"],
+                                                                      lambda: state.sync_local_application(row)))
+        if missing:
+            return self._send_json(400, {"error": "unknown references", "references": missing})
+        self._send_json(200, {"applicationId": application_id})
+
+    def _create_module(self, data):
+        row = {"moduleName": data.get("moduleName"), "version": data.get("version"),
+               "description": data.get("description"), "verticalId": data.get("verticalId"),
+               "applications": data.get("applications") or [], "testModules": data.get("testModules") or [],
+               "enabled": True}
+        with self.state.lock:
+            missing = self._missing_references("getModulesGroupMetaData", row)
+            if not missing:
+                module_id = self.state.run_job("getModulesGroupMetaData", row, "module")
+        if missing:
+            return self._send_json(400, {"error": "unknown references", "references": missing})
+        self._send_json(200, {"moduleId": module_id})
+
+    def _missing_references(self, listing, row):
+        missing = []
+        for field, target in REFERENCES[listing].items():
+            values = row.get(field)
+            for value in values if isinstance(values, list) else [values]:
+                if value is not None and value not in self.state.tables[target]:
+                    missing.append(f"{field}={value}")
+        return missing
+
+    def _delete_row(self, listing, row_id):
+        with self.state.lock:
+            exists = row_id in self.state.tables[listing]
+            references = self.state.references(listing, row_id) if exists else []
+            if exists and not references:
+                del self.state.tables[listing][row_id]
+        if not exists:
+            return self._send_json(404, {"error": f"unknown id {row_id}"})
+        if references:
+            return self._send_json(409, {"error": f"{row_id} is still referenced",
+                                         "references": [row for listing, row in references]})
+        self._send_json(200, {"id": row_id})
+
+    def _toggle(self, listing, row_id, status):
+        if status not in ("enable", "disable"):
+            return self._send_json(400, {"error": f"unknown status {status}"})
+        with self.state.lock:
+            row = self.state.tables[listing].get(row_id)
+            if row is not None:
+                row["enabled"] = status == "enable"
+                self.state.touch(row)
+        if row is None:
+            return self._send_json(404, {"error": f"unknown id {row_id}"})
+        self._send_json(200, {"id": row_id, "enabled": status == "enable"})
+
+    def _application_action(self, application_id, action, data):
+        if not self._authorized():
+            return
+        if action not in ACTION_STATES:
+            return self._send_json(400, {"error": f"unknown action {action}"})
+        with self.state.lock:
+            row = self.state.tables[LOCAL_APPS].get(application_id)
+            error = self.state.run_action(row, action, data) if row is not None else None
+        if row is None:
+            return self._send_json(404, {"error": f"unknown application {application_id}"})
+        if error:
+            return self._send_json(409, {"error": error})
+        self._send_json(200, {"appId": application_id, "action": action})
+
+    def _complete_chunks(self, job, manifest):
+        chunk_size = manifest["chunkSize"]
+        expected = {index * chunk_size: digest for index, digest in enumerate(manifest["chunks"])}
+        missing = [start for start, digest in expected.items() if job["chunks"].get(start) != digest]
+        path = self.state.package_path(job["id"])
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if missing or size != manifest["size"]:
+            return self._send_json(409, {"error": "incomplete upload", "missingOffsets": missing, "size": size})
+        self.state.finish_job(job, path)
+        self._send_json(200, {"jobStatus": job["jobStatus"], "sha256": job["sha256"]})
+
+    def _receive_stream(self, job):
+        # only the file part of a multipart body is stored, like the marketplace does
+        boundary = self.headers.get("Content-Type", "").partition("boundary=")[2]
+        tail_size = len(f"\r\n--{boundary}--\r\n") if boundary else 0
+        in_head = bool(boundary)
+        pending = b""
+        path = self.state.package_path(job["id"])
+        with open(path, "wb") as file:
+            for data in self._read_upload(int(self.headers.get("Content-Length", 0))):
+                pending += data
+                if in_head:
+                    end = pending.find(b"\r\n\r\n")
+                    if end < 0:
+                        continue
+                    pending = pending[end + 4:]
+                    in_head = False
+                if len(pending) > tail_size:
+                    file.write(pending[:len(pending) - tail_size])
+                    pending = pending[len(pending) - tail_size:]
+        self.state.finish_job(job, path)
+        self._send_json(200, {"jobStatus": job["jobStatus"]})
+
+    def _data_table(self, name, body):
+        if name not in self.state.tables or name == LOCAL_APPS:
+            return self._send_json(404, {"error": self.path})
+        self._send_json(200, self.state.page(name, body), etag=True)
+
+
+def make_server(port=0, storage_dir="local_cloud_mp_uploads", drop_chunks=(), stream_bandwidth=None, **options):
+    """
+    Args:
+        options: The other arguments of CloudMPState, e.g. latency, error_rate, job_seconds or catalog_size.
+    """
+    state = CloudMPState(storage_dir, drop_chunks, stream_bandwidth, **options)
+    handler = type("Handler", (CloudMPHandler,), {"state": state})
+    return ThreadingHTTPServer(("127.0.0.1", port), handler)
+
+
+def serve(port=0, storage_dir="local_cloud_mp_uploads", drop_chunks=(), stream_bandwidth=None, **options):
+    """
+    Starts the stand-in server in a background thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server, its port is server_address[1].
+    """
+    server = make_server(port, storage_dir, drop_chunks, stream_bandwidth, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_job_seconds(values):
+    job_seconds = {}
+    for value in values:
+        job_type, _, seconds = value.partition("=")
+        if job_type not in DEFAULT_JOB_SECONDS or not seconds:
+            raise argparse.ArgumentTypeError(f"--job-seconds expects one of {', '.join(DEFAULT_JOB_SECONDS)}=<seconds>")
+        job_seconds[job_type] = float(seconds)
+    return job_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Cloud MP and Regal API endpoints of the CLI")
+    parser.add_argument("--port", type=int, default=5028)
+    parser.add_argument("--storage-dir", default="local_cloud_mp_uploads", help="directory the uploaded packages are written to")
+    parser.add_argument("--drop-chunk-offset", type=int, action="append", default=[],
+                        help="drop the first PUT of the chunk at this byte offset to test resumed uploads")
+    parser.add_argument("--stream-bandwidth", type=int, default=None,
+                        help="bytes per second each upload request is read with")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds every request waits before it is served")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="the latency varies by up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of the requests answered with a 503")
+    parser.add_argument("--job-failure-rate", type=float, default=0.0,
+                        help="fraction of the application, module and local application jobs that fail")
+    parser.add_argument("--job-seconds", action="append", default=[], metavar="TYPE=SECONDS",
+                        help=f"duration of a job type, one of {', '.join(DEFAULT_JOB_SECONDS)}; can be repeated")
+    parser.add_argument("--catalog-size", type=int, default=0, help="rows preloaded into every listing")
+    parser.add_argument("--max-page-size", type=int, default=None, help="most rows served per DataTable page")
+    parser.add_argument("--token-ttl", type=int, default=300, help="seconds an access token is valid")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the injected errors and failures")
+    args = parser.parse_args()
+
+    try:
+        job_seconds = parse_job_seconds(args.job_seconds)
+    except argparse.ArgumentTypeError as ex:
+        parser.error(str(ex))
+
+    server = make_server(args.port, args.storage_dir, args.drop_chunk_offset, args.stream_bandwidth,
+                         latency=args.latency, latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+                         job_failure_rate=args.job_failure_rate, job_seconds=job_seconds,
+                         catalog_size=args.catalog_size, max_page_size=args.max_page_size,
+                         token_ttl=args.token_ttl, seed=args.seed)
+    print(f"Local Cloud MP and Regal API listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        state = server.RequestHandlerClass.state
+        print(f"Served {state.requests} requests, {state.errors} injected errors")
+
+
+if __name__ == '__main__':
+    main()
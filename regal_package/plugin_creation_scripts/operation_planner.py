@@ -0,0 +1,134 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from trace_spans import span
+
+
+class PlanNode:
+    """
+    One marketplace action of an operation plan, e.g. creating a vertical or
+    uploading a plugin package, and the nodes it has to wait for.
+    """
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+    def __init__(self, key, label, action, requires=()):
+        self.key = key
+        self.label = label
+        self.action = action
+        self.requires = list(requires)
+        self.state = self.PENDING
+        self.value = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def elapsed(self):
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+class OperationPlan:
+    """
+    A DAG of marketplace actions built from operation manifests.
+
+    Nodes are keyed by the resource they produce, so a vertical or package shared
+    by several manifests is created once. A node can only require nodes added
+    before it, which keeps the plan acyclic. run() starts every node as soon as
+    the nodes it requires are done, independent nodes run concurrently. The
+    action of a node is called with a dict of the values of its required nodes
+    and returns the id of the resource, None if it failed.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.started_at = None
+        self.finished_at = None
+
+    def add(self, key, label, action, requires=()):
+        """
+        Returns:
+            The key of the node, an existing node with the same key is kept.
+        """
+        if key in self.nodes:
+            return key
+        missing = [required for required in requires if required not in self.nodes]
+        if missing:
+            raise ValueError(f"{label} requires unknown plan nodes {missing}")
+        self.nodes[key] = PlanNode(key, label, action, requires)
+        return key
+
+    def value(self, key):
+        return self.nodes[key].value
+
+    @property
+    def failed(self):
+        return [node for node in self.nodes.values() if node.state in (PlanNode.FAILED, PlanNode.SKIPPED)]
+
+    def run(self, workers=4):
+        """
+        Runs the plan. A failed node, including one that exits the CLI, skips the
+        nodes that depend on it while the independent nodes still run.
+
+        Returns:
+            bool: True if every node is done.
+        """
+        self.started_at = time.monotonic()
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            while True:
+                for node in self._ready(running):
+                    running[executor.submit(self._run_node, node)] = node
+                if not running:
+                    break
+                done, not_done = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+        self.finished_at = time.monotonic()
+        return not self.failed
+
+    def _ready(self, running):
+        in_flight = set(node.key for node in running.values())
+        ready = []
+        for node in self.nodes.values():
+            if node.state != PlanNode.PENDING or node.key in in_flight:
+                continue
+            states = [self.nodes[required].state for required in node.requires]
+            if any(state in (PlanNode.FAILED, PlanNode.SKIPPED) for state in states):
+                # nodes are kept in dependency order, the skip reaches all dependents in one pass
+                node.state = PlanNode.SKIPPED
+                continue
+            if all(state == PlanNode.DONE for state in states):
+                ready.append(node)
+        return ready
+
+    def _run_node(self, node):
+        values = {required: self.nodes[required].value for required in node.requires}
+        node.started_at = time.monotonic()
+        print(f"[plan] Starting {node.label}")
+        try:
+            with span(node.label, "plan"):
+                node.value = node.action(values)
+            # the marketplace actions return None after reporting a failed request
+            node.state = PlanNode.DONE if node.value is not None else PlanNode.FAILED
+        except BaseException as ex:
+            # the actions report their errors and exit() like the interactive CLI does
+            node.error = ex
+            node.state = PlanNode.FAILED
+        node.finished_at = time.monotonic()
+        print(f"[plan] Finished {node.label}: {node.state} in {node.elapsed:.1f}s")
+
+    def print_report(self):
+        if self.started_at is None:
+            return
+        total = (self.finished_at or time.monotonic()) - self.started_at
+        busy = sum(node.elapsed for node in self.nodes.values())
+        print(f"Plan of {len(self.nodes)} actions finished in {total:.1f}s ({busy:.1f}s of action time):")
+        print(f"  {'start':>7} {'time':>7}  {'state':8} action")
+        for node in sorted(self.nodes.values(), key=lambda node: (node.started_at is None, node.started_at or 0)):
+            start = f"{node.started_at - self.started_at:.1f}s" if node.started_at is not None else "-"
+            value = f" -> {node.value}" if node.value is not None else ""
+            print(f"  {start:>7} {node.elapsed:>6.1f}s  {node.state:8} {node.label}{value}")
@@ -6,6 +6,7 @@ import re
 import sys
 import importlib.util
 from plugin_package_validator import PluginPackageValidator
+from trace_spans import span
 
 class PluginManager:
     def __init__(self, base_path, dest_path):
@@ -200,13 +201,16 @@ class PluginManager:
             exit()
 
     def run_plugin_manager(self):
-        self.validate_base_path()
-        self.validate_dest_path()
-        self.validate_meta_json()
-        self.validate_dependencies()
-        #self.validate_class_names()
-        self.plugin_resource_validator.validate()
-        self.create_plugin_structure()
+        with span("plugin package", "build", base_path=self.base_path):
+            self.validate_base_path()
+            self.validate_dest_path()
+            with span("validate plugin", "build"):
+                self.validate_meta_json()
+                self.validate_dependencies()
+                #self.validate_class_names()
+                self.plugin_resource_validator.validate()
+            with span("create plugin package", "build"):
+                self.create_plugin_structure()
 
 
 if __name__ == "__main__":
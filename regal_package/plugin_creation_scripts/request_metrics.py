@@ -0,0 +1,141 @@
+import re
+import json
+import math
+import time
+import threading
+from urllib.parse import urlsplit
+
+# path segments that identify a resource rather than an endpoint, e.g. uuid4().hex package ids
+ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}|'
+                        r'(?=[A-Za-z_-]*\d)[0-9A-Za-z_-]{12,})$')
+
+
+def endpoint_template(url):
+    """
+    Returns:
+        str: The url without its query, the resource ids in its path replaced by {id},
+        e.g. http://host:8080/cloudMarketPlace/module/{id}.
+    """
+    parts = urlsplit(url)
+    segments = ['{id}' if ID_SEGMENT.match(segment) else segment for segment in parts.path.split('/')]
+    return f"{parts.scheme}://{parts.netloc}{'/'.join(segments)}"
+
+
+def percentile(values, percent):
+    """
+    Returns:
+        float: The nearest-rank percentile of the sorted values.
+    """
+    if not values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+class RequestMetrics:
+    """
+    Accounts every marketplace request by method and endpoint template: its
+    status, bytes sent and received and latency, and the time the CLI spends
+    sleeping between polls. The requests are recorded by the session adapter,
+    so each call site is accounted for without changes to it.
+
+    The latency is the time until the response headers arrived, request bodies
+    such as package uploads included. The bytes received are those of the
+    decoded response body, for a streamed response its Content-Length. A
+    request that failed without a response is recorded with the status "error".
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self._endpoints = {}
+        self._sleeps = {}
+        self._lock = threading.Lock()
+
+    def record(self, method, url, status, bytes_sent, bytes_received, latency):
+        key = (method, endpoint_template(url))
+        with self._lock:
+            endpoint = self._endpoints.get(key)
+            if endpoint is None:
+                endpoint = self._endpoints[key] = {"latencies": [], "statuses": {}, "bytesSent": 0, "bytesReceived": 0}
+            endpoint["latencies"].append(latency)
+            endpoint["statuses"][str(status)] = endpoint["statuses"].get(str(status), 0) + 1
+            endpoint["bytesSent"] += bytes_sent
+            endpoint["bytesReceived"] += bytes_received
+
+    def sleep(self, kind, seconds):
+        """
+        Sleeps and accounts the time to kind, e.g. "job backoff".
+        """
+        time.sleep(seconds)
+        self.add_sleep(kind, seconds)
+
+    def add_sleep(self, kind, seconds):
+        with self._lock:
+            self._sleeps[kind] = self._sleeps.get(kind, 0.0) + seconds
+
+    def summary(self, connection_stats=None):
+        """
+        Returns:
+            dict: The run totals and one entry per endpoint, slowest total time first.
+        """
+        with self._lock:
+            endpoints = [(key, dict(value, latencies=sorted(value["latencies"]), statuses=dict(value["statuses"])))
+                         for key, value in self._endpoints.items()]
+            sleeps = dict(self._sleeps)
+
+        rows = []
+        for (method, template), endpoint in endpoints:
+            latencies = endpoint["latencies"]
+            rows.append({
+                "method": method,
+                "endpoint": template,
+                "requests": len(latencies),
+                "statuses": endpoint["statuses"],
+                "bytesSent": endpoint["bytesSent"],
+                "bytesReceived": endpoint["bytesReceived"],
+                "totalSeconds": sum(latencies),
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": latencies[-1],
+            })
+        rows.sort(key=lambda row: row["totalSeconds"], reverse=True)
+
+        summary = {
+            "wallSeconds": time.monotonic() - self.started_at,
+            "requests": sum(row["requests"] for row in rows),
+            "ioSeconds": sum(row["totalSeconds"] for row in rows),
+            "sleepSeconds": sum(sleeps.values()),
+            "sleeps": sleeps,
+            "endpoints": rows,
+        }
+        if connection_stats is not None:
+            summary["connections"] = connection_stats
+        return summary
+
+    def print_report(self):
+        summary = self.summary()
+        if not summary["requests"]:
+            return
+        print(f"Requests: {summary['requests']} in {summary['wallSeconds']:.1f}s, "
+              f"{summary['ioSeconds']:.1f}s in requests, {summary['sleepSeconds']:.1f}s sleeping")
+        for kind, seconds in sorted(summary["sleeps"].items()):
+            print(f"  sleeping for {kind}: {seconds:.1f}s")
+        print(f"  {'count':>6} {'p50':>7} {'p95':>7} {'p99':>7} {'total':>8} {'sent':>9} {'received':>9}  endpoint")
+        for row in summary["endpoints"]:
+            statuses = ", ".join(f"{status}: {count}" for status, count in sorted(row["statuses"].items()))
+            print(f"  {row['requests']:>6} {row['p50'] * 1000:>5.0f}ms {row['p95'] * 1000:>5.0f}ms {row['p99'] * 1000:>5.0f}ms "
+                  f"{row['totalSeconds']:>7.1f}s {format_bytes(row['bytesSent']):>9} {format_bytes(row['bytesReceived']):>9}  "
+                  f"{row['method']} {row['endpoint']} ({statuses})")
+
+    def write_json(self, path, connection_stats=None):
+        with open(path, 'w') as file:
+            json.dump(self.summary(connection_stats), file, indent=4)
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{count:.0f}{unit}" if unit == "B" else f"{count:.1f}{unit}"
+        count /= 1024
+    return f"{count:.1f}GB"
@@ -0,0 +1,60 @@
+import os
+import threading
+from concurrent.futures import Future
+
+
+def file_identity(path):
+    """
+    Returns:
+        tuple: Identifies the content of a file without reading it: the same file
+        reached over another path or link has the same identity, a rewritten one not.
+    """
+    stat = os.stat(path)
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class RunMemo:
+    """
+    The resources ensured during one run of the CLI, keyed by their identity,
+    e.g. ('vertical', name) or ('package', type, file identity).
+
+    The first call for a key runs the action, concurrent calls for the same key
+    wait for it and get its result (single flight), later calls get it at once.
+    A failed action, one that raises or returns None, is not remembered.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, action):
+        owner = None
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self.hits += 1
+            else:
+                future = self._futures[key] = Future()
+                owner = future
+        if future is not owner:
+            return future.result()
+
+        try:
+            value = action()
+        except BaseException as ex:
+            self._forget(key)
+            future.set_exception(ex)
+            raise
+        if value is None:
+            self._forget(key)
+        future.set_result(value)
+        return value
+
+    def _forget(self, key):
+        with self._lock:
+            self._futures.pop(key, None)
+
+    def print_stats(self):
+        if self.hits:
+            print(f"Resources reused within this run: {self.hits}")
@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import threading
+
+
+class TokenCache:
+    """
+    Keeps the keycloak access token in memory, tracks its expiry and refreshes it
+    with the refresh token shortly before it expires. When a cache file is given
+    the token is also persisted (mode 0600) so that back to back CLI invocations
+    can reuse it.
+    """
+    REFRESH_MARGIN = 30  # refresh the access token this many seconds before expiry
+
+    def __init__(self, session, token_url, username, password, client_id="regal-gui", cache_file=None):
+        self.session = session
+        self.token_url = token_url
+        self.username = username
+        self.password = password
+        self.client_id = client_id
+        self.cache_file = cache_file
+        self._token = None
+        self._lock = threading.Lock()
+
+        if self.cache_file:
+            self._token = self._load()
+
+    def get_access_token(self):
+        with self._lock:
+            now = time.time()
+            if self._token and self._token["expires_at"] - self.REFRESH_MARGIN > now:
+                return self._token["access_token"]
+
+            token = None
+            if self._token and self._token.get("refresh_token") and self._token["refresh_expires_at"] - self.REFRESH_MARGIN > now:
+                try:
+                    token = self._request_token({
+                        "grant_type": "refresh_token",
+                        "refresh_token": self._token["refresh_token"],
+                        "client_id": self.client_id
+                    })
+                except Exception:
+                    # refresh token got revoked or the session ended, login again
+                    token = None
+
+            if token is None:
+                token = self._request_token({
+                    "username": self.username,
+                    "password": self.password,
+                    "grant_type": "password",
+                    "client_id": self.client_id,
+                    "scope": "openid"
+                })
+
+            self._token = token
+            if self.cache_file:
+                self._save(token)
+            return token["access_token"]
+
+    def invalidate(self, access_token=None):
+        """
+        Drops the cached token, e.g. after the server rejected it. With the rejected
+        access_token only that token is dropped, a token already renewed by another
+        thread is kept.
+        """
+        with self._lock:
+            if access_token is not None and (self._token is None or self._token["access_token"] != access_token):
+                return
+            self._token = None
+            if self.cache_file and os.path.exists(self.cache_file):
+                os.remove(self.cache_file)
+
+    def _request_token(self, data):
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
+        requested_at = time.time()
+        response = self.session.post(self.token_url, headers=headers, data=data)
+        response.raise_for_status()
+        json_data = response.json()
+
+        # without refresh_expires_in the refresh token is assumed to expire with the access token,
+        # a refresh_expires_in of 0 means it does not expire on its own (offline tokens)
+        refresh_expires_in = json_data.get("refresh_expires_in") or json_data.get("expires_in", 0)
+        if json_data.get("refresh_expires_in") == 0:
+            refresh_expires_in = float("inf")
+
+        return {
+            "access_token": json_data["access_token"],
+            "refresh_token": json_data.get("refresh_token"),
+            "expires_at": requested_at + json_data.get("expires_in", 0),
+            "refresh_expires_at": requested_at + refresh_expires_in
+        }
+
+    def _load(self):
+        try:
+            with open(self.cache_file, 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("tokenUrl") != self.token_url or data.get("username") != self.username:
+            return None
+        return data.get("token")
+
+    def _save(self, token):
+        data = {
+            "tokenUrl": self.token_url,
+            "username": self.username,
+            "token": token
+        }
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            # the umask can not widen the mode, but an existing tmp file could
+            os.fchmod(fd, 0o600)
+            with os.fdopen(fd, 'w') as file:
+                json.dump(data, file, default=str)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as ex:
+            print(f"Failed to persist the access token to {self.cache_file}: {ex}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
@@ -0,0 +1,123 @@
+"""
+Trace spans written to a local Chrome trace file, no collector needed.
+
+Set REGAL_TRACE_FILE to a path and every span of the run is appended to it as
+a complete event of the Chrome trace event format, which chrome://tracing and
+https://ui.perfetto.dev open directly. Processes that share the variable, e.g.
+build.py and the plugin_package_mgr.py and cloudMPCLI.py it starts, append to
+the same file and show up as one trace with a track per process and thread.
+Spans of a thread nest by their times. Without REGAL_TRACE_FILE a span costs a
+clock read.
+
+    with span("upload chunk", "upload", index=3) as args:
+        ...
+        args["status"] = 200
+"""
+import os
+import sys
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+
+TRACE_FILE_ENV = "REGAL_TRACE_FILE"
+
+
+class Tracer:
+    """
+    Appends spans to a trace file in the JSON array format. The array is left
+    open, as the format allows, so every process can append to it with single
+    writes and a killed run still leaves a readable trace.
+    """
+
+    def __init__(self, path=None, process_name=None):
+        self.path = path
+        self.process_name = process_name or os.path.basename(sys.argv[0] or "python")
+        self.pid = os.getpid()
+        self._fd = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _open(self):
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+            os.write(fd, b"[\n")
+        except FileExistsError:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        self._fd = fd
+        self._write({"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+                     "args": {"name": f"{self.process_name} ({self.pid})"}})
+
+    def _write(self, event):
+        os.write(self._fd, (json.dumps(event, default=str) + ",\n").encode())
+
+    def emit(self, name, category, start_us, duration_us, args):
+        event = {"name": name, "cat": category, "ph": "X", "ts": start_us, "dur": duration_us,
+                 "pid": self.pid, "tid": threading.get_ident(), "args": args}
+        with self._lock:
+            try:
+                if self._fd is None:
+                    self._open()
+                self._write(event)
+            except OSError as ex:
+                # tracing never fails the run
+                print(f"Failed to write the trace to {self.path}: {ex}")
+                self.path = None
+
+    @contextmanager
+    def span(self, name, category="regal", **args):
+        """
+        Records the time spent in the with block. The yielded dict holds the span
+        arguments, the block can add to it. An exception, including an exit(),
+        is recorded as the "error" argument and raised again.
+        """
+        if not self.enabled:
+            yield args
+            return
+        start_ns = time.time_ns()
+        try:
+            yield args
+        except BaseException as ex:
+            args["error"] = f"{type(ex).__name__}: {ex}"
+            raise
+        finally:
+            end_ns = time.time_ns()
+            self.emit(name, category, start_ns // 1000, max((end_ns - start_ns) // 1000, 1), args)
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """
+    Returns:
+        Tracer: The tracer of this process, writing to REGAL_TRACE_FILE when it is set.
+    """
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(os.getenv(TRACE_FILE_ENV))
+    return _tracer
+
+
+def span(name, category="regal", **args):
+    return get_tracer().span(name, category, **args)
+
+
+def traced(name=None, category="regal"):
+    """
+    Decorates a function to run in a span named after it.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
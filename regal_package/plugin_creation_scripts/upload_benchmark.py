@@ -0,0 +1,86 @@
+"""
+Compares the throughput of a single stream package upload with parallel
+multi-part uploads against the local stand-in server.
+
+    python upload_benchmark.py --size-mb 64 --stream-bandwidth 8388608 --workers 1 2 4 8
+"""
+import os
+import tempfile
+import argparse
+import requests
+from http_session import create_session
+from upload_stream import MultipartFileStream, format_throughput
+from chunked_upload import ChunkedUploader, UploadCheckpoint
+import local_cloud_mp_server
+
+
+def create_package_job(session, url):
+    response = session.post(f"{url}/cloudMarketPlace/upload/package",
+                            json={"packageName": "benchmark.rp", "uploadPackageType": "plugin"})
+    response.raise_for_status()
+    package_id = response.json()["packageId"]
+    response = session.get(f"{url}/cloudMarketPlace/upload/package/plugin/{package_id}", json={})
+    response.raise_for_status()
+    return package_id, response.json()["url"]
+
+
+def single_stream_upload(session, url, package_file):
+    package_id, upload_url = create_package_job(session, url)
+    with MultipartFileStream(package_file) as stream:
+        response = session.post(upload_url, headers={'Content-Type': stream.content_type}, data=stream)
+        response.raise_for_status()
+        return stream.throughput()
+
+
+def multi_part_upload(session, url, package_file, workers, part_size, checkpoint_dir):
+    package_id, upload_url = create_package_job(session, url)
+    checkpoint = UploadCheckpoint.for_file(checkpoint_dir, package_file, "plugin", part_size)
+    checkpoint.start(package_id, upload_url)
+    uploader = ChunkedUploader(session, upload_url, package_file, checkpoint, workers=workers)
+    uploader.upload()
+    rate = uploader.bytes_sent / uploader.elapsed if uploader.elapsed > 0 else 0.0
+    return uploader.bytes_sent, uploader.elapsed, rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single stream against parallel multi-part package uploads")
+    parser.add_argument("--size-mb", type=int, default=64, help="size of the generated package")
+    parser.add_argument("--stream-bandwidth", type=int, default=8 * 1024 * 1024,
+                        help="bytes per second the stand-in server reads a single stream with, 0 for unlimited")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="parallel streams to compare")
+    parser.add_argument("--part-size-mb", type=float, default=None,
+                        help="size of one part, defaults to an equal split over the workers")
+    parser.add_argument("--url", default=None, help="benchmark against a running server instead of a local one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        url = args.url
+        if url is None:
+            server = local_cloud_mp_server.serve(storage_dir=os.path.join(work_dir, "uploads"),
+                                                 stream_bandwidth=args.stream_bandwidth or None)
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        package_file = os.path.join(work_dir, "benchmark.rp")
+        with open(package_file, "wb") as file:
+            for _ in range(args.size_mb):
+                file.write(os.urandom(1024 * 1024))
+        size = os.path.getsize(package_file)
+
+        session, adapter = create_session(max(args.workers))
+        results = [("single stream", single_stream_upload(session, url, package_file))]
+        for workers in args.workers:
+            part_size = int(args.part_size_mb * 1024 * 1024) if args.part_size_mb else -(-size // workers)
+            results.append((f"{workers} streams, {part_size / 1048576:.1f} MB parts",
+                            multi_part_upload(session, url, package_file, workers, part_size, work_dir)))
+
+        baseline = results[0][1][2]
+        for name, (bytes_sent, elapsed, rate) in results:
+            speedup = rate / baseline if baseline else 0.0
+            print(f"{name:32} {format_throughput(bytes_sent, elapsed, rate):36} x{speedup:.2f}")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except requests.exceptions.RequestException as ex:
+        print(f"Benchmark failed: {ex}")
@@ -0,0 +1,93 @@
+import os
+import json
+import hashlib
+import threading
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path, block_size=HASH_BLOCK_SIZE):
+    """
+    Returns:
+        tuple: (hex SHA-256 digest, size in bytes) of the file, read in fixed size blocks.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as file:
+        for data in iter(lambda: file.read(block_size), b''):
+            digest.update(data)
+            size += len(data)
+    return digest.hexdigest(), size
+
+
+class UploadLedger:
+    """
+    Local JSON ledger of the packages uploaded to a marketplace, keyed by the
+    SHA-256 of the package file, so that unchanged packages are not uploaded again.
+
+    Entries are kept per marketplace (source) and upload type. Packages whose
+    catalog entry is named by the upload request (app and security tool packages)
+    also key on that name and version.
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self._lock = threading.Lock()
+        self.entries = self._load()
+
+    def _key(self, digest, upload_type, labels=()):
+        return "|".join([self.source, upload_type, digest] + [str(label) for label in labels])
+
+    def lookup(self, digest, upload_type, labels=()):
+        """
+        Returns:
+            dict: packageId, packageName and size of the uploaded package, None if it was never uploaded.
+        """
+        with self._lock:
+            return self.entries.get(self._key(digest, upload_type, labels))
+
+    def has_size(self, upload_type, size, labels=()):
+        """
+        Returns:
+            bool: True if a package of this upload type and size was recorded, only
+            then can the file be unchanged and is it worth hashing before the upload.
+        """
+        prefix = [self.source, upload_type]
+        labels = [str(label) for label in labels]
+        with self._lock:
+            for key, entry in self.entries.items():
+                parts = key.split("|")
+                if parts[:2] == prefix and parts[3:] == labels and entry.get("size") == size:
+                    return True
+        return False
+
+    def record(self, digest, upload_type, package_id, package_name, size, labels=()):
+        with self._lock:
+            self.entries[self._key(digest, upload_type, labels)] = {
+                "packageId": package_id,
+                "packageName": package_name,
+                "size": size
+            }
+            self._save()
+
+    def forget(self, digest, upload_type, labels=()):
+        with self._lock:
+            if self.entries.pop(self._key(digest, upload_type, labels), None) is not None:
+                self._save()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp_file = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, 'w') as file:
+                json.dump(self.entries, file, indent=2)
+            os.replace(tmp_file, self.path)
+        except OSError as ex:
+            print(f"Failed to save the upload ledger {self.path}: {ex}")
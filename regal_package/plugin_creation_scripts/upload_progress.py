@@ -0,0 +1,71 @@
+import sys
+import shutil
+import threading
+
+
+class UploadProgress:
+    """
+    One progress display for several package uploads running concurrently.
+
+    Every upload reports its steps and transferred bytes through its own
+    reporter. On a terminal all uploads are shown on one line that is redrawn in
+    place, otherwise every step is printed prefixed with the package name.
+    """
+
+    def __init__(self, names, stream=None):
+        self.names = list(names)
+        self.stream = stream or sys.stdout
+        self.interactive = self.stream.isatty()
+        self.states = {name: "queued" for name in self.names}
+        self.done = set()
+        self._lock = threading.Lock()
+
+    def reporter(self, name):
+        return UploadReporter(self, name)
+
+    def update(self, name, state, log=True):
+        with self._lock:
+            self.states[name] = state
+            if self.interactive:
+                self._render()
+            elif log:
+                self.stream.write(f"[{name}] {state}\n")
+                self.stream.flush()
+
+    def finish(self, name, state):
+        with self._lock:
+            self.done.add(name)
+        self.update(name, state)
+
+    def close(self):
+        if self.interactive:
+            self.stream.write("\n")
+            self.stream.flush()
+
+    def _render(self):
+        width = shutil.get_terminal_size((120, 20)).columns
+        parts = [f"{name}: {self.states[name]}" for name in self.names if name not in self.done]
+        line = f"Uploads {len(self.done)}/{len(self.names)} done | " + " | ".join(parts)
+        self.stream.write("\r" + line[:width - 1].ljust(width - 1))
+        self.stream.flush()
+
+
+class UploadReporter:
+    """
+    Reports the progress of one upload to its UploadProgress.
+    """
+
+    def __init__(self, progress, name):
+        self.progress = progress
+        self.name = name
+        self._percent = None
+
+    def message(self, text):
+        self.progress.update(self.name, text.strip().rstrip("!"))
+
+    def transfer(self, sent, total):
+        percent = int(sent * 100 / total) if total else 100
+        if percent != self._percent:
+            self._percent = percent
+            # the byte counts are only drawn on a terminal, a log gets the steps
+            self.progress.update(self.name, f"uploading {percent}%", log=False)
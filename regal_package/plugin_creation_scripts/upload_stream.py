@@ -0,0 +1,126 @@
+import os
+import time
+import uuid
+import hashlib
+
+
+class MultipartFileStream:
+    """
+    Streams a multipart/form-data body with one file part, reading the file in
+    fixed size chunks so that memory stays flat regardless of the package size.
+
+    The stream is passed as `data` to requests together with its content_type
+    header. It has a length, so the body is sent with a Content-Length instead of
+    chunked transfer encoding. Use it as a context manager to close the file.
+    on_progress is called with the bytes sent so far and the body length.
+
+    The file bytes are hashed and counted while they are sent, so a package is
+    read once for both its upload and its SHA-256.
+    """
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, path, field_name="file", file_name=None, file_content_type="application/octet-stream",
+                 chunk_size=CHUNK_SIZE, on_progress=None):
+        self.path = path
+        self.on_progress = on_progress
+        self.chunk_size = chunk_size
+        self.boundary = uuid.uuid4().hex
+        file_name = file_name or os.path.basename(path)
+
+        head = (f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{field_name}"; filename="{file_name}"\r\n'
+                f'Content-Type: {file_content_type}\r\n\r\n').encode()
+        tail = f'\r\n--{self.boundary}--\r\n'.encode()
+
+        self.file = open(path, 'rb')
+        self.file_size = os.fstat(self.file.fileno()).st_size
+        self._segments = [head, self.file, tail]
+        self._segment = 0
+        self._offset = 0
+        self.length = len(head) + self.file_size + len(tail)
+        self.bytes_sent = 0
+        self.file_bytes = 0
+        self.sha256 = hashlib.sha256()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        return self.length - self.bytes_sent
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def read(self, size=-1):
+        """
+        Returns the next part of the body, at most `size` bytes. A negative size
+        reads one chunk rather than the whole body.
+        """
+        if size is None or size < 0:
+            size = self.chunk_size
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+
+        data = b''
+        while len(data) < size and self._segment < len(self._segments):
+            segment = self._segments[self._segment]
+            if isinstance(segment, bytes):
+                part = segment[self._offset:self._offset + size - len(data)]
+                self._offset += len(part)
+                if self._offset >= len(segment):
+                    self._segment += 1
+                    self._offset = 0
+            else:
+                part = segment.read(size - len(data))
+                if not part:
+                    self._segment += 1
+                self.sha256.update(part)
+                self.file_bytes += len(part)
+            data += part
+
+        self.bytes_sent += len(data)
+        if self.on_progress is not None:
+            self.on_progress(self.bytes_sent, self.length)
+        if not data and self.finished_at is None:
+            self.finished_at = time.monotonic()
+        return data
+
+    def close(self):
+        self.file.close()
+
+    @property
+    def digest(self):
+        """
+        Returns:
+            str: The hex SHA-256 of the file, once the whole body was read.
+        """
+        if self.file_bytes != self.file_size:
+            return None
+        return self.sha256.hexdigest()
+
+    def throughput(self):
+        """
+        Returns:
+            tuple: (bytes sent, seconds spent, bytes per second)
+        """
+        if self.started_at is None:
+            return 0, 0.0, 0.0
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return self.bytes_sent, elapsed, self.bytes_sent / elapsed if elapsed > 0 else 0.0
+
+
+def format_throughput(bytes_sent, elapsed, rate):
+    return f"{bytes_sent / 1048576:.1f} MB in {elapsed:.1f}s ({rate / 1048576:.1f} MB/s)"